@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 
-from api.routers import review
+from api.routers import contracts, review
 
 api_router = APIRouter()
 api_router.include_router(review.router)
+api_router.include_router(contracts.router)
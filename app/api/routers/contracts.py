@@ -0,0 +1,56 @@
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, HTTPException, Query, Response
+
+from store.analysis_store import get_store
+
+router = APIRouter(tags=["contracts"])
+
+
+@router.get("/contracts")
+def list_contracts(
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    risk_level: str | None = None,
+) -> List[Dict[str, Any]]:
+    """List the reviewed contracts, newest first. The cursor of the next page is in the X-Next-Cursor header."""
+    try:
+        contracts, next_cursor = get_store().list_contracts(limit=limit, cursor=cursor, risk_level=risk_level)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return contracts
+
+
+@router.get("/contracts/{contract_id}")
+def get_contract(contract_id: str) -> Dict[str, Any]:
+    contract = get_store().get_contract(contract_id)
+    if contract is None:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    return contract
+
+
+@router.get("/contracts/{contract_id}/analysis")
+def get_analysis(contract_id: str) -> Dict[str, Any]:
+    analysis = get_store().get_analysis(contract_id)
+    if analysis is None:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    return analysis
+
+
+@router.get("/issues/search")
+def search_issues(
+    q: str | None = None,
+    severity: str | None = None,
+    category: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+) -> List[Dict[str, Any]]:
+    """Search the issues of all the reviewed contracts."""
+    return get_store().search_issues(
+        query=q, severity=severity, category=category, since=since, until=until, limit=limit, offset=offset
+    )
@@ -0,0 +1,106 @@
+import asyncio
+import contextlib
+import os
+import uuid
+from typing import Any, Dict, Iterator, Literal
+from urllib.parse import quote
+
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+
+from controller.review_controller import ReviewController
+from workflow.clients import get_llm
+from workflow.preflight import AdmissionError, CapacityError, get_admission
+
+DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+MAX_UPLOAD_BYTES = int(os.environ.get("REVIEW_MAX_UPLOAD_MB", 50)) * 1024 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+
+router = APIRouter(tags=["review"])
+
+Profile = Literal["full", "standard", "fast"]
+
+
+def get_controller(summary: bool, profile: Profile) -> ReviewController:
+    # 所有控制器共用一个准入控制器，在飞 token 的上限对整个进程生效
+    return ReviewController.shared(
+        llm=get_llm(), summary=summary, policy=profile, store=True, parse_cache=True, admission=get_admission()
+    )
+
+
+@contextlib.contextmanager
+def admission_errors() -> Iterator[None]:
+    """Map the rejections of the admission controller to 429 (no capacity now) and 413 (the job is too large)."""
+    try:
+        yield
+    except CapacityError as e:
+        raise HTTPException(status_code=429, detail=str(e)) from e
+    except AdmissionError as e:
+        raise HTTPException(status_code=413, detail=str(e)) from e
+
+
+async def read_upload(file: UploadFile) -> bytes:
+    """Read an uploaded docx into memory, the review never writes it to disk."""
+    data = await file.read(MAX_UPLOAD_BYTES + 1)
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"File exceeds {MAX_UPLOAD_BYTES // 1024 // 1024} MB")
+    # docx 是 zip 包
+    if not data.startswith(b"PK"):
+        raise HTTPException(status_code=400, detail="Only .docx files are supported")
+    return data
+
+
+def iter_chunks(data: bytes) -> Iterator[bytes]:
+    view = memoryview(data)
+    for start in range(0, len(view), STREAM_CHUNK_SIZE):
+        yield bytes(view[start : start + STREAM_CHUNK_SIZE])
+
+
+@router.post("/review")
+async def review(
+    file: UploadFile = File(...),
+    profile: Profile = Form("full"),
+    summary: bool = Form(False),
+) -> Dict[str, Any]:
+    """Review an uploaded contract and return {contract, analysis} as stored, in the shape of the UI types."""
+    data = await read_upload(file)
+    controller = get_controller(summary, profile)
+    review_id = uuid.uuid4().hex
+    with admission_errors():
+        await controller.review_bytes(data, review_id=review_id, name=file.filename or f"{review_id}.docx")
+    store = controller.store
+    assert store is not None
+    contract, analysis = await asyncio.gather(
+        asyncio.to_thread(store.get_contract, review_id), asyncio.to_thread(store.get_analysis, review_id)
+    )
+    return {"contract": contract, "analysis": analysis}
+
+
+@router.post("/review/document")
+async def review_document(
+    file: UploadFile = File(...),
+    profile: Profile = Form("full"),
+    summary: bool = Form(False),
+    font_color: bool = Form(True),
+) -> StreamingResponse:
+    """Review an uploaded contract and stream back the document annotated with the issues as comments."""
+    data = await read_upload(file)
+    controller = get_controller(summary, profile)
+    review_id = uuid.uuid4().hex
+    name = file.filename or f"{review_id}.docx"
+    with admission_errors():
+        analysis, reviewed = await controller.review_bytes(
+            data, font_color=font_color, review_id=review_id, name=name
+        )
+    stem = os.path.splitext(name)[0]
+    headers = {
+        "Content-Disposition": f"attachment; filename*=UTF-8''{quote(f'{stem}_reviewed.docx')}",
+        "Content-Length": str(len(reviewed)),
+        "X-Review-Id": review_id,
+        "X-Issue-Count": str(len(analysis.issues)),
+    }
+    if analysis.riskLevel:
+        headers["X-Risk-Level"] = analysis.riskLevel
+    if analysis.score is not None:
+        headers["X-Score"] = str(analysis.score)
+    return StreamingResponse(iter_chunks(reviewed), media_type=DOCX_MEDIA_TYPE, headers=headers)
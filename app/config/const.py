@@ -5,3 +5,16 @@ BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 LOG_DIR = os.path.join(BASE_PATH, 'logs')
 
+DATA_DIR = os.path.join(BASE_PATH, 'data')
+
+ISSUE_STATS_PATH = os.path.join(DATA_DIR, 'issue_stats.jsonl')
+
+RISK_SCORER_PATH = os.path.join(DATA_DIR, 'risk_scorer.json')
+
+ANALYSIS_DB_PATH = os.path.join(DATA_DIR, 'analysis.db')
+
+CHECKPOINT_DIR = os.path.join(DATA_DIR, 'checkpoints')
+
+TRACE_DIR = os.path.join(DATA_DIR, 'traces')
+
+PARSE_CACHE_DIR = os.path.join(DATA_DIR, 'parse_cache')
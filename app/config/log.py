@@ -1,14 +1,66 @@
 import datetime
 import logging
 import os
+import random
 import re
 import sys
+import time
+from typing import Any, Dict
 
 from loguru import logger
 
 from config.const import LOG_DIR
 
 
+def parse_logger_config(value: str) -> Dict[str, float]:
+    """
+    Parse a "name=value,name=value" environment variable, e.g. LOG_SAMPLING="httpx=0.1,llama_index=0.05".
+    """
+    config = {}
+    for item in value.split(","):
+        if "=" in item:
+            name, number = item.split("=", 1)
+            config[name.strip()] = float(number)
+    return config
+
+
+class Sampler(logging.Filter):
+    """
+    Per-logger sampling and rate limiting of stdlib records below WARNING, as a filter of the intercept handler.
+
+    Loggers are matched by their top-level package name (e.g. httpx, llama_index).
+    """
+
+    def __init__(self, sampling: Dict[str, float], rate_limits: Dict[str, float]) -> None:
+        super().__init__()
+        self.sampling = sampling
+        self.rate_limits = rate_limits
+        # 令牌桶: 名称 -> [剩余令牌, 上次更新时间]
+        self._buckets: Dict[str, list[float]] = {}
+
+    def allow(self, name: str, levelno: int) -> bool:
+        if levelno >= logging.WARNING:
+            return True
+        top = name.split(".", 1)[0]
+        rate = self.sampling.get(top)
+        if rate is not None and random.random() >= rate:
+            return False
+        limit = self.rate_limits.get(top)
+        if limit is None:
+            return True
+        now = time.monotonic()
+        bucket = self._buckets.setdefault(top, [limit, now])
+        bucket[0] = min(limit, bucket[0] + (now - bucket[1]) * limit)
+        bucket[1] = now
+        if bucket[0] < 1:
+            return False
+        bucket[0] -= 1
+        return True
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return self.allow(record.name, record.levelno)
+
+
 class InterceptHandler(logging.Handler):
     def emit(self, record: logging.LogRecord) -> None:
         # get corresponding Loguru level if it exists
@@ -17,13 +69,16 @@ class InterceptHandler(logging.Handler):
         except ValueError:
             level = record.levelno  # type: ignore
 
-        # find caller from where originated the logged message
-        frame, depth = sys._getframe(6), 6
-        while frame and frame.f_code.co_filename == logging.__file__:
-            frame = frame.f_back  # type: ignore
-            depth += 1
+        # 调用位置直接取自 LogRecord，由 patch_stdlib_record 写回，不再逐帧查找调用方
+        logger.bind(stdlib=(record.name, record.funcName, record.lineno)).opt(exception=record.exc_info).log(
+            level, record.getMessage()
+        )
 
-        logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
+
+def patch_stdlib_record(record: Dict[str, Any]) -> None:
+    stdlib = record["extra"].pop("stdlib", None)
+    if stdlib is not None:
+        record["name"], record["function"], record["line"] = stdlib
 
 
 def clear_timeout_logs(log_dir: str, keep_day: int = 15) -> None:
@@ -51,55 +106,89 @@ def clear_timeout_logs(log_dir: str, keep_day: int = 15) -> None:
                     logging.info(f"删除超时日志成功: {filepath}")
 
 
-def init() -> None:
-    clear_timeout_logs(LOG_DIR, keep_day=15)
-
-
 LOG_LEVEL = logging.getLevelName(os.environ.get("LOG_LEVEL", "INFO"))
+# 按 logger 采样比例与每秒条数上限，只作用于 WARNING 以下的标准库日志
+LOG_SAMPLING = parse_logger_config(os.environ.get("LOG_SAMPLING", "httpx=0.1,httpcore=0.01,llama_index=0.1"))
+LOG_RATE_LIMIT = parse_logger_config(os.environ.get("LOG_RATE_LIMIT", "httpx=20,httpcore=20,llama_index=50"))
+# 日志文件是否输出为 json
+LOG_JSON = os.environ.get("LOG_JSON", "1") == "1"
+
+LOG_FORMAT = "{time} {level} [{extra[review_id]}] {message} | PID:{process} | TID: {thread}"
 
 intercept_handler = InterceptHandler()
-logging.root.setLevel(LOG_LEVEL)
-
-seen = set()
-for name in [
-    *logging.root.manager.loggerDict.keys(),
-    "gunicorn",
-    "gunicorn.access",
-    "gunicorn.error",
-    "uvicorn",
-    "uvicorn.access",
-    "uvicorn.error",
-]:
-    if name not in seen:
-        seen.add(name.split(".")[0])
-        logging.getLogger(name).handlers = [intercept_handler]
-
-logger.configure(handlers=[{"sink": sys.stderr, "level": LOG_LEVEL}])
-
-# [定义日志路径]
-os.makedirs(LOG_DIR, exist_ok=True)
-
-logger.add(
-    os.path.join(LOG_DIR, "info_{time:%Y-%m-%d}.log"),
-    level="INFO",
-    colorize=False,
-    rotation="1 days",
-    retention="7 days",
-    backtrace=False,
-    diagnose=False,
-    encoding="utf-8",
-    format="{time} {level} {message} | PID:{process} | TID: {thread}",
-    catch=False,
-)
-logger.add(
-    os.path.join(LOG_DIR, "error_{time:%Y-%m-%d}.log"),
-    level="ERROR",
-    colorize=False,
-    rotation="1 days",
-    retention="15 days",
-    backtrace=False,
-    diagnose=False,
-    encoding="utf-8",
-    format="{time} {level} {message} | PID:{process} | TID: {thread}",
-    catch=False,
-)
+sampler = Sampler(LOG_SAMPLING, LOG_RATE_LIMIT)
+intercept_handler.addFilter(sampler)
+# 服务器的 logger 自带 handler 且不向上传递，需要直接挂载
+SERVER_LOGGERS = ("gunicorn", "gunicorn.access", "gunicorn.error", "uvicorn", "uvicorn.access", "uvicorn.error")
+
+_configured = False
+
+
+def setup() -> None:
+    """
+    Route the stdlib logging to loguru and register the log file sinks.
+
+    The intercept handler is installed on the root logger, so the loggers created later (httpx and
+    llama_index are imported on first use) are routed too. Records below LOG_LEVEL are dropped by the
+    handler before sampling.
+    """
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
+    intercept_handler.setLevel(LOG_LEVEL)
+    logging.basicConfig(handlers=[intercept_handler], level=0, force=True)
+    # 已创建的 logger 若自带 handler，会与根 logger 重复输出
+    for name, existing in list(logging.root.manager.loggerDict.items()):
+        if isinstance(existing, logging.Logger) and name not in SERVER_LOGGERS:
+            existing.handlers = []
+            existing.propagate = True
+    for name in SERVER_LOGGERS:
+        server_logger = logging.getLogger(name)
+        server_logger.handlers = [intercept_handler]
+        server_logger.propagate = False
+
+    # 所有 sink 都通过队列在后台线程写入，避免阻塞驱动 ReviewerAgent 的事件循环
+    logger.configure(
+        handlers=[{"sink": sys.stderr, "level": LOG_LEVEL, "enqueue": True}],
+        extra={"review_id": "-"},
+        patcher=patch_stdlib_record,  # type: ignore[arg-type]
+    )
+
+    # [定义日志路径]
+    os.makedirs(LOG_DIR, exist_ok=True)
+
+    logger.add(
+        os.path.join(LOG_DIR, "info_{time:%Y-%m-%d}.log"),
+        level="INFO",
+        colorize=False,
+        rotation="1 days",
+        retention="7 days",
+        backtrace=False,
+        diagnose=False,
+        encoding="utf-8",
+        format=LOG_FORMAT,
+        serialize=LOG_JSON,
+        enqueue=True,
+        catch=False,
+    )
+    logger.add(
+        os.path.join(LOG_DIR, "error_{time:%Y-%m-%d}.log"),
+        level="ERROR",
+        colorize=False,
+        rotation="1 days",
+        retention="15 days",
+        backtrace=False,
+        diagnose=False,
+        encoding="utf-8",
+        format=LOG_FORMAT,
+        serialize=LOG_JSON,
+        enqueue=True,
+        catch=False,
+    )
+
+
+def init() -> None:
+    setup()
+    clear_timeout_logs(LOG_DIR, keep_day=15)
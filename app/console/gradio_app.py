@@ -0,0 +1,116 @@
+"""
+Gradio review console.
+
+Usage:
+    cd app && LLM_MODEL=... LLM_API_BASE=... LLM_API_KEY=... python -m console.gradio_app
+"""
+import json
+import os
+import tempfile
+from typing import Any, AsyncIterator, List
+
+import gradio as gr
+
+from config import log
+from controller.review_controller import ReviewController
+from workflow.clients import get_llm
+
+# 同时进行的审查数量与排队上限
+CONSOLE_CONCURRENCY = int(os.environ.get("CONSOLE_CONCURRENCY", 4))
+CONSOLE_QUEUE_SIZE = int(os.environ.get("CONSOLE_QUEUE_SIZE", 64))
+# 审查结果在 Gradio 缓存中保留的秒数
+CONSOLE_CACHE_TTL = int(os.environ.get("CONSOLE_CACHE_TTL", 3600))
+
+ISSUE_HEADERS = ["Content", "分类", "严重程度", "问题描述", "修改建议"]
+SEVERITY_LABELS = {"high": "高", "medium": "中", "low": "低"}
+
+
+def progress_html(done: int, total: int, stage: str) -> str:
+    percent = int(done / total * 100) if total else 0
+    return (
+        f"<div><b>{stage}</b> {done}/{total or '?'} 部分</div>"
+        f'<progress value="{percent}" max="100" style="width:100%"></progress>'
+    )
+
+
+def issue_rows(issues: List[dict[str, Any]]) -> List[List[Any]]:
+    return [
+        [
+            issue["id"],
+            issue.get("category") or "",
+            SEVERITY_LABELS.get(issue["severity"], issue["severity"]),
+            issue["description"],
+            issue["recommendation"],
+        ]
+        for issue in issues
+    ]
+
+
+async def review(
+    document_path: str | None, profile: str, summary: bool
+) -> AsyncIterator[tuple[str, List[List[Any]], str, str | None]]:
+    """Review the uploaded document and yield (progress, issues, summary, reviewed document) as parts finish."""
+    if not document_path:
+        raise gr.Error("请先上传 .docx 合同文件")
+
+    controller = ReviewController.shared(llm=get_llm(), summary=summary, policy=profile)
+    name = os.path.splitext(os.path.basename(document_path))[0]
+
+    rows: List[List[Any]] = []
+    done = total = 0
+    summary_md = ""
+    yield progress_html(done, total, "分类中"), rows, summary_md, None
+
+    # Gradio 在输出时把文件复制到自己的缓存目录，审查结束后即可删除临时目录
+    with tempfile.TemporaryDirectory(prefix="review_") as save_dir:
+        save_path = os.path.join(save_dir, f"{name}_reviewed.docx")
+        async for event in controller.astream(document_path, save_path):
+            match event.msg:
+                case "Classify":
+                    total = len(json.loads(event.data)["parts"])
+                case "Reviewing":
+                    done += 1
+                    rows = rows + issue_rows(event.data["issues"])
+                case "Score":
+                    summary_md = f"**评分：** {event.data['score']}　**风险等级：** {event.data['riskLevel']}"
+                case "Summary":
+                    summary_md += "\n\n" + json.loads(event.data)["summary"]
+                case "Saved":
+                    yield progress_html(done, total, "完成"), rows, summary_md, save_path
+                    continue
+            yield progress_html(done, total, "审查中"), rows, summary_md, None
+
+
+def build() -> gr.Blocks:
+    # 定期清理 Gradio 缓存中的审查结果
+    with gr.Blocks(title="合同审查", delete_cache=(CONSOLE_CACHE_TTL, CONSOLE_CACHE_TTL)) as demo:
+        gr.Markdown("# 合同审查")
+        with gr.Row():
+            with gr.Column(scale=1):
+                document = gr.File(label="合同文件", file_types=[".docx"], type="filepath")
+                profile = gr.Dropdown(
+                    choices=["full", "standard", "fast"], value="full", label="审查模式"
+                )
+                summary = gr.Checkbox(value=True, label="生成总结")
+                button = gr.Button("开始审查", variant="primary")
+                reviewed = gr.File(label="审查结果下载")
+            with gr.Column(scale=3):
+                progress = gr.HTML(progress_html(0, 0, "等待上传"))
+                summary_md = gr.Markdown()
+                issues = gr.Dataframe(headers=ISSUE_HEADERS, wrap=True, interactive=False)
+
+        button.click(
+            review,
+            inputs=[document, profile, summary],
+            outputs=[progress, issues, summary_md, reviewed],
+            concurrency_limit=CONSOLE_CONCURRENCY,
+        )
+    return demo
+
+
+if __name__ == "__main__":
+    log.init()
+    build().queue(max_size=CONSOLE_QUEUE_SIZE).launch(
+        server_name=os.environ.get("CONSOLE_HOST", "0.0.0.0"),
+        server_port=int(os.environ.get("CONSOLE_PORT", 7860)),
+    )
@@ -0,0 +1,138 @@
+import asyncio
+import os
+from typing import IO, TYPE_CHECKING, Any, Callable, Dict, List, Tuple
+
+from loguru import logger
+
+from controller.review_controller import ReviewController
+
+if TYPE_CHECKING:
+    from docx.document import Document as DocxDocument
+    from llama_index.core.llms import LLM
+
+    from workflow.bundle import Conflict
+    from workflow.schema import BundleAnalysis, ConflictIssue, ContractAnalysis, ResultIssue
+    from workflow.utils import Content, DocumentSource
+
+
+class BundleController:
+    """
+    Review the documents of one deal (a master agreement plus annexes, SOWs, ...) together.
+
+    All the documents are parsed concurrently and their parties, defined terms, labelled amounts and
+    labelled dates go into one shared index. The values that differ between documents are checked by a
+    single LLM call, which only sees the conflicting clauses; the confirmed inconsistencies are added as
+    issues to every document involved. The master agreement gets the full review and the annexes the
+    cheaper annex profile, so a bundle costs much less than reviewing every document on its own.
+    """
+
+    def __init__(
+        self,
+        llm: "LLM | None" = None,
+        annex_profile: str = "fast",
+        controller: ReviewController | None = None,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Args:
+            llm: The LLM to use.
+            annex_profile: The review profile of the documents other than the master agreement.
+            controller: The controller that reviews and annotates each document, created from llm and kwargs
+                if not given.
+            **kwargs: Additional arguments of ReviewController.
+        """
+        self.controller = controller or ReviewController(llm=llm, **kwargs)
+        self.llm = llm or self.controller.reviewer.llm
+        self.annex_profile = annex_profile
+
+    async def review(
+        self,
+        documents: Dict[str, "DocumentSource"],
+        save_to: Callable[[str], str | IO[bytes]] | str,
+        master: str | None = None,
+        font_color: bool = True,
+    ) -> "BundleAnalysis":
+        """
+        Review the documents of a bundle and save each reviewed document.
+
+        Args:
+            documents: The path, content or file object of each document, by file name.
+            save_to: The directory to save the reviewed documents to under their names, or a function
+                returning the path or file object to save a document to from its name.
+            master: The name of the master agreement, defaults to the first document.
+            font_color: Whether to set the font color to the severity color.
+        Returns:
+            The analysis of each document and the number of cross-document conflicts and issues.
+        """
+        from workflow.bundle import FactIndex, conflict_issues
+        from workflow.schema import BundleAnalysis
+        from workflow.tracing import span
+        from workflow.utils import get_contents
+
+        if not documents:
+            raise ValueError("The bundle has no documents")
+        master = master or next(iter(documents))
+        if master not in documents:
+            raise ValueError(f"The master agreement {master} is not in the bundle")
+        if isinstance(save_to, str):
+            os.makedirs(save_to, exist_ok=True)
+
+        with span("bundle", documents=len(documents)):
+            with span("bundle.parse"):
+                results = await asyncio.gather(
+                    *(
+                        asyncio.to_thread(get_contents, source, streaming=self.controller.streaming)
+                        for source in documents.values()
+                    )
+                )
+            parsed: Dict[str, Tuple[List["Content"], "DocxDocument"]] = dict(zip(documents, results))
+
+            index = FactIndex()
+            for name, (contents, _) in parsed.items():
+                index.add(name, contents)
+            conflicts = index.conflicts()
+            cross_issues: Dict[str, List["ResultIssue"]] = {}
+            if conflicts:
+                cross_issues = conflict_issues(conflicts, await self._check_conflicts(conflicts))
+            logger.info(
+                f"Bundle of {len(documents)} documents: {len(conflicts)} conflicts, "
+                f"{sum(len(issues) for issues in cross_issues.values())} cross-document issues"
+            )
+
+            analyses: List["ContractAnalysis"] = await asyncio.gather(
+                *(
+                    self.controller.review(
+                        source,
+                        os.path.join(save_to, name) if isinstance(save_to, str) else save_to(name),
+                        font_color=font_color,
+                        name=name,
+                        profile=None if name == master else self.annex_profile,
+                        parsed=parsed[name],
+                        extra_issues=cross_issues.get(name),
+                    )
+                    for name, source in documents.items()
+                )
+            )
+        return BundleAnalysis(
+            documents=dict(zip(documents, analyses)),
+            master=master,
+            conflicts=len(conflicts),
+            cross_issues=sum(len(issues) for issues in cross_issues.values()),
+        )
+
+    async def _check_conflicts(self, conflicts: List["Conflict"]) -> List["ConflictIssue"]:
+        """Ask the LLM which of the conflicts are real inconsistencies, in one call."""
+        from llama_index.core.prompts import PromptTemplate
+
+        from prompts.review import cross_document_prompt
+        from workflow.bundle import format_conflicts
+        from workflow.schema import ConflictIssueList
+        from workflow.tracing import span
+
+        with span("llm.cross_document", conflicts=len(conflicts)):
+            result = await self.llm.apredict(
+                PromptTemplate(cross_document_prompt),
+                conflicts=format_conflicts(conflicts),
+                schema=ConflictIssueList.model_json_schema(),
+            )
+        return ConflictIssueList.model_validate_json(result).issues
@@ -1,54 +1,404 @@
-from typing import Any, Literal
+import asyncio
+import contextlib
+import io
+import os
+import threading
+import uuid
+from typing import IO, TYPE_CHECKING, Any, AsyncIterator, ClassVar, Dict, List, Literal, Tuple
 
-from docx.shared import RGBColor
-from llama_index.core.llms import LLM
+from loguru import logger
 
-from workflow.reviewer import ContractAnalysis, ReviewerAgent, InputEvent
-from workflow.utils import Content, get_contents
+# llama-index / docx / mammoth 导入耗时较长，在首次使用时再导入，保证 CLI 与 worker 的冷启动速度
+if TYPE_CHECKING:
+    from docx.document import Document as DocxDocument
+    from llama_index.core.llms import LLM
+
+    from store.analysis_store import AnalysisStore
+    from workflow.checkpoint import CheckpointStore
+    from workflow.parse_cache import ParseCache
+    from workflow.preflight import AdmissionController, Decision, Estimate, PreflightEstimator
+    from workflow.reviewer import ContractAnalysis, ReviewerAgent, StreamEvent
+    from workflow.schema import ResultIssue
+    from workflow.utils import Content, DocumentSource
 
 
 class ReviewController:
+    """
+    Review a document and add the issues as comments.
+
+    A controller keeps no per-review state, so one instance can serve concurrent ``review`` calls.
+    Use ``ReviewController.shared`` to reuse warm instances (and their LLM connections) across requests.
+    """
+
+    _instances: ClassVar[Dict[Tuple[Any, ...], "ReviewController"]] = {}
+    _instances_lock: ClassVar[threading.Lock] = threading.Lock()
+
     def __init__(
         self,
-        llm: LLM | None = None,
+        llm: "LLM | None" = None,
         summary: bool = False,
         author: str = "XiaoXi Reviewer",
         initials: str = "XR",
+        streaming: bool = False,
+        store: "AnalysisStore | bool" = False,
+        admission: "AdmissionController | None" = None,
+        checkpoint: "CheckpointStore | bool" = False,
+        parse_cache: "ParseCache | bool" = False,
         **kwargs: Any,
     ) -> None:
+        """
+        Args:
+            llm: The LLM to use.
+            summary: Whether to summarize the issues.
+            author: The author of the comments.
+            initials: The initials of the comment author.
+            streaming: Whether to parse the document with the streaming lxml scanner, for huge documents.
+            store: The analysis store to persist the reviews in, True for the default store.
+            admission: Estimate every review before it starts and reject, downgrade or route oversize ones,
+                keeping the predicted tokens of the running reviews under a ceiling. None to disable.
+            checkpoint: The checkpoint store of the reviews, True for the default store. Reviews are checkpointed
+                per step and can be resumed with ``review(..., resume=True)`` after a crash or timeout.
+            parse_cache: The parse cache, True for the default cache. Re-uploads of a document skip parsing
+                and only load the document for annotation.
+            **kwargs: Additional arguments of ReviewerAgent.
+        """
+        from workflow.reviewer import ReviewerAgent
+
         self.author = author
         self.initials = initials
+        self.streaming = streaming
+        if store is True:
+            from store.analysis_store import get_store
+
+            store = get_store()
+        self.store = store or None
+        self.admission = admission
+        if checkpoint is True:
+            from workflow.checkpoint import CheckpointStore
 
-        self.reviewer = ReviewerAgent(llm=llm, summary=summary, **kwargs)
+            checkpoint = CheckpointStore()
+        self.checkpoint = checkpoint or None
+        if parse_cache is True:
+            from workflow.parse_cache import ParseCache
 
-    async def review(self, document_path: str, save_path: str, font_color: bool = True) -> ContractAnalysis:
+            parse_cache = ParseCache()
+        self.parse_cache = parse_cache or None
+
+        self.reviewer = ReviewerAgent(llm=llm, summary=summary, checkpoint=self.checkpoint, **kwargs)
+        self._reviewer_kwargs = dict(summary=summary, checkpoint=self.checkpoint, **kwargs)
+        # 降级或路由到大模型时使用的 reviewer
+        self._variants: Dict[str, "ReviewerAgent"] = {}
+        self._estimator: "PreflightEstimator | None" = None
+
+    @classmethod
+    def shared(
+        cls,
+        llm: "LLM | None" = None,
+        summary: bool = False,
+        author: str = "XiaoXi Reviewer",
+        initials: str = "XR",
+        **kwargs: Any,
+    ) -> "ReviewController":
+        """
+        Get a process-wide controller for the given arguments, creating it on first use.
+
+        Pass a pooled LLM from ``workflow.clients.get_llm`` so that the http connections are reused too.
+        """
+        key = (id(llm), summary, author, initials, repr(sorted(kwargs.items())))
+        with cls._instances_lock:
+            controller = cls._instances.get(key)
+            if controller is None:
+                controller = cls(llm=llm, summary=summary, author=author, initials=initials, **kwargs)
+                cls._instances[key] = controller
+        return controller
+
+    async def review(
+        self,
+        document_path: "DocumentSource",
+        save_path: str | IO[bytes],
+        font_color: bool = True,
+        review_id: str | None = None,
+        resume: bool = False,
+        name: str | None = None,
+        profile: str | None = None,
+        parsed: "Tuple[List[Content], DocxDocument] | None" = None,
+        extra_issues: "List[ResultIssue] | None" = None,
+    ) -> "ContractAnalysis":
         """
         Review the document and save the result to the save_path.
 
         Args:
-            document_path: The path to the document to review.
-            save_path: The path to save the reviewed document.
+            document_path: The path, content or file object of the document to review.
+            save_path: The path or file object to save the reviewed document to.
             font_color: Whether to set the font color to the severity color.
+            review_id: The id attached to every log record of this review, generated if not given.
+            resume: Resume from the checkpoint of the latest unfinished review of the same document with
+                the same model, policy and output schema, only the unfinished steps are run. Requires a
+                checkpoint store.
+            name: The file name of the document, defaults to the base name of the path.
+            profile: Review with this profile (full, standard, fast) instead of the policy of the controller.
+            parsed: The contents and document already parsed from document_path, e.g. by a bundle review.
+            extra_issues: Issues found outside the workflow (e.g. cross-document checks), added to the analysis
+                and annotated with the others. With a local scorer, the score and the risk level are computed
+                again including them; the LLM summary text is kept as is.
         Returns:
             The contract analysis result.
         """
-        contents, document = get_contents(document_path)
+        ret = None
+        async for event in self.astream(
+            document_path,
+            save_path,
+            font_color=font_color,
+            review_id=review_id,
+            resume=resume,
+            name=name,
+            profile=profile,
+            parsed=parsed,
+            extra_issues=extra_issues,
+        ):
+            if event.msg == "Saved":
+                ret = event.data
+        return ret  # type: ignore[return-value]
 
-        ret: ContractAnalysis = await self.reviewer.run(start_event=InputEvent(contents=contents))
+    async def astream(
+        self,
+        document_path: "DocumentSource",
+        save_path: str | IO[bytes],
+        font_color: bool = True,
+        review_id: str | None = None,
+        resume: bool = False,
+        name: str | None = None,
+        profile: str | None = None,
+        parsed: "Tuple[List[Content], DocxDocument] | None" = None,
+        extra_issues: "List[ResultIssue] | None" = None,
+    ) -> AsyncIterator["StreamEvent"]:
+        """
+        Review the document and stream the progress.
 
-        for issue in ret.issues:
-            content_id = issue.id
+        Yields the StreamEvents of the workflow (Classify, Reviewing, Score, Summary, ...) as they happen,
+        and a final "Saved" event whose data is the contract analysis once the document is saved.
 
-            cur_content = contents[content_id]
-            comment = f"{issue.description}\n\nRecommendation: {issue.recommendation}"
-            self.add_comment(cur_content, comment, severity=issue.severity, font_color=font_color)
+        Args:
+            document_path: The path, content or file object of the document to review.
+            save_path: The path or file object to save the reviewed document to.
+            font_color: Whether to set the font color to the severity color.
+            review_id: The id attached to every log record of this review, generated if not given.
+                It is also the contract id in the analysis store.
+            resume: Resume from the checkpoint of the latest unfinished review of the same document with
+                the same model, policy and output schema.
+            name: The file name of the document, defaults to the base name of the path.
+            profile: Review with this profile (full, standard, fast) instead of the policy of the controller.
+            parsed: The contents and document already parsed from document_path, e.g. by a bundle review.
+            extra_issues: Issues found outside the workflow (e.g. cross-document checks), added to the analysis
+                and annotated with the others. With a local scorer, the score and the risk level are computed
+                again including them; the LLM summary text is kept as is.
+        """
+        from workflow.reviewer import InputEvent, StreamEvent
+        from workflow.tracing import profile as profiler
+        from workflow.tracing import span
+        from workflow.utils import get_contents
 
-        document.save(save_path)
-        return ret
+        review_id = review_id or uuid.uuid4().hex
+        if name is None:
+            name = os.path.basename(document_path) if isinstance(document_path, str) else f"{review_id}.docx"
+        with (
+            logger.contextualize(review_id=review_id),
+            profiler(review_id),
+            span("review", review_id=review_id, document=name),
+        ):
+            logger.info(f"Review started: {name}")
+            document_hash = None
+            if self.checkpoint is not None or self.parse_cache is not None:
+                from workflow.checkpoint import document_key
+
+                document_hash = document_key(document_path)
+
+            document: "DocxDocument | None" = None
+            contents = None
+            if parsed is not None:
+                contents, document = parsed
+            elif self.parse_cache is not None:
+                with span("parse_cache.get") as s:
+                    contents = self.parse_cache.get(document_hash, streaming=self.streaming)  # type: ignore[arg-type]
+                    if s is not None:
+                        s.set(hit=contents is not None)
+            if contents is None:
+                # 解析、标注和保存都是 CPU 密集的同步操作，放到线程中执行，不阻塞事件循环中的其他审查
+                parsed = await asyncio.to_thread(get_contents, document_path, streaming=self.streaming)
+                contents, document = parsed
+                if self.parse_cache is not None:
+                    self.parse_cache.put(document_hash, contents, streaming=self.streaming)  # type: ignore[arg-type]
+
+            reviewer = self.reviewer if profile is None else self._variant(profile, policy=profile)
+            reservation: Any = contextlib.nullcontext()
+            if self.admission is not None:
+                reviewer, estimate, decision = self.preflight(contents, reviewer)
+                yield StreamEvent(
+                    name="ReviewController",
+                    msg="Preflight",
+                    data={"estimate": estimate.model_dump(), "decision": decision.model_dump()},
+                )
+                reservation = self.admission.reserve(estimate.total_tokens)
+
+            checkpoint_key = None
+            if self.checkpoint is not None:
+                from workflow.checkpoint import checkpoint_prefix
+
+                prefix = checkpoint_prefix(
+                    document_hash,  # type: ignore[arg-type]
+                    reviewer.llm.metadata.model_name,
+                    reviewer.policy.model_dump_json(),
+                    reviewer.compact_output,
+                )
+                # 每次审查写入自己的检查点，恢复时接管同一文档、同一配置下最近未完成的检查点
+                checkpoint_key = (self.checkpoint.latest(prefix) if resume else None) or f"{prefix}{review_id}"
+
+            async with reservation:
+                handler = reviewer.run(start_event=InputEvent(contents=contents, checkpoint_key=checkpoint_key))
+                async for event in handler.stream_events():
+                    if isinstance(event, StreamEvent):
+                        yield event
+                ret: ContractAnalysis = await handler
+            if extra_issues:
+                ret.issues = sorted(ret.issues + extra_issues, key=lambda x: (x.part_start_id, x.id))
+                if reviewer.scorer is not None:
+                    # 配置了本地评分时，评分和风险等级本就来自本地评分而不是 LLM 总结，
+                    # 这里连同风险等级一起重新计算，二者与加入后的问题保持一致
+                    ret.score, ret.riskLevel = reviewer.scorer.score(ret.issues)
+
+            await asyncio.to_thread(self._annotate, document_path, save_path, contents, document, ret, font_color)
+            if checkpoint_key is not None:
+                self.checkpoint.clear(checkpoint_key)  # type: ignore[union-attr]
+            if self.store is not None:
+                with span("store.save"):
+                    await asyncio.to_thread(
+                        self.store.save, name, contents, ret, contract_id=review_id
+                    )
+            stats = f", {ret.stats.wall_seconds}s, first high issue {ret.stats.first_high_issue_seconds}s" if ret.stats else ""
+            logger.info(f"Review finished: {len(contents)} contents, {len(ret.issues)} issues{stats}")
+            yield StreamEvent(name="ReviewController", msg="Saved", data=ret)
+
+    def _annotate(
+        self,
+        document_path: "DocumentSource",
+        save_path: str | IO[bytes],
+        contents: List["Content"],
+        document: "DocxDocument | None",
+        analysis: "ContractAnalysis",
+        font_color: bool,
+    ) -> None:
+        """Add the issues of the analysis as comments and save the document."""
+        from workflow.package_writer import save_document
+        from workflow.tracing import span
+
+        if document is None:
+            # 解析缓存命中时，只在标注前加载文档并绑定段落
+            from docx import Document
+
+            from workflow.scanner import bind_contents
+            from workflow.utils import open_document
+
+            with span("bind_contents"), open_document(document_path) as f:
+                document = Document(f)
+                bind_contents(contents, document)
+
+        with span("add_comments", issues=len(analysis.issues)):
+            for issue in analysis.issues:
+                content_id = issue.id
+
+                cur_content = contents[content_id]
+                comment = f"{issue.description}\n\nRecommendation: {issue.recommendation}"
+                self.add_comment(cur_content, comment, severity=issue.severity, font_color=font_color)
+
+        with span("document.save"):
+            # 只重写标注修改的部分，图片等未修改的条目按原样复制
+            save_document(document, document_path, save_path)
+
+    async def review_bytes(
+        self,
+        document: "DocumentSource",
+        font_color: bool = True,
+        review_id: str | None = None,
+        name: str | None = None,
+    ) -> Tuple["ContractAnalysis", bytes]:
+        """
+        Review a document held in memory, e.g. an upload, without touching the disk.
+
+        Args:
+            document: The content or file object of the document to review.
+            font_color: Whether to set the font color to the severity color.
+            review_id: The id attached to every log record of this review, generated if not given.
+            name: The file name of the document.
+        Returns:
+            The contract analysis result and the reviewed document.
+        """
+        buffer = io.BytesIO()
+        analysis = await self.review(document, buffer, font_color=font_color, review_id=review_id, name=name)
+        return analysis, buffer.getvalue()
+
+    def preflight(
+        self, contents: List["Content"], reviewer: "ReviewerAgent | None" = None
+    ) -> Tuple["ReviewerAgent", "Estimate", "Decision"]:
+        """
+        Estimate the review of the contents and apply the admission decision.
+
+        Args:
+            contents: The contents of the document.
+            reviewer: The reviewer to run if the review is accepted, defaults to the reviewer of the controller.
+        Returns:
+            The reviewer to run (downgraded or routed to the large LLM if needed), the estimate of that
+            review and the decision.
+        Raises:
+            AdmissionError: If the review is rejected.
+        """
+        from workflow.preflight import AdmissionError, PreflightEstimator
+
+        assert self.admission is not None, "admission control is disabled"
+        if self._estimator is None:
+            self._estimator = PreflightEstimator()
+        reviewer = reviewer or self.reviewer
+        estimate = self._estimator.estimate(contents, summary=reviewer.summary, policy=reviewer.policy)
+        decision = self.admission.decide(estimate)
+        match decision.action:
+            case "reject":
+                logger.warning(f"Review rejected: {decision.reason}")
+                raise AdmissionError(decision.reason)
+            case "downgrade":
+                reviewer = self._variant("downgrade", policy=self.admission.downgrade_profile)
+                estimate = self._estimator.estimate(contents, summary=reviewer.summary, policy=reviewer.policy)
+            case "route":
+                reviewer = self._variant("route", llm=self.admission.large_llm)
+        if decision.action != "accept":
+            logger.info(f"Review {decision.action}d: {decision.reason}")
+        return reviewer, estimate, decision
+
+    def _variant(self, name: str, **overrides: Any) -> "ReviewerAgent":
+        from workflow.reviewer import ReviewerAgent
+
+        reviewer = self._variants.get(name)
+        if reviewer is None:
+            kwargs = {"llm": self.reviewer.llm, **self._reviewer_kwargs, **overrides}
+            reviewer = self._variants.setdefault(name, ReviewerAgent(**kwargs))
+        return reviewer
+
+    async def summarize(self, analysis: "ContractAnalysis") -> "ContractAnalysis":
+        """
+        Add the narrative LLM summary to a review done without summary.
+
+        The score and risk level are already filled by the local scorer, so the summary can run
+        as an asynchronous follow-up after the result has been returned.
+
+        Args:
+            analysis: The result of review.
+        Returns:
+            The contract analysis with the summary.
+        """
+        summary_issues = await self.reviewer.asummarize(analysis.issues)
+        return analysis.model_copy(update=summary_issues.model_dump())
 
     def add_comment(
         self,
-        content: Content,
+        content: "Content",
         comment: str,
         *,
         severity: Literal["low", "medium", "high"] = "medium",
@@ -65,6 +415,8 @@ class ReviewController:
         Returns:
             None
         """
+        from docx.shared import RGBColor
+
         match severity:
             case "low":
                 color = RGBColor(0, 0, 255)  # 淡蓝色
@@ -0,0 +1,214 @@
+import io
+import os
+import re
+import threading
+from typing import IO, Dict, List, Mapping, Tuple
+
+from docx import Document
+from docx.document import Document as DocxDocument
+from docx.text.paragraph import Paragraph
+from lxml import etree
+
+from prepocess.html2word import html_tables_to_word
+from workflow.scanner import W_P, W_T, W_TC
+from workflow.utils import count_placeholders, normalize_runs, runs_merge
+
+PLACEHOLDER_PATTERN = re.compile(r"<\|(.+?)\|>")
+
+XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+# 定位符: 从 body 到 w:t 元素逐层的子元素下标
+Locator = Tuple[int, ...]
+# 编译后的文本片段: 偶数下标为原文，奇数下标为占位符名称
+Segments = Tuple[str, ...]
+
+
+def locate(root: etree._Element, element: etree._Element) -> Locator:
+    """
+    Get the child index path from the root to the element.
+    """
+    path = []
+    while element is not root:
+        parent = element.getparent()
+        path.append(parent.index(element))
+        element = parent
+    return tuple(reversed(path))
+
+
+def resolve(root: etree._Element, locator: Locator) -> etree._Element:
+    element = root
+    for index in locator:
+        element = element[index]
+    return element
+
+
+def set_text(t: etree._Element, text: str) -> None:
+    """
+    Set the text of a w:t element, preserving leading and trailing spaces.
+    """
+    t.text = text
+    if text != text.strip():
+        t.set(XML_SPACE, "preserve")
+
+
+class CompiledTemplate:
+    """
+    A docx template whose ``<|name|>`` placeholders have been located once.
+
+    Compiling normalizes the runs of the paragraphs holding placeholders, merges the runs of those
+    whose placeholders still span several w:t elements, and records the locator of the w:t elements
+    holding placeholders. Filling parses the normalized package and writes the values straight into
+    the recorded w:t elements, so it costs O(placeholders) instead of a scan of the whole document
+    per field.
+    """
+
+    def __init__(self, data: bytes, fields: List[Tuple[Locator, Segments]]) -> None:
+        """
+        Args:
+            data: The normalized docx package.
+            fields: The locator of every w:t element with placeholders and its compiled segments.
+        """
+        self.data = data
+        self.fields = fields
+        self.placeholders = sorted({name for _, segments in fields for name in segments[1::2]})
+
+    @classmethod
+    def compile(cls, source: str | IO[bytes]) -> "CompiledTemplate":
+        """
+        Compile a docx template.
+
+        Args:
+            source: The path or file object of the template.
+
+        Returns:
+            CompiledTemplate: The compiled template.
+        """
+        document = Document(source)
+        body = document.element.body
+        for p in list(body.iter(W_P)):
+            if "<|" not in "".join(t.text or "" for t in p.iter(W_T)):
+                # 其他段落保持原样，不解包其中的超链接和字段
+                continue
+            normalize_runs(p)
+            # 占位符跨越不同格式的 run 时，合并整个段落，保证每个占位符都在同一个 w:t 内
+            text = "".join(t.text or "" for t in p.iter(W_T))
+            if count_placeholders(text) != sum(count_placeholders(t.text or "") for t in p.iter(W_T)):
+                runs_merge(Paragraph(p, document._body))
+
+        fields = []
+        for t in body.iter(W_T):
+            if t.text and PLACEHOLDER_PATTERN.search(t.text):
+                fields.append((locate(body, t), tuple(PLACEHOLDER_PATTERN.split(t.text))))
+
+        buffer = io.BytesIO()
+        document.save(buffer)
+        return cls(buffer.getvalue(), fields)
+
+    def render(
+        self,
+        values: Mapping[str, str | None],
+        strict: bool = False,
+        tables: Mapping[str, str] | None = None,
+    ) -> DocxDocument:
+        """
+        Fill the placeholders and return the document.
+
+        Args:
+            values: The value of each placeholder. Placeholders without a value (or with None) are kept as is.
+            strict: Raise KeyError when a placeholder has no value.
+            tables: Html tables (e.g. line items) of placeholders. The paragraph holding such a placeholder
+                is replaced by the table, so the placeholder should stand alone in its paragraph.
+
+        Returns:
+            DocxDocument: The filled document.
+        """
+        tables = tables or {}
+        if strict:
+            missing = [name for name in self.placeholders if values.get(name) is None and name not in tables]
+            if missing:
+                raise KeyError(f"Missing values of placeholders: {', '.join(missing)}")
+
+        document = Document(io.BytesIO(self.data))
+        body = document.element.body
+        # 先解析出所有元素再修改文档，替换表格不会影响其他定位符
+        elements = [resolve(body, locator) for locator, _ in self.fields]
+        table_paragraphs: List[Tuple[str, etree._Element]] = []
+        for t, (_, segments) in zip(elements, self.fields):
+            names = [name for name in segments[1::2] if name in tables]
+            if names:
+                table_paragraphs.append((names[0], next(t.iterancestors(W_P))))
+                continue
+            text = []
+            for index, segment in enumerate(segments):
+                if index % 2 == 0:
+                    text.append(segment)
+                else:
+                    value = values.get(segment)
+                    text.append(f"<|{segment}|>" if value is None else str(value))
+            set_text(t, "".join(text))
+
+        if table_paragraphs:
+            new_tables = html_tables_to_word([tables[name] for name, _ in table_paragraphs], document)
+            for (_, p), table in zip(table_paragraphs, new_tables):
+                if table is None:
+                    continue
+                parent = p.getparent()
+                p.addprevious(table._tbl)
+                parent.remove(p)
+                # 单元格必须以段落结尾
+                if parent.tag == W_TC and parent[-1] is table._tbl:
+                    parent.append(p.makeelement(W_P))
+        return document
+
+    def fill(
+        self,
+        values: Mapping[str, str | None],
+        save_path: str | IO[bytes],
+        strict: bool = False,
+        tables: Mapping[str, str] | None = None,
+    ) -> None:
+        """
+        Fill the placeholders and save the document to save_path.
+        """
+        self.render(values, strict=strict, tables=tables).save(save_path)
+
+
+_lock = threading.Lock()
+_templates: Dict[str, Tuple[Tuple[float, int], CompiledTemplate]] = {}
+
+
+def load_template(path: str) -> CompiledTemplate:
+    """
+    Get the compiled template of a docx file, compiling it on first use.
+
+    Compiled templates are cached per process and recompiled when the file changes (mtime or size).
+
+    Args:
+        path: The path of the template.
+
+    Returns:
+        CompiledTemplate: The compiled template.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = (stat.st_mtime, stat.st_size)
+    with _lock:
+        cached = _templates.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    template = CompiledTemplate.compile(path)
+    with _lock:
+        _templates[path] = (key, template)
+    return template
+
+
+def fill_template(template_path: str, values: Mapping[str, str | None], save_path: str | IO[bytes]) -> None:
+    """
+    Fill a docx template and save the result.
+
+    Args:
+        template_path: The path of the template.
+        values: The value of each placeholder.
+        save_path: The path or file object to save the document to.
+    """
+    load_template(template_path).fill(values, save_path)
@@ -1,13 +1,28 @@
+from typing import Iterable, List
+from xml.sax.saxutils import escape
+
+from bs4 import BeautifulSoup
 from docx.document import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
 from docx.table import Table
-from bs4 import BeautifulSoup
 
-def html_table_to_word(html_content: str, doc: Document) -> Table | None:
+# 1 twip = 635 EMU
+EMU_PER_TWIP = 635
+
+TBL_LOOK = (
+    '<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" '
+    'w:lastRow="0" w:noHBand="0" w:noVBand="1" w:val="04A0"/>'
+)
+
+
+def build_grid(html_content: str) -> tuple[list[tuple[int, int, int, int, str]], int, int] | None:
     """
-    将包含表格的 HTML 字符串转换为 Word 文档中的表格。
+    解析 HTML 表格并一次性计算每个单元格在网格中的位置。
     支持单元格合并 (colspan 和 rowspan)。
 
     :param html_content: 包含 HTML 表格的字符串。
+    :return: (单元格列表 [(行, 列, 行跨度, 列跨度, 文本)], 行数, 列数)，未找到表格时返回 None
     """
     soup = BeautifulSoup(html_content, 'html.parser')
     html_table_tag = soup.find('table')
@@ -21,165 +36,154 @@ def html_table_to_word(html_content: str, doc: Document) -> Table | None:
         print("在表格中未找到 <tr> 标签。")
         return None
 
-    # --- 阶段 1: 使用概念性网格确定真实的表格维度 ---
-    # conceptual_grid_map 用于标记单元格是否被占用，以计算维度
-    # 列表的列表，内部列表代表行，值为 True 表示被占用
-    conceptual_grid_map: list[list[bool | None]] = [] 
-    
-    # 表格所需的最大行数和列数
-    max_effective_rows = 0
-    max_effective_cols = 0
-
+    # --- 阶段 1: 读取单元格，并计算网格尺寸的上界以预分配占用数组 ---
+    parsed_rows: list[list[tuple[int, int, str]]] = []
+    num_rows = len(html_rows)
+    max_row_width = 0
+    spanning_width = 0  # 所有跨行单元格的列宽之和，跨行单元格最多把一行向右推这么多列
     for r_idx, html_row_element in enumerate(html_rows):
-        current_col_cursor = 0  # 当前尝试放置单元格的列索引
+        cells = []
+        row_width = 0
+        for html_cell_element in html_row_element.find_all(['th', 'td']):
+            colspan = max(int(html_cell_element.get('colspan', 1)), 1)
+            rowspan = max(int(html_cell_element.get('rowspan', 1)), 1)
+            # BeautifulSoup 的 get_text 通过 separator='\n' 将 <br/> 转换成换行符
+            text = html_cell_element.get_text(separator='\n', strip=True)
+            cells.append((colspan, rowspan, text))
+            row_width += colspan
+            if rowspan > 1:
+                spanning_width += colspan
+                num_rows = max(num_rows, r_idx + rowspan)
+        parsed_rows.append(cells)
+        max_row_width = max(max_row_width, row_width)
 
-        # 确保 conceptual_grid_map 至少有 r_idx 那么多行
-        while r_idx >= len(conceptual_grid_map):
-            # 新行需要和已存在的最宽行一样宽
-            current_max_width = 0
-            if conceptual_grid_map: # 如果不是添加的第一行
-                current_max_width = max(len(row) for row in conceptual_grid_map if row) if any(conceptual_grid_map) else 0
-            conceptual_grid_map.append([None] * current_max_width) # None 表示未被占用
+    width = max_row_width + spanning_width
+    if width == 0:
+        print("HTML 表格为空或其结构无法确定。")
+        return None
 
-        html_cell_elements = html_row_element.find_all(['th', 'td'])
-        if not html_cell_elements and r_idx >= max_effective_rows : # 空行，但仍需记录行数
-             max_effective_rows = max(max_effective_rows, r_idx + 1)
-             continue
+    # --- 阶段 2: 单次遍历，在预分配的占用数组中放置单元格 ---
+    occupied = bytearray(num_rows * width)
+    placements: list[tuple[int, int, int, int, str]] = []
+    num_cols = 0
+    for r_idx, cells in enumerate(parsed_rows):
+        row_offset = r_idx * width
+        current_col_cursor = 0
+        for colspan, rowspan, text in cells:
+            # 跳过已被上方 rowspan 占用的单元格
+            while occupied[row_offset + current_col_cursor]:
+                current_col_cursor += 1
+            for target_row_idx in range(r_idx, r_idx + rowspan):
+                start = target_row_idx * width + current_col_cursor
+                occupied[start:start + colspan] = b'\x01' * colspan
+            placements.append((r_idx, current_col_cursor, rowspan, colspan, text))
+            current_col_cursor += colspan
+            num_cols = max(num_cols, current_col_cursor)
 
+    return placements, num_rows, num_cols
 
-        for html_cell_element in html_cell_elements:
-            colspan = int(html_cell_element.get('colspan', 1))
-            rowspan = int(html_cell_element.get('rowspan', 1))
 
-            # 确保 conceptual_grid_map[r_idx] 足够长以容纳 current_col_cursor
-            while current_col_cursor >= len(conceptual_grid_map[r_idx]):
-                conceptual_grid_map[r_idx].append(None)
-            
-            # 跳过已被上方 rowspan 占用的单元格
-            while conceptual_grid_map[r_idx][current_col_cursor] is not None:
-                current_col_cursor += 1
-                # 再次确保 conceptual_grid_map[r_idx] 足够长
-                while current_col_cursor >= len(conceptual_grid_map[r_idx]):
-                    conceptual_grid_map[r_idx].append(None)
-            
-            # 在 conceptual_grid_map 中标记被占用的单元格
-            for i_offset in range(rowspan):
-                target_row_idx = r_idx + i_offset
-                
-                # 确保 conceptual_grid_map 至少有 target_row_idx 那么多行
-                while target_row_idx >= len(conceptual_grid_map):
-                    current_max_width = max(len(row) for row in conceptual_grid_map if row) if any(conceptual_grid_map) else 0
-                    conceptual_grid_map.append([None] * current_max_width)
+def cell_xml(width: int, text: str | None, colspan: int = 1, vmerge: str | None = None) -> str:
+    """生成单个 w:tc 的 XML，换行符转换为 w:br。"""
+    tc_pr = f'<w:tcW w:type="dxa" w:w="{width * colspan}"/>'
+    if colspan > 1:
+        tc_pr += f'<w:gridSpan w:val="{colspan}"/>'
+    if vmerge == 'restart':
+        tc_pr += '<w:vMerge w:val="restart"/>'
+    elif vmerge == 'continue':
+        tc_pr += '<w:vMerge/>'
+    if text:
+        runs = '<w:br/>'.join(f'<w:t xml:space="preserve">{escape(line)}</w:t>' for line in text.split('\n'))
+        paragraph = f'<w:p><w:r>{runs}</w:r></w:p>'
+    else:
+        paragraph = '<w:p/>'
+    return f'<w:tc><w:tcPr>{tc_pr}</w:tcPr>{paragraph}</w:tc>'
 
-                for j_offset in range(colspan):
-                    target_col_idx = current_col_cursor + j_offset
-                    # 确保 conceptual_grid_map[target_row_idx] 足够长
-                    while target_col_idx >= len(conceptual_grid_map[target_row_idx]):
-                        conceptual_grid_map[target_row_idx].append(None)
-                    
-                    conceptual_grid_map[target_row_idx][target_col_idx] = True # 标记为占用
 
-            # 更新追踪的整体维度
-            max_effective_rows = max(max_effective_rows, r_idx + rowspan)
-            max_effective_cols = max(max_effective_cols, current_col_cursor + colspan)
-            
-            current_col_cursor += colspan # 为此 HTML 行中的下一个单元格移动光标
-    
-    # 如果在循环后 max_effective_cols 仍然为 0 (例如，所有行都是空的 <tr></tr>)
-    # 如果 conceptual_grid_map 本身因初始化而具有列，则可能需要调整它
-    if max_effective_cols == 0 and conceptual_grid_map:
-        max_effective_cols = max(len(r) for r in conceptual_grid_map if r) if any(conceptual_grid_map) else 0
-    
-    # 如果在处理完所有行后，max_effective_rows 仍为 0 (例如，空的 <table></table>)
-    # 但 html_rows 本身有内容 (尽管可能是空的tr)，则使用 html_rows 的长度
-    if max_effective_rows == 0 and len(html_rows) > 0:
-        max_effective_rows = len(html_rows)
+def table_xml(
+    placements: list[tuple[int, int, int, int, str]],
+    num_rows: int,
+    num_cols: int,
+    block_width: int,
+    style_id: str | None = None,
+) -> str:
+    """
+    直接生成 w:tbl 的 XML，合并单元格使用 gridSpan (横向) 和 vMerge (纵向) 表示，
+    不再逐个调用 python-docx 的 merge。
+    """
+    col_width = block_width // num_cols
+    # 每个网格位置的单元格: (列跨度, vMerge, 文本)，None 表示被横向合并覆盖
+    grid: list[list[tuple[int, str | None, str | None] | None]] = [
+        [(1, None, None)] * num_cols for _ in range(num_rows)
+    ]
+    for r_idx, c_idx, rowspan, colspan, text in placements:
+        for i in range(r_idx, r_idx + rowspan):
+            row = grid[i]
+            for j in range(c_idx + 1, c_idx + colspan):
+                row[j] = None
+            if rowspan == 1:
+                row[c_idx] = (colspan, None, text)
+            elif i == r_idx:
+                row[c_idx] = (colspan, 'restart', text)
+            else:
+                row[c_idx] = (colspan, 'continue', None)
 
+    parts = ['<w:tbl><w:tblPr>']
+    if style_id:
+        parts.append(f'<w:tblStyle w:val="{escape(style_id)}"/>')
+    parts.append(f'<w:tblW w:type="auto" w:w="0"/>{TBL_LOOK}</w:tblPr><w:tblGrid>')
+    parts.append(f'<w:gridCol w:w="{col_width}"/>' * num_cols)
+    parts.append('</w:tblGrid>')
+    for row in grid:
+        parts.append('<w:tr>')
+        parts.extend(cell_xml(col_width, cell[2], cell[0], cell[1]) for cell in row if cell is not None)
+        parts.append('</w:tr>')
+    parts.append('</w:tbl>')
+    return ''.join(parts)
 
-    # Word 表格的最终维度
-    final_num_rows = max_effective_rows
-    final_num_cols = max_effective_cols
 
-    if final_num_rows == 0 or final_num_cols == 0:
-        print("HTML 表格为空或其结构无法确定。")
-        return None
+def html_tables_to_word(html_contents: Iterable[str], doc: Document) -> List[Table | None]:
+    """
+    将多个包含表格的 HTML 字符串批量转换为 Word 文档中的表格，追加到文档末尾。
+    所有表格的 XML 一次性生成并解析。
 
-    word_table = doc.add_table(rows=final_num_rows, cols=final_num_cols)
+    :param html_contents: 包含 HTML 表格的字符串，每个字符串取第一个表格。
+    :param doc: 目标 Word 文档。
+    :return: 与输入一一对应的表格，无法转换的输入对应 None。
+    """
+    block_width = doc._block_width // EMU_PER_TWIP  # type: ignore[attr-defined]
     # 应用一个带边框的常用样式
     try:
-        word_table.style = 'Table Grid'
+        style_id = doc.styles['Table Grid'].style_id
     except KeyError:
-        pass
+        style_id = None
 
-    # --- 阶段 2: 使用确定的维度填充 Word 表格 ---
-    # 使用 final_num_rows 和 final_num_cols 初始化 shadow_grid
-    # True 表示单元格已被覆盖，或者是已处理的合并区域的开始
-    fill_shadow_grid = [[False for _ in range(final_num_cols)] for _ in range(final_num_rows)]
+    xmls: list[str | None] = []
+    for html_content in html_contents:
+        grid = build_grid(html_content)
+        xmls.append(None if grid is None else table_xml(*grid, block_width=block_width, style_id=style_id))
 
-    for r_idx, html_row_element in enumerate(html_rows):
-        html_cell_elements = html_row_element.find_all(['th', 'td'])
-        current_word_table_col_idx = 0 # Word 表格中的列索引
+    body = parse_xml(f'<w:body {nsdecls("w")}>{"".join(x for x in xmls if x)}</w:body>')
+    tbl_elements = iter(list(body))
+    tables: List[Table | None] = []
+    for xml in xmls:
+        if xml is None:
+            tables.append(None)
+            continue
+        tbl = next(tbl_elements)
+        doc._body._element._insert_tbl(tbl)  # type: ignore[attr-defined]
+        tables.append(Table(tbl, doc._body))  # type: ignore[attr-defined]
+    return tables
 
-        for html_cell_element in html_cell_elements:
-            # 在当前行的 shadow_grid 中找到下一个可用单元格
-            while current_word_table_col_idx < final_num_cols and \
-                  fill_shadow_grid[r_idx][current_word_table_col_idx]:
-                current_word_table_col_idx += 1
-            
-            if current_word_table_col_idx >= final_num_cols:
-                # 如果 HTML 结构比预期的更复杂，可能会发生这种情况
-                print(f"警告: 第 {r_idx} 行的单元格内容超出了计算的最大列数 {final_num_cols}。跳过此单元格。")
-                continue
 
-            # BeautifulSoup 的 get_text 通过 separator='\n' 将 <br/> 转换成换行符
-            text = html_cell_element.get_text(separator='\n', strip=True)
-            colspan = int(html_cell_element.get('colspan', 1))
-            rowspan = int(html_cell_element.get('rowspan', 1))
-
-            # 确保 rowspan 和 colspan 不会超出表格边界
-            # (r_idx + rowspan) 不能超过 final_num_rows
-            # (current_word_table_col_idx + colspan) 不能超过 final_num_cols
-            actual_rowspan = min(rowspan, final_num_rows - r_idx)
-            actual_colspan = min(colspan, final_num_cols - current_word_table_col_idx)
-            
-            if actual_rowspan < 1 or actual_colspan < 1:
-                print(f"警告: HTML 行 {r_idx}, 列 {current_word_table_col_idx} 处的单元格在边界检查后尺寸为零。跳过。")
-                current_word_table_col_idx += actual_colspan if actual_colspan > 0 else 1 
-                continue
-            
-            # 将文本放入合并块的左上角单元格
-            # (r_idx, current_word_table_col_idx) 是此块的起始单元格
-            doc_cell = word_table.cell(r_idx, current_word_table_col_idx)
-            doc_cell.text = text 
-
-            # 在 shadow_grid 中标记单元格为 True (已覆盖)
-            for i in range(r_idx, r_idx + actual_rowspan):
-                for j in range(current_word_table_col_idx, current_word_table_col_idx + actual_colspan):
-                    if i < final_num_rows and j < final_num_cols:
-                        fill_shadow_grid[i][j] = True
-                    else:
-                        # 这意味着 rowspan/colspan 超出了表格范围 (理论上被 actual_rowspan/colspan 捕获)
-                        print(f"警告: 尝试在 ({i},{j}) 处标记 shadow_grid 超出边界")
-            
-            # 如果 rowspan > 1 或 colspan > 1，则在 Word 表格中执行合并
-            if actual_rowspan > 1 or actual_colspan > 1:
-                # 合并的右下角单元格
-                br_r_idx = r_idx + actual_rowspan - 1
-                br_c_idx = current_word_table_col_idx + actual_colspan - 1
-                
-                # 再次确保右下角在表格边界内 (如果 actual_ 值正确，则多余)
-                # br_r_idx = min(br_r_idx, final_num_rows - 1)
-                # br_c_idx = min(br_c_idx, final_num_cols - 1)
-
-                if br_r_idx >= r_idx and br_c_idx >= current_word_table_col_idx : # 有效的合并区域
-                    end_cell = word_table.cell(br_r_idx, br_c_idx)
-                    doc_cell.merge(end_cell)
-                else:
-                     print(f"警告: 单元格 ({r_idx},{current_word_table_col_idx}) 的合并尺寸无效。实际行跨度:{actual_rowspan}, 实际列跨度:{actual_colspan}")
+def html_table_to_word(html_content: str, doc: Document) -> Table | None:
+    """
+    将包含表格的 HTML 字符串转换为 Word 文档中的表格。
+    支持单元格合并 (colspan 和 rowspan)。
 
-            # 为当前 HTML 行中的下一个 HTML 单元格推进 current_word_table_col_idx
-            current_word_table_col_idx += actual_colspan
-    return word_table
+    :param html_content: 包含 HTML 表格的字符串。
+    """
+    return html_tables_to_word([html_content], doc)[0]
 
 if __name__ == '__main__':
     from docx import Document  # type: ignore
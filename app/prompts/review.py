@@ -196,6 +196,50 @@ riskLevel字段只能是'low'、'medium'、'high'中的一个。
 """
 
 
+category_summary_prompt = """\
+你是一个合同审查总结助手。下面是合同中“{category}”部分的审查问题列表（JSON格式）。
+请用不超过150字总结该部分的问题：按严重程度（高、中、低）说明问题数量，概述最关键的问题及其风险。
+只输出总结文本，不要输出其他内容。
+
+## 审查问题列表
+{issues}
+"""
+
+
+reduce_summary_prompt = """\
+你是一个合同审查总结助手。下面是合同各部分审查问题的分类总结，以及每个分类按严重程度统计的问题数量。
+请你据此完成以下任务：
+1.  **问题数量和类型总结：** 统计并总结发现的问题数量，按严重程度（高、中、低）进行分类统计。简要说明各类别问题的主要类型。
+2.  **主要问题概述：** 重点概述几个最严重的（高 severity）或最关键的问题，简要说明其潜在风险和影响。
+3.  **合同总体评价：** 对整个合同文档的规范性、完整性、风险性和可执行性等方面进行总体评价。
+4.  **总体评分：** 给合同文档一个总体评分，评分范围为 1 到 100 分，分数越高表示合同越规范、风险越低、质量越高。
+
+## 分类总结
+{category_summaries}
+
+## OutputFormat
+你的输出结果必须是一个 JSON 对象，不要有任何其他内容。你的输出必须遵循下面的json格式：
+{schema}
+riskLevel字段只能是'low'、'medium'、'high'中的一个。
+"""
+
+
+cross_document_prompt = """\
+你是一个合同审核专家。下面是同一交易的主合同与附件、工作说明书等文件中，同一主体、术语、金额或日期在不同文件中取值不同的条款。
+请判断每处冲突是否是真正的不一致：
+- 附件中的分项金额、分阶段日期等与主合同的总额、总期限不同，但逻辑上相符的，不是不一致
+- 同一主体名称、同一术语的定义、同一金额或日期在不同文件中确实矛盾的，是不一致
+只输出真正不一致的冲突，没有则输出空列表。
+
+## 冲突
+{conflicts}
+
+## OutputFormat
+你的输出结果必须是一个 JSON 对象，不要有任何其他内容。你的输出必须遵循下面的json格式：
+{schema}
+"""
+
+
 contract_classify_prompt = """\
 # 你是一个合同审核专家，你的任务是将合同按照内容切分成几部分，并根据给定的分类，为每个part分配一个分类
 
@@ -237,7 +281,7 @@ title_prompt = """\
 要求：
 - 只审查合同标题部分中的标题，有一个标题符合条件即符合要求
 - 不要输出思考过程
-
+{extra_requirements}
 ## OutputFormat
 你的输出结果必须是一个 JSON 对象，不要有任何其他内容。你的输出必须遵循下面的json格式：
 {schema}
@@ -253,7 +297,7 @@ party_prompt = """\
 - 主体资格合法性
 - 信息完整性，不能有置空的信息或占位符（如***，xxx，[公司名称]等)
 - 如有代理人，则代理人需要合法的委托书，注明权限、期限
-
+{extra_requirements}
 ## OutputFormat
 你的输出结果必须是一个 JSON 对象，不要有任何其他内容。你的输出必须遵循下面的json格式：
 {schema}
@@ -273,7 +317,7 @@ breach_prompt = """\
     - 不超过实际损失的30%
     - 借款利息不超过LPR的4倍
 - 具有违约方承担守约方维权成本条款
-
+{extra_requirements}
 ## OutputFormat
 你的输出结果必须是一个 JSON 对象，不要有任何其他内容。你的输出必须遵循下面的json格式：
 {schema}
@@ -288,7 +332,7 @@ subject_prompt = """\
 要求：
 - 标的物明确性: 明确名称、规格、型号、数量、质量标准（国标/行业标准/约定标准）。
 - 标的物合法性: 禁止交易法律限制流通的货物（如违禁品、未取得许可证的医疗器械）。
-
+{extra_requirements}
 ## OutputFormat
 你的输出结果必须是一个 JSON 对象，不要有任何其他内容。你的输出必须遵循下面的json格式：
 {schema}
@@ -304,7 +348,7 @@ payment_prompt = """\
 - 支付金额和支付方式要具体，大小写金额需要一致
 - 不能留有没填的信息或占位符
 - 逾期付款责任：违约金比例一般不超过实际损失的30%（民法典第585条）。
-
+{extra_requirements}
 ## OutputFormat
 你的输出结果必须是一个 JSON 对象，不要有任何其他内容。你的输出必须遵循下面的json格式：
 {schema}
@@ -323,7 +367,7 @@ acceptance_prompt = """\
     - 审核验收时间、验收标准，要明确合理
     - 验收不合格条款要合法合理
 - 不需要包含交付和验收的所有信息，只需要审核已有信息是否合法明确
-
+{extra_requirements}
 ## OutputFormat
 你的输出结果必须是一个 JSON 对象，不要有任何其他内容。你的输出必须遵循下面的json格式：
 {schema}
@@ -352,7 +396,7 @@ default_review_prompt = """\
 - 根据建议，修改具体的条款
 - 给当事人提供专业的法律服务
 - 促成签署委托代理协议
-
+{extra_requirements}
 ## OutputFormat
 你的输出结果必须是一个 JSON 对象，不要有任何其他内容。你的输出必须遵循下面的json格式：
 {schema}
@@ -0,0 +1,407 @@
+import datetime
+import os
+import sqlite3
+import threading
+import uuid
+from typing import Any, Dict, List
+
+from config.const import ANALYSIS_DB_PATH
+from workflow.schema import ContractAnalysis, ResultIssue
+from workflow.scoring import RiskScorer
+from workflow.utils import Content
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contracts (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    content TEXT NOT NULL,
+    date_uploaded TEXT NOT NULL,
+    summary TEXT NOT NULL DEFAULT '',
+    risk_level TEXT,
+    score INTEGER,
+    issue_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_contracts_date ON contracts (date_uploaded DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_contracts_risk ON contracts (risk_level, date_uploaded DESC);
+
+CREATE TABLE IF NOT EXISTS contents (
+    contract_id TEXT NOT NULL,
+    content_id INTEGER NOT NULL,
+    content_type TEXT NOT NULL,
+    content TEXT NOT NULL,
+    PRIMARY KEY (contract_id, content_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS parts (
+    contract_id TEXT NOT NULL,
+    part_index INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    category TEXT NOT NULL,
+    start_id INTEGER NOT NULL,
+    end_id INTEGER NOT NULL,
+    PRIMARY KEY (contract_id, part_index)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS categories (
+    contract_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    issues INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    PRIMARY KEY (contract_id, category)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS issues (
+    id INTEGER PRIMARY KEY,
+    contract_id TEXT NOT NULL,
+    content_id INTEGER NOT NULL,
+    part_start_id INTEGER NOT NULL,
+    part_end_id INTEGER NOT NULL,
+    category TEXT,
+    severity TEXT NOT NULL,
+    content TEXT NOT NULL,
+    description TEXT NOT NULL,
+    recommendation TEXT NOT NULL,
+    date_uploaded TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_issues_contract ON issues (contract_id, content_id);
+CREATE INDEX IF NOT EXISTS idx_issues_severity ON issues (severity, date_uploaded DESC);
+CREATE INDEX IF NOT EXISTS idx_issues_category ON issues (category, date_uploaded DESC);
+CREATE INDEX IF NOT EXISTS idx_issues_date ON issues (date_uploaded DESC);
+
+-- trigram 分词支持中文子串检索（至少 3 个字符）
+CREATE VIRTUAL TABLE IF NOT EXISTS issues_fts USING fts5(
+    description, recommendation, content, content='issues', content_rowid='id', tokenize='trigram'
+);
+"""
+
+# trigram 分词无法匹配少于 3 个字符的查询，改用 LIKE
+FTS_MIN_QUERY_LENGTH = 3
+# 全文检索的列，LIKE 查询使用相同的列
+FTS_COLUMNS = ("description", "recommendation", "content")
+
+# 没有分类的问题归入的类别
+OTHER_CATEGORY = "其他"
+
+# 合同列表中 content 字段的预览长度
+PREVIEW_LENGTH = 200
+
+
+class AnalysisStore:
+    """
+    Local SQLite store of reviewed contracts, their contents, parts and issues,
+    with indexed filters and FTS5 full-text search over the issues.
+    """
+
+    def __init__(self, path: str = ANALYSIS_DB_PATH, scorer: RiskScorer | None = None) -> None:
+        """
+        Args:
+            path: The path of the sqlite database.
+            scorer: The scorer of the per-category scores, defaults to RiskScorer.default().
+        """
+        self.path = path
+        self.scorer = scorer or RiskScorer.default()
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite 连接不能跨线程使用，每个线程一个连接
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def save(
+        self,
+        name: str,
+        contents: List[Content],
+        analysis: ContractAnalysis,
+        contract_id: str | None = None,
+    ) -> str:
+        """
+        Save a reviewed contract.
+
+        Args:
+            name: The file name of the contract.
+            contents: The contents of the contract.
+            analysis: The review result.
+            contract_id: The id of the contract, generated if not given.
+
+        Returns:
+            str: The id of the contract.
+        """
+        contract_id = contract_id or uuid.uuid4().hex
+        date_uploaded = datetime.datetime.now().isoformat(timespec="seconds")
+        text = "\n".join(content.content for content in contents if content.content_type == "paragraph")
+        with self._connection() as conn:
+            self._delete(conn, contract_id)
+            conn.execute(
+                "INSERT INTO contracts (id, name, content, date_uploaded, summary, risk_level, score, issue_count)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    contract_id,
+                    name,
+                    text,
+                    date_uploaded,
+                    analysis.summary,
+                    analysis.riskLevel,
+                    analysis.score,
+                    len(analysis.issues),
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO contents (contract_id, content_id, content_type, content) VALUES (?, ?, ?, ?)",
+                [(contract_id, content.id, content.content_type, content.content) for content in contents],
+            )
+            conn.executemany(
+                "INSERT INTO parts (contract_id, part_index, title, category, start_id, end_id)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (contract_id, index, part.title, part.category, part.start_id, part.end_id)
+                    for index, part in enumerate(analysis.parts)
+                ],
+            )
+            categories: Dict[str, List[ResultIssue]] = {}
+            for issue in analysis.issues:
+                categories.setdefault(issue.category or OTHER_CATEGORY, []).append(issue)
+            conn.executemany(
+                "INSERT INTO categories (contract_id, category, issues, score) VALUES (?, ?, ?, ?)",
+                [
+                    (contract_id, category, len(issues), self.scorer.score(issues)[0])
+                    for category, issues in categories.items()
+                ],
+            )
+            for issue in analysis.issues:
+                cursor = conn.execute(
+                    "INSERT INTO issues (contract_id, content_id, part_start_id, part_end_id, category, severity,"
+                    " content, description, recommendation, date_uploaded) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        contract_id,
+                        issue.id,
+                        issue.part_start_id,
+                        issue.part_end_id,
+                        issue.category,
+                        issue.severity,
+                        issue.content,
+                        issue.description,
+                        issue.recommendation,
+                        date_uploaded,
+                    ),
+                )
+                conn.execute(
+                    "INSERT INTO issues_fts (rowid, description, recommendation, content) VALUES (?, ?, ?, ?)",
+                    (cursor.lastrowid, issue.description, issue.recommendation, issue.content),
+                )
+        return contract_id
+
+    def delete(self, contract_id: str) -> None:
+        with self._connection() as conn:
+            self._delete(conn, contract_id)
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, contract_id: str) -> None:
+        # issues_fts 是外部内容表，需要显式删除索引
+        conn.execute(
+            "INSERT INTO issues_fts (issues_fts, rowid, description, recommendation, content)"
+            " SELECT 'delete', id, description, recommendation, content FROM issues WHERE contract_id = ?",
+            (contract_id,),
+        )
+        for table in ("issues", "categories", "parts", "contents"):
+            conn.execute(f"DELETE FROM {table} WHERE contract_id = ?", (contract_id,))
+        conn.execute("DELETE FROM contracts WHERE id = ?", (contract_id,))
+
+    def list_contracts(
+        self,
+        limit: int = 20,
+        cursor: str | None = None,
+        risk_level: str | None = None,
+    ) -> tuple[List[Dict[str, Any]], str | None]:
+        """
+        List contracts, newest first, with keyset pagination.
+
+        Args:
+            limit: The page size.
+            cursor: The cursor returned with the previous page.
+            risk_level: Only list contracts with this risk level.
+
+        Returns:
+            tuple[list[dict], str | None]: The contracts and the cursor of the next page.
+
+        Raises:
+            ValueError: If the cursor is malformed.
+        """
+        where = []
+        params: List[Any] = []
+        if cursor:
+            date_uploaded, contract_id = self._parse_cursor(cursor)
+            where.append("(date_uploaded, id) < (?, ?)")
+            params.extend([date_uploaded, contract_id])
+        if risk_level:
+            where.append("risk_level = ?")
+            params.append(risk_level)
+        sql = (
+            f"SELECT id, name, substr(content, 1, {PREVIEW_LENGTH}) AS content, date_uploaded, risk_level, score,"
+            " issue_count FROM contracts"
+        )
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY date_uploaded DESC, id DESC LIMIT ?"
+        params.append(limit)
+        rows = self._connection().execute(sql, params).fetchall()
+        contracts = [self._contract(row) for row in rows]
+        next_cursor = f"{rows[-1]['date_uploaded']}|{rows[-1]['id']}" if len(rows) == limit else None
+        return contracts, next_cursor
+
+    @staticmethod
+    def _parse_cursor(cursor: str) -> tuple[str, str]:
+        """Split a cursor into the upload date and id of the last contract of the previous page."""
+        date_uploaded, _, contract_id = cursor.partition("|")
+        try:
+            datetime.datetime.fromisoformat(date_uploaded)
+        except ValueError:
+            contract_id = ""
+        if not contract_id:
+            raise ValueError(f"Invalid cursor: {cursor!r}")
+        return date_uploaded, contract_id
+
+    def get_contract(self, contract_id: str) -> Dict[str, Any] | None:
+        row = self._connection().execute(
+            "SELECT id, name, content, date_uploaded, risk_level, score, issue_count FROM contracts WHERE id = ?",
+            (contract_id,),
+        ).fetchone()
+        return self._contract(row) if row else None
+
+    def get_contents(self, contract_id: str) -> List[Dict[str, Any]]:
+        rows = self._connection().execute(
+            "SELECT content_id, content_type, content FROM contents WHERE contract_id = ? ORDER BY content_id",
+            (contract_id,),
+        ).fetchall()
+        return [{"id": row["content_id"], "content_type": row["content_type"], "content": row["content"]} for row in rows]
+
+    def get_analysis(self, contract_id: str) -> Dict[str, Any] | None:
+        """
+        Get the analysis of a contract in the shape of the UI ContractAnalysis, with per-category issue counts and scores.
+        """
+        conn = self._connection()
+        contract = conn.execute(
+            "SELECT summary, risk_level, score FROM contracts WHERE id = ?", (contract_id,)
+        ).fetchone()
+        if contract is None:
+            return None
+        issues = [
+            self._issue(row)
+            for row in conn.execute(
+                "SELECT * FROM issues WHERE contract_id = ? ORDER BY content_id, id", (contract_id,)
+            ).fetchall()
+        ]
+        categories = {
+            row["category"]: {"issues": row["issues"], "score": row["score"]}
+            for row in conn.execute(
+                "SELECT category, issues, score FROM categories WHERE contract_id = ?", (contract_id,)
+            ).fetchall()
+        }
+        parts = [
+            dict(row)
+            for row in conn.execute(
+                "SELECT title, category, start_id, end_id FROM parts WHERE contract_id = ? ORDER BY part_index",
+                (contract_id,),
+            ).fetchall()
+        ]
+        return {
+            "issues": issues,
+            "summary": contract["summary"],
+            "riskLevel": contract["risk_level"],
+            "score": contract["score"],
+            "categories": categories,
+            "parts": parts,
+        }
+
+    def search_issues(
+        self,
+        query: str | None = None,
+        severity: str | None = None,
+        category: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """
+        Search issues by full text over description, recommendation and content, and by severity,
+        category and date (ISO format).
+        """
+        where = []
+        params: List[Any] = []
+        sql = "SELECT issues.* FROM issues"
+        if query and len(query) >= FTS_MIN_QUERY_LENGTH:
+            sql += " JOIN issues_fts ON issues_fts.rowid = issues.id"
+            where.append("issues_fts MATCH ?")
+            params.append('"' + query.replace('"', '""') + '"')
+        elif query:
+            pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            where.append(
+                "(" + " OR ".join(f"issues.{column} LIKE ? ESCAPE '\\'" for column in FTS_COLUMNS) + ")"
+            )
+            params.extend([pattern] * len(FTS_COLUMNS))
+        if severity:
+            where.append("issues.severity = ?")
+            params.append(severity)
+        if category:
+            where.append("issues.category = ?")
+            params.append(category)
+        if since:
+            where.append("issues.date_uploaded >= ?")
+            params.append(since)
+        if until:
+            where.append("issues.date_uploaded < ?")
+            params.append(until)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY issues.date_uploaded DESC, issues.id DESC LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+        return [self._issue(row) for row in self._connection().execute(sql, params).fetchall()]
+
+    @staticmethod
+    def _contract(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "id": row["id"],
+            "name": row["name"],
+            "content": row["content"],
+            "dateUploaded": row["date_uploaded"],
+            "riskLevel": row["risk_level"],
+            "score": row["score"],
+            "issueCount": row["issue_count"],
+        }
+
+    @staticmethod
+    def _issue(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "id": row["content_id"],
+            "contractId": row["contract_id"],
+            "startPosition": row["part_start_id"],
+            "endPosition": row["part_end_id"],
+            "category": row["category"],
+            "severity": row["severity"],
+            "content": row["content"],
+            "description": row["description"],
+            "recommendation": row["recommendation"],
+            "dateUploaded": row["date_uploaded"],
+        }
+
+
+_store: AnalysisStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> AnalysisStore:
+    """Get the process-wide analysis store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            os.makedirs(os.path.dirname(ANALYSIS_DB_PATH), exist_ok=True)
+            _store = AnalysisStore(ANALYSIS_DB_PATH)
+        return _store
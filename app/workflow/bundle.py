@@ -0,0 +1,192 @@
+import datetime
+import re
+from typing import Dict, Iterator, List
+
+from llama_index.core.bridge.pydantic import BaseModel, Field
+
+from workflow.rules import (
+    DATE_PATTERN,
+    LOWER_AMOUNT_PATTERN,
+    UPPER_AMOUNT_PATTERN,
+    PlaceholderRule,
+    parse_chinese_amount,
+    parse_number,
+)
+from workflow.schema import ConflictIssue, ResultIssue
+from workflow.utils import Content
+
+# 跨文件一致性问题的分类
+CROSS_DOCUMENT_CATEGORY = "文件一致性"
+
+PARTY_ROLES = "甲方|乙方|丙方|委托方|受托方|买方|卖方|供方|需方|出租方|承租方|发包方|承包方"
+PARTY_PATTERN = re.compile(
+    rf"(?P<key>{PARTY_ROLES})(?:[（(][^）)]*[）)])?\s*[:：]\s*(?P<value>[^\s，,。；;：:（(]{{2,40}})"
+)
+# 北京某某有限公司（以下简称“甲方”）
+ALIAS_PATTERN = re.compile(
+    r"(?P<value>[^\s，,。；;：:（(“”\"]{2,40})\s*[（(]\s*(?:以下简称|以下称|下称|简称)\s*[:：]?\s*"
+    r"[“\"「](?P<key>[^”\"」]{1,20})[”\"」]"
+)
+# “交付物”是指……
+DEFINITION_PATTERN = re.compile(r"[“\"「](?P<key>[^”\"」]{1,20})[”\"」]\s*(?:是指|系指|指)\s*(?P<value>[^。；;\n]{2,120})")
+AMOUNT_LABEL_PATTERN = re.compile(
+    r"(?P<key>合同总价款|合同总价|合同总金额|合同金额|总价款|总金额|含税总价)[^，。；;\d¥￥零壹贰叁肆伍陆柒捌玖]{0,12}"
+)
+DATE_LABEL_PATTERN = re.compile(
+    r"(?P<key>生效日期|签订日期|签署日期|交付日期|开始日期|起始日期|终止日期|截止日期|到期日|有效期至)"
+    r"[^，。；;\d]{0,8}"
+)
+
+KIND_LABELS = {"party": "合同主体", "term": "定义术语", "amount": "金额", "date": "日期"}
+
+
+class Fact(BaseModel):
+    """A labelled value found in a document, e.g. the name of 甲方 or the total amount."""
+
+    document: str = Field(description="The name of the document")
+    content_id: int = Field(description="The id of the content the fact was found in")
+    kind: str = Field(description="party, term, amount or date")
+    key: str = Field(description="The label of the value, e.g. 甲方 or 合同总价")
+    value: str = Field(description="The normalized value")
+    text: str = Field(description="The text of the content")
+
+
+class Conflict(BaseModel):
+    """The facts of one key whose values differ between documents."""
+
+    kind: str
+    key: str
+    facts: List[Fact]
+
+    @property
+    def documents(self) -> List[str]:
+        return list(dict.fromkeys(fact.document for fact in self.facts))
+
+
+def _normalize_name(value: str) -> str:
+    return re.sub(r"[\s“”\"'「」]", "", value).rstrip("：:")
+
+
+def _amount(text: str) -> str | None:
+    lower = LOWER_AMOUNT_PATTERN.match(text)
+    if lower is not None:
+        if lower.group("yen") is not None:
+            value = parse_number(lower.group("yen"), wan=bool(lower.group("yen_wan")))
+        else:
+            value = parse_number(lower.group("num"), wan=bool(lower.group("num_wan")))
+    else:
+        upper = UPPER_AMOUNT_PATTERN.match(text)
+        value = parse_chinese_amount(upper.group()) if upper is not None else None
+    return f"{value:.2f}" if value is not None else None
+
+
+def extract_facts(document: str, contents: List[Content]) -> Iterator[Fact]:
+    """
+    Extract the parties, defined terms, labelled amounts and labelled dates of a document.
+
+    Values with placeholders are skipped, they are reported by the rule engine.
+    """
+    placeholder = PlaceholderRule.pattern
+
+    def fact(content: Content, kind: str, key: str, value: str) -> Fact:
+        return Fact(document=document, content_id=content.id, kind=kind, key=key, value=value, text=content.content)
+
+    for content in contents:
+        text = content.content
+        if not text or content.content_type != "paragraph":
+            continue
+        for match in PARTY_PATTERN.finditer(text):
+            if not placeholder.search(match.group("value")):
+                yield fact(content, "party", match.group("key"), _normalize_name(match.group("value")))
+        for match in ALIAS_PATTERN.finditer(text):
+            key = match.group("key")
+            if not placeholder.search(match.group("value")):
+                kind = "party" if re.fullmatch(PARTY_ROLES, key) else "term"
+                yield fact(content, kind, key, _normalize_name(match.group("value")))
+        for match in DEFINITION_PATTERN.finditer(text):
+            yield fact(content, "term", match.group("key"), _normalize_name(match.group("value")))
+        for match in AMOUNT_LABEL_PATTERN.finditer(text):
+            value = _amount(text[match.end() :].lstrip("为：: 人民币"))
+            if value is not None:
+                yield fact(content, "amount", match.group("key"), value)
+        for match in DATE_LABEL_PATTERN.finditer(text):
+            date = DATE_PATTERN.match(text, match.end())
+            if date is None:
+                continue
+            try:
+                day = datetime.date(int(date.group("year")), int(date.group("month")), int(date.group("day")))
+            except ValueError:
+                continue
+            yield fact(content, "date", match.group("key"), day.isoformat())
+
+
+class FactIndex:
+    """
+    The shared index of the facts of all the documents in a bundle, by kind and key.
+    """
+
+    def __init__(self) -> None:
+        self.facts: Dict[tuple[str, str], List[Fact]] = {}
+
+    def add(self, document: str, contents: List[Content]) -> None:
+        for fact in extract_facts(document, contents):
+            self.facts.setdefault((fact.kind, fact.key), []).append(fact)
+
+    def conflicts(self) -> List[Conflict]:
+        """
+        The keys with more than one value across the documents. A key used by one document only is not
+        a conflict, inconsistencies inside a document are left to its own review.
+        """
+        conflicts: List[Conflict] = []
+        for (kind, key), facts in self.facts.items():
+            values: Dict[str, set[str]] = {}
+            for fact in facts:
+                values.setdefault(fact.value, set()).add(fact.document)
+            documents = set().union(*values.values())
+            if len(values) > 1 and len(documents) > 1:
+                # 每个文件的每个取值只保留第一处
+                unique = list({(fact.document, fact.value): fact for fact in reversed(facts)}.values())[::-1]
+                conflicts.append(Conflict(kind=kind, key=key, facts=unique))
+        return conflicts
+
+
+def format_conflicts(conflicts: List[Conflict]) -> str:
+    """The conflicts in the format of the cross document prompt."""
+    blocks = []
+    for index, conflict in enumerate(conflicts):
+        lines = [f"冲突 {index}：{KIND_LABELS[conflict.kind]}“{conflict.key}”"]
+        lines.extend(
+            f"- 《{fact.document}》Content {fact.content_id}（取值 {fact.value}）：{fact.text}" for fact in conflict.facts
+        )
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
+
+
+def conflict_issues(conflicts: List[Conflict], issues: List[ConflictIssue]) -> Dict[str, List[ResultIssue]]:
+    """
+    Turn the confirmed conflicts into issues of every document involved, by document name.
+    """
+    result: Dict[str, List[ResultIssue]] = {}
+    for issue in issues:
+        if not 0 <= issue.conflict < len(conflicts):
+            continue
+        conflict = conflicts[issue.conflict]
+        for fact in conflict.facts:
+            # 只列出取值与本条不同的文档，同一文档内前后不一致时也列出本文档
+            others = "、".join(
+                f"《{document}》"
+                for document in dict.fromkeys(other.document for other in conflict.facts if other.value != fact.value)
+            )
+            result.setdefault(fact.document, []).append(
+                ResultIssue(
+                    id=fact.content_id,
+                    content=fact.text,
+                    description=f"与{others}中的{KIND_LABELS[conflict.kind]}“{conflict.key}”不一致：{issue.description}",
+                    severity=issue.severity,
+                    recommendation=issue.recommendation,
+                    part_start_id=fact.content_id,
+                    part_end_id=fact.content_id,
+                    category=CROSS_DOCUMENT_CATEGORY,
+                )
+            )
+    return result
@@ -0,0 +1,188 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List
+
+from llama_index.core.bridge.pydantic import Field, PrivateAttr
+from llama_index.core.llms import (
+    LLM,
+    CompletionResponse,
+    CompletionResponseAsyncGen,
+    CompletionResponseGen,
+    CustomLLM,
+    LLMMetadata,
+)
+from llama_index.core.llms.callbacks import llm_completion_callback
+from llama_index.core.prompts import BasePromptTemplate
+
+
+def prompt_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CassetteMiss(KeyError):
+    """The prompt was not recorded in the cassette."""
+
+
+class RecordingLLM(CustomLLM):
+    """
+    Wrap an LLM and append every ``apredict``/``predict``/``complete`` call and every sync or async
+    completion stream to a JSONL cassette: the formatted prompt, its sha256, the output and the latency.
+    A stream is recorded once it has been consumed to the end.
+    """
+
+    llm: LLM = Field(description="The recorded LLM")
+    cassette: str = Field(description="The path of the cassette file")
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return self.llm.metadata
+
+    def _record(self, prompt: str, output: str, latency: float) -> None:
+        line = json.dumps(
+            {
+                "key": prompt_key(prompt),
+                "prompt": prompt,
+                "output": output,
+                "latency": round(latency, 4),
+                "model": self.llm.metadata.model_name,
+            },
+            ensure_ascii=False,
+        )
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.cassette)), exist_ok=True)
+            with open(self.cassette, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def predict(self, prompt: BasePromptTemplate, **prompt_args: Any) -> str:
+        start = time.perf_counter()
+        output = self.llm.predict(prompt, **prompt_args)
+        self._record(prompt.format(**prompt_args), output, time.perf_counter() - start)
+        return output
+
+    async def apredict(self, prompt: BasePromptTemplate, **prompt_args: Any) -> str:
+        start = time.perf_counter()
+        output = await self.llm.apredict(prompt, **prompt_args)
+        self._record(prompt.format(**prompt_args), output, time.perf_counter() - start)
+        return output
+
+    @llm_completion_callback()
+    def complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        start = time.perf_counter()
+        response = self.llm.complete(prompt, formatted=formatted, **kwargs)
+        self._record(prompt, response.text, time.perf_counter() - start)
+        return response
+
+    @llm_completion_callback()
+    async def acomplete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        start = time.perf_counter()
+        response = await self.llm.acomplete(prompt, formatted=formatted, **kwargs)
+        self._record(prompt, response.text, time.perf_counter() - start)
+        return response
+
+    @llm_completion_callback()
+    def stream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponseGen:
+        start = time.perf_counter()
+        stream = self.llm.stream_complete(prompt, formatted=formatted, **kwargs)
+
+        def gen() -> CompletionResponseGen:
+            text = ""
+            for response in stream:
+                text = _stream_text(text, response)
+                yield response
+            self._record(prompt, text, time.perf_counter() - start)
+
+        return gen()
+
+    @llm_completion_callback()
+    async def astream_complete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> CompletionResponseAsyncGen:
+        start = time.perf_counter()
+        stream = await self.llm.astream_complete(prompt, formatted=formatted, **kwargs)
+
+        async def gen() -> CompletionResponseAsyncGen:
+            text = ""
+            async for response in stream:
+                text = _stream_text(text, response)
+                yield response
+            self._record(prompt, text, time.perf_counter() - start)
+
+        return gen()
+
+
+def _stream_text(text: str, response: CompletionResponse) -> str:
+    """The text streamed so far: responses carry the accumulated text, or only the delta for some LLMs."""
+    return response.text or text + (response.delta or "")
+
+
+class ReplayLLM(CustomLLM):
+    """
+    Serve the outputs of a cassette recorded by ``RecordingLLM`` offline.
+
+    Calls are matched by the sha256 of the formatted prompt. A prompt recorded several times is served
+    its recordings in turn. Each call sleeps for the recorded latency multiplied by latency_scale,
+    so throughput tests see the latency distribution of the recorded model (0 disables the sleep).
+    """
+
+    cassette: str = Field(description="The path of the cassette file")
+    latency_scale: float = Field(default=1.0, description="Multiplier of the recorded latencies, 0 for no delay")
+    context_window: int = Field(default=128000, description="The context window reported in the metadata")
+    model_name: str = Field(default="replay", description="The model name reported in the metadata")
+    _entries: Dict[str, List[Dict[str, Any]]] = PrivateAttr(default_factory=dict)
+    _served: Dict[str, int] = PrivateAttr(default_factory=dict)
+
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        with open(self.cassette, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry["key"], []).append(entry)
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return LLMMetadata(context_window=self.context_window, model_name=self.model_name)
+
+    @property
+    def latencies(self) -> List[float]:
+        """The recorded latencies of all the calls in the cassette."""
+        return [entry["latency"] for entries in self._entries.values() for entry in entries]
+
+    def _lookup(self, prompt: str) -> Dict[str, Any]:
+        key = prompt_key(prompt)
+        entries = self._entries.get(key)
+        if not entries:
+            raise CassetteMiss(f"Prompt not in cassette {self.cassette}: {prompt[:200]!r}")
+        served = self._served.get(key, 0)
+        self._served[key] = served + 1
+        return entries[served % len(entries)]
+
+    def predict(self, prompt: BasePromptTemplate, **prompt_args: Any) -> str:
+        entry = self._lookup(prompt.format(**prompt_args))
+        time.sleep(entry["latency"] * self.latency_scale)
+        return entry["output"]
+
+    async def apredict(self, prompt: BasePromptTemplate, **prompt_args: Any) -> str:
+        entry = self._lookup(prompt.format(**prompt_args))
+        await asyncio.sleep(entry["latency"] * self.latency_scale)
+        return entry["output"]
+
+    @llm_completion_callback()
+    def complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        entry = self._lookup(prompt)
+        time.sleep(entry["latency"] * self.latency_scale)
+        return CompletionResponse(text=entry["output"])
+
+    @llm_completion_callback()
+    def stream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponseGen:
+        response = self.complete(prompt, formatted=formatted, **kwargs)
+
+        def gen() -> CompletionResponseGen:
+            yield CompletionResponse(text=response.text, delta=response.text)
+
+        return gen()
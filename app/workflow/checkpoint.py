@@ -0,0 +1,112 @@
+import hashlib
+import os
+import shutil
+import time
+from typing import List
+
+from llama_index.core.bridge.pydantic import TypeAdapter
+from loguru import logger
+
+from config.const import CHECKPOINT_DIR
+from workflow.schema import ContractParts, Part, ResultIssue
+from workflow.utils import DocumentSource, open_document
+
+ISSUES_ADAPTER = TypeAdapter(List[ResultIssue])
+
+# 未恢复的检查点保留天数
+KEEP_DAYS = 7
+
+
+def document_key(source: DocumentSource) -> str:
+    """
+    Get the sha256 of a document, from its path, content or file object.
+    """
+    digest = hashlib.sha256()
+    with open_document(source) as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def checkpoint_prefix(document_hash: str, *config: object) -> str:
+    """
+    Get the key prefix of the checkpoints of a document reviewed with a reviewer configuration
+    (model name, policy, output schema, ...). Each review appends its own id to the prefix.
+    """
+    digest = hashlib.sha256(repr(config).encode()).hexdigest()[:16]
+    return f"{document_hash}-{digest}-"
+
+
+class CheckpointStore:
+    """
+    Step-level checkpoints of the ReviewerAgent, keyed by document hash, reviewer configuration and review id.
+
+    The classify result and the issues of every reviewed part are written as soon as they are available,
+    so a review that crashed or timed out can be resumed and only reruns the unfinished parts.
+    Each checkpoint is a directory with parts.json and one issues file per part, written atomically.
+    """
+
+    def __init__(self, path: str = CHECKPOINT_DIR, keep_days: int = KEEP_DAYS) -> None:
+        """
+        Args:
+            path: The directory of the checkpoints.
+            keep_days: Checkpoints untouched for longer than this are removed.
+        """
+        self.path = path
+        self.keep_days = keep_days
+        os.makedirs(self.path, exist_ok=True)
+        self.prune()
+
+    def _dir(self, key: str) -> str:
+        return os.path.join(self.path, key)
+
+    def _write(self, key: str, name: str, data: bytes) -> None:
+        directory = self._dir(key)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, name)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _read(self, key: str, name: str) -> bytes | None:
+        try:
+            with open(os.path.join(self._dir(key), name), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _part_name(part: Part) -> str:
+        return f"issues-{part.start_id}-{part.end_id}.json"
+
+    def save_parts(self, key: str, parts: ContractParts) -> None:
+        self._write(key, "parts.json", parts.model_dump_json().encode())
+
+    def load_parts(self, key: str) -> ContractParts | None:
+        data = self._read(key, "parts.json")
+        return None if data is None else ContractParts.model_validate_json(data)
+
+    def save_issues(self, key: str, part: Part, issues: List[ResultIssue]) -> None:
+        self._write(key, self._part_name(part), ISSUES_ADAPTER.dump_json(issues))
+
+    def load_issues(self, key: str, part: Part) -> List[ResultIssue] | None:
+        data = self._read(key, self._part_name(part))
+        return None if data is None else ISSUES_ADAPTER.validate_json(data)
+
+    def clear(self, key: str) -> None:
+        shutil.rmtree(self._dir(key), ignore_errors=True)
+
+    def latest(self, prefix: str) -> str | None:
+        """The key of the most recently written checkpoint starting with prefix, None if there is none."""
+        keys = [key for key in os.listdir(self.path) if key.startswith(prefix) and os.path.isdir(self._dir(key))]
+        return max(keys, key=lambda key: os.path.getmtime(self._dir(key)), default=None)
+
+    def prune(self) -> None:
+        """Remove the checkpoints untouched for more than keep_days."""
+        deadline = time.time() - self.keep_days * 86400
+        for key in os.listdir(self.path):
+            directory = self._dir(key)
+            if os.path.isdir(directory) and os.path.getmtime(directory) < deadline:
+                shutil.rmtree(directory, ignore_errors=True)
+                logger.info(f"Removed expired checkpoint: {key}")
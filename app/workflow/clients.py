@@ -0,0 +1,106 @@
+import importlib.util
+import os
+import threading
+from typing import Any, Dict, Tuple
+
+import httpx
+from llama_index.core.llms import LLM
+from llama_index.llms.openai_like import OpenAILike
+
+# HTTP/2 需要安装 h2 (httpx[http2])，未安装时退回 HTTP/1.1 keep-alive
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+HTTP_LIMITS = httpx.Limits(
+    max_connections=int(os.environ.get("LLM_MAX_CONNECTIONS", 100)),
+    max_keepalive_connections=int(os.environ.get("LLM_MAX_KEEPALIVE_CONNECTIONS", 20)),
+    keepalive_expiry=float(os.environ.get("LLM_KEEPALIVE_EXPIRY", 120)),
+)
+HTTP_TIMEOUT = httpx.Timeout(float(os.environ.get("LLM_TIMEOUT", 600)), connect=10.0)
+
+_lock = threading.Lock()
+_http_client: httpx.Client | None = None
+_async_http_client: httpx.AsyncClient | None = None
+_llms: Dict[Tuple[Any, ...], LLM] = {}
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Get the process-wide http client shared by all the LLMs.
+    """
+    global _http_client
+    with _lock:
+        if _http_client is None or _http_client.is_closed:
+            _http_client = httpx.Client(http2=HTTP2, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+        return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Get the process-wide async http client shared by all the LLMs.
+
+    The connections of an async client belong to the event loop that opened them,
+    so the pool must be used from a single event loop (e.g. the api server).
+    """
+    global _async_http_client
+    with _lock:
+        if _async_http_client is None or _async_http_client.is_closed:
+            _async_http_client = httpx.AsyncClient(http2=HTTP2, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+        return _async_http_client
+
+
+def get_llm(
+    model: str | None = None,
+    api_base: str | None = None,
+    api_key: str | None = None,
+    **kwargs: Any,
+) -> LLM:
+    """
+    Get a warm OpenAI compatible LLM from the pool.
+
+    LLMs with the same arguments are created once per process and share the pooled http clients,
+    so the connections to the LLM provider are kept alive across reviews.
+
+    Args:
+        model: The model name, defaults to the LLM_MODEL environment variable.
+        api_base: The api base url, defaults to the LLM_API_BASE environment variable.
+        api_key: The api key, defaults to the LLM_API_KEY environment variable.
+        **kwargs: Additional arguments of OpenAILike.
+
+    Returns:
+        LLM: The pooled LLM.
+    """
+    model = model or os.environ["LLM_MODEL"]
+    api_base = api_base or os.environ.get("LLM_API_BASE")
+    api_key = api_key or os.environ.get("LLM_API_KEY")
+    key = (model, api_base, api_key, repr(sorted(kwargs.items())))
+    with _lock:
+        llm = _llms.get(key)
+    if llm is None:
+        kwargs.setdefault("is_chat_model", True)
+        llm = OpenAILike(
+            model=model,
+            api_base=api_base,
+            api_key=api_key,
+            reuse_client=True,
+            http_client=get_http_client(),
+            async_http_client=get_async_http_client(),
+            **kwargs,
+        )
+        with _lock:
+            llm = _llms.setdefault(key, llm)
+    return llm
+
+
+async def aclose() -> None:
+    """
+    Close the pooled http clients, e.g. on server shutdown.
+    """
+    global _http_client, _async_http_client
+    with _lock:
+        http_client, async_http_client = _http_client, _async_http_client
+        _http_client = _async_http_client = None
+        _llms.clear()
+    if http_client is not None:
+        http_client.close()
+    if async_http_client is not None:
+        await async_http_client.aclose()
@@ -0,0 +1,99 @@
+import marshal
+import os
+import threading
+import zlib
+from typing import List
+
+from loguru import logger
+
+from config.const import PARSE_CACHE_DIR
+from workflow.utils import Content
+
+# 修改 Content 的解析方式后递增，使旧缓存失效
+CACHE_VERSION = 1
+PARSE_CACHE_MAX_BYTES = int(os.environ.get("PARSE_CACHE_MAX_MB", 512)) * 1024 * 1024
+
+
+class ParseCache:
+    """
+    On-disk cache of parsed contents, keyed by the document hash and the parser.
+
+    Each entry holds the (id, content_type, content) of every Content, serialized with marshal and
+    compressed with zlib, which is compact and much faster to load than re-parsing the docx with
+    python-docx, mammoth and BeautifulSoup. The python-docx objects are not cached; re-attach them
+    with ``workflow.scanner.bind_contents`` when the document is annotated.
+
+    Entries are evicted least recently used first once the cache exceeds max_bytes.
+    Only entries written by this process family are read, marshal is not safe for untrusted data.
+    """
+
+    def __init__(self, path: str = PARSE_CACHE_DIR, max_bytes: int = PARSE_CACHE_MAX_BYTES) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+
+    def _file(self, key: str, streaming: bool) -> str:
+        return os.path.join(self.path, f"{key}.{'scan' if streaming else 'docx'}.bin")
+
+    def get(self, key: str, streaming: bool = False) -> List[Content] | None:
+        """
+        Get the cached contents of a document, without python-docx objects attached.
+
+        Args:
+            key: The sha256 of the document, see ``workflow.checkpoint.document_key``.
+            streaming: Whether the contents were parsed with the streaming scanner.
+        """
+        path = self._file(key, streaming)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            version, rows = marshal.loads(zlib.decompress(data))
+        except (ValueError, EOFError, TypeError, zlib.error):
+            version, rows = None, []
+        # 读取后文件可能已被 evict 删除，此时按未命中处理
+        try:
+            if version != CACHE_VERSION:
+                os.remove(path)
+                return None
+            # 更新访问时间，用于按最近使用淘汰
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return [Content(id=id, content_type=content_type, content=content) for id, content_type, content in rows]
+
+    def put(self, key: str, contents: List[Content], streaming: bool = False) -> None:
+        rows = [(content.id, content.content_type, content.content) for content in contents]
+        data = zlib.compress(marshal.dumps((CACHE_VERSION, rows)), 1)
+        path = self._file(key, streaming)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache fits max_bytes."""
+        with self._lock:
+            entries = []
+            total = 0
+            with os.scandir(self.path) as it:
+                for entry in it:
+                    if entry.name.endswith(".bin"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+                        total += stat.st_size
+            if total <= self.max_bytes:
+                return
+            for _, size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                logger.debug(f"Evicted parse cache entry: {os.path.basename(path)}")
+                if total <= self.max_bytes:
+                    break
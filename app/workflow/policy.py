@@ -0,0 +1,55 @@
+from typing import Dict, Literal
+
+from llama_index.core.bridge.pydantic import BaseModel, Field
+
+# skip: 不审查; rules: 只使用规则引擎; cheap: 使用低成本模型; full: 完整审查
+ReviewMode = Literal["skip", "rules", "cheap", "full"]
+
+HIGH_RISK_CATEGORIES = ("违约责任", "支付", "合同主体")
+LOW_RISK_CATEGORIES = ("签字区", "附件")
+
+
+class ReviewPolicy(BaseModel):
+    """Per-category review policy of the ReviewerAgent."""
+
+    default: ReviewMode = Field(default="full", description="The mode for categories not listed in categories")
+    categories: Dict[str, ReviewMode] = Field(default_factory=dict, description="The mode of each category")
+
+    def mode(self, category: str) -> ReviewMode:
+        return self.categories.get(category, self.default)
+
+    @classmethod
+    def full(cls) -> "ReviewPolicy":
+        """Review every part with the LLM."""
+        return cls()
+
+    @classmethod
+    def standard(cls) -> "ReviewPolicy":
+        """Only run the rule engine on low risk categories such as 签字区 and 附件."""
+        return cls(categories={category: "rules" for category in LOW_RISK_CATEGORIES})
+
+    @classmethod
+    def fast(cls) -> "ReviewPolicy":
+        """Only review high risk categories with the LLM, for triage queues."""
+        return cls(default="rules", categories={category: "full" for category in HIGH_RISK_CATEGORIES})
+
+    @classmethod
+    def from_profile(cls, profile: str) -> "ReviewPolicy":
+        """
+        Get the policy of a review profile.
+
+        Args:
+            profile (str): One of full, standard and fast.
+
+        Returns:
+            ReviewPolicy: The policy of the profile.
+        """
+        match profile:
+            case "full":
+                return cls.full()
+            case "standard":
+                return cls.standard()
+            case "fast":
+                return cls.fast()
+            case _:
+                raise ValueError(f"Unknown review profile: {profile}")
@@ -0,0 +1,297 @@
+import asyncio
+import contextlib
+import functools
+import math
+import os
+import re
+import threading
+import weakref
+from typing import AsyncIterator, Dict, List, Literal
+
+from llama_index.core.bridge.pydantic import BaseModel, Field
+from llama_index.core.llms import LLM
+from llama_index.core.utils import get_tokenizer
+
+from prompts.review import (
+    category_summary_prompt,
+    contract_classify_prompt,
+    default_review_prompt,
+    reduce_summary_prompt,
+)
+from workflow.policy import ReviewPolicy
+from workflow.schema import ContractParts, IssueList, SummaryIssues
+from workflow.utils import Content
+
+# 平均每个部分的正文 token 数，用于在分类之前估计部分数量
+PART_TOKENS = int(os.environ.get("PREFLIGHT_PART_TOKENS", 600))
+# 每个部分的分类结果和审查结果的输出 token 数
+CLASSIFY_TOKENS_PER_PART = 40
+ISSUE_TOKENS_PER_PART = int(os.environ.get("PREFLIGHT_ISSUE_TOKENS_PER_PART", 250))
+SUMMARY_OUTPUT_TOKENS = 400
+# 估计的 LLM 吞吐量
+PREFILL_TOKENS_PER_SECOND = float(os.environ.get("PREFLIGHT_PREFILL_TPS", 2000))
+DECODE_TOKENS_PER_SECOND = float(os.environ.get("PREFLIGHT_DECODE_TPS", 40))
+# ReviewerAgent.review_contract 的并发数
+REVIEW_WORKERS = 6
+# 估计的摘要涉及的分类数
+SUMMARY_CATEGORIES = 6
+# 所有进行中的审查的 token 上限，以及单个任务降级的阈值
+MAX_INFLIGHT_TOKENS = int(os.environ.get("ADMISSION_MAX_INFLIGHT_TOKENS", 2_000_000))
+MAX_JOB_TOKENS = int(os.environ.get("ADMISSION_MAX_JOB_TOKENS", 300_000))
+
+# 分类提示词中给定的分类
+CATEGORIES = re.findall(r"^- (\S+)$", contract_classify_prompt.split("给定合同")[0], re.M)
+
+
+@functools.lru_cache(maxsize=8192)
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens of a text with the llama-index tokenizer (tiktoken by default), cached per text.
+    """
+    return len(get_tokenizer()(text))
+
+
+@functools.cache
+def prompt_overhead(template: str) -> int:
+    """
+    The tokens of a prompt template and its schema, without the contract content.
+    """
+    schemas: Dict[str, type[BaseModel]] = {
+        contract_classify_prompt: ContractParts,
+        reduce_summary_prompt: SummaryIssues,
+    }
+    schema = schemas.get(template, IssueList).model_json_schema()
+    return count_tokens(template) + count_tokens(str(schema))
+
+
+class Estimate(BaseModel):
+    """The predicted cost of reviewing a document."""
+
+    content_tokens: int = Field(description="Tokens of the contract contents")
+    input_tokens: int = Field(description="Predicted input tokens of all the LLM calls")
+    output_tokens: int = Field(description="Predicted output tokens of all the LLM calls")
+    max_prompt_tokens: int = Field(description="Input tokens of the largest prompt (the classify prompt)")
+    llm_calls: int = Field(description="Predicted number of LLM calls")
+    parts: int = Field(description="Predicted number of parts")
+    seconds: float = Field(description="Predicted wall time")
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+
+class PreflightEstimator:
+    """
+    Predict the tokens, LLM calls and wall time of a review from the contents, before any LLM call.
+
+    The classify prompt holds the whole contract, the part reviews together hold it once more plus a
+    prompt per part, and the summary holds the issues. The number of parts is estimated from the size
+    of the contract, and the wall time from the configured prefill and decode throughput.
+    """
+
+    def __init__(
+        self,
+        part_tokens: int = PART_TOKENS,
+        prefill_tokens_per_second: float = PREFILL_TOKENS_PER_SECOND,
+        decode_tokens_per_second: float = DECODE_TOKENS_PER_SECOND,
+    ) -> None:
+        self.part_tokens = part_tokens
+        self.prefill_tokens_per_second = prefill_tokens_per_second
+        self.decode_tokens_per_second = decode_tokens_per_second
+
+    def _seconds(self, input_tokens: float, output_tokens: float) -> float:
+        return input_tokens / self.prefill_tokens_per_second + output_tokens / self.decode_tokens_per_second
+
+    def estimate(
+        self,
+        contents: List[Content],
+        summary: bool = False,
+        policy: ReviewPolicy | str = "full",
+    ) -> Estimate:
+        """
+        Estimate the cost of reviewing the contents.
+
+        Args:
+            contents: The contents of the contract.
+            summary: Whether the issues will be summarized (hierarchically).
+            policy: The review policy or profile; parts in skip or rules mode cost no LLM call.
+
+        Returns:
+            Estimate: The predicted cost.
+        """
+        policy = ReviewPolicy.from_profile(policy) if isinstance(policy, str) else policy
+        # "Content {id}: " 前缀每条约 4 个 token
+        content_tokens = sum(count_tokens(content.content) for content in contents) + 4 * len(contents)
+        parts = max(1, math.ceil(content_tokens / self.part_tokens))
+        # 按策略中调用 LLM 的分类比例折算
+        llm_categories = sum(policy.mode(category) in ("cheap", "full") for category in CATEGORIES)
+        reviewed = max(1, round(parts * llm_categories / len(CATEGORIES)))
+
+        classify_input = prompt_overhead(contract_classify_prompt) + content_tokens
+        classify_output = CLASSIFY_TOKENS_PER_PART * parts
+        review_input = prompt_overhead(default_review_prompt) * reviewed + content_tokens * reviewed // parts
+        review_output = ISSUE_TOKENS_PER_PART * reviewed
+        input_tokens = classify_input + review_input
+        output_tokens = classify_output + review_output
+        llm_calls = 1 + reviewed
+
+        seconds = self._seconds(classify_input, classify_output)
+        # 部分审查按 REVIEW_WORKERS 并发，按批次计算关键路径
+        seconds += math.ceil(reviewed / REVIEW_WORKERS) * self._seconds(
+            review_input / reviewed, review_output / reviewed
+        )
+        if summary:
+            categories = min(SUMMARY_CATEGORIES, parts)
+            summary_input = prompt_overhead(category_summary_prompt) * categories + review_output
+            summary_input += prompt_overhead(reduce_summary_prompt) + SUMMARY_OUTPUT_TOKENS * categories
+            summary_output = SUMMARY_OUTPUT_TOKENS * (categories + 1)
+            input_tokens += summary_input
+            output_tokens += summary_output
+            llm_calls += categories + 1
+            seconds += 2 * self._seconds(summary_input / (categories + 1), SUMMARY_OUTPUT_TOKENS)
+
+        return Estimate(
+            content_tokens=content_tokens,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            max_prompt_tokens=classify_input,
+            llm_calls=llm_calls,
+            parts=parts,
+            seconds=round(seconds, 1),
+        )
+
+
+class AdmissionError(Exception):
+    """The review was rejected by the admission controller."""
+
+
+class CapacityError(AdmissionError):
+    """The review was rejected because no capacity became available within the wait timeout."""
+
+
+class Decision(BaseModel):
+    action: Literal["accept", "downgrade", "route", "reject"] = Field(description="What to do with the job")
+    reason: str = Field(default="", description="Why the job was not accepted as is")
+
+
+class AdmissionController:
+    """
+    Decide whether a review may run as requested, and keep the tokens of the running reviews under a ceiling.
+
+    - reject: the largest prompt does not fit the context window of any model, or the job alone exceeds the ceiling.
+    - route: the largest prompt only fits the context window of the large model.
+    - downgrade: the job exceeds max_job_tokens, it runs with the downgrade profile instead.
+    - accept: otherwise.
+    """
+
+    def __init__(
+        self,
+        max_inflight_tokens: int = MAX_INFLIGHT_TOKENS,
+        max_job_tokens: int = MAX_JOB_TOKENS,
+        context_window: int | None = None,
+        large_llm: LLM | None = None,
+        downgrade_profile: str = "fast",
+        wait_timeout: float | None = 600.0,
+    ) -> None:
+        """
+        Args:
+            max_inflight_tokens: The ceiling of the predicted tokens of all the running reviews.
+            max_job_tokens: Jobs predicted above this run with the downgrade profile.
+            context_window: The context window of the default LLM, unlimited if not given.
+            large_llm: The larger-context LLM for jobs whose prompts do not fit context_window.
+            downgrade_profile: The review profile of downgraded jobs.
+            wait_timeout: How long a job may wait for capacity before it is rejected, None to wait forever.
+        """
+        self.max_inflight_tokens = max_inflight_tokens
+        self.max_job_tokens = max_job_tokens
+        self.context_window = context_window
+        self.large_llm = large_llm
+        self.downgrade_profile = downgrade_profile
+        self.wait_timeout = wait_timeout
+        self.inflight_tokens = 0
+        # 预算由所有事件循环共享（如每次同步 review 各自 asyncio.run），计数由线程锁保护，
+        # 每个事件循环各用一个 Condition 唤醒其中等待的审查
+        self._lock = threading.Lock()
+        self._conditions: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Condition] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _try_reserve(self, tokens: int) -> bool:
+        with self._lock:
+            if self.inflight_tokens + tokens > self.max_inflight_tokens:
+                return False
+            self.inflight_tokens += tokens
+            return True
+
+    @staticmethod
+    async def _notify(condition: asyncio.Condition) -> None:
+        async with condition:
+            condition.notify_all()
+
+    def decide(self, estimate: Estimate) -> Decision:
+        if estimate.total_tokens > self.max_inflight_tokens:
+            return Decision(
+                action="reject",
+                reason=f"{estimate.total_tokens} tokens exceed the ceiling of {self.max_inflight_tokens}",
+            )
+        if self.context_window and estimate.max_prompt_tokens > self.context_window:
+            large_window = self.large_llm.metadata.context_window if self.large_llm else 0
+            if estimate.max_prompt_tokens > large_window:
+                return Decision(
+                    action="reject",
+                    reason=f"The {estimate.max_prompt_tokens} token prompt exceeds every context window",
+                )
+            return Decision(
+                action="route",
+                reason=f"The {estimate.max_prompt_tokens} token prompt exceeds the context window of {self.context_window}",
+            )
+        if estimate.total_tokens > self.max_job_tokens:
+            return Decision(
+                action="downgrade",
+                reason=f"{estimate.total_tokens} tokens exceed the job limit of {self.max_job_tokens}",
+            )
+        return Decision(action="accept")
+
+    @contextlib.asynccontextmanager
+    async def reserve(self, tokens: int) -> AsyncIterator[None]:
+        """
+        Hold tokens of the in-flight budget while the review runs, waiting until they are available.
+
+        Raises:
+            CapacityError: If the budget is not available within wait_timeout.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            condition = self._conditions.setdefault(loop, asyncio.Condition())
+        async with condition:
+            try:
+                await asyncio.wait_for(condition.wait_for(lambda: self._try_reserve(tokens)), self.wait_timeout)
+            except asyncio.TimeoutError:
+                raise CapacityError(
+                    f"No capacity for {tokens} tokens within {self.wait_timeout}s "
+                    f"({self.inflight_tokens}/{self.max_inflight_tokens} in flight)"
+                ) from None
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.inflight_tokens -= tokens
+                conditions = list(self._conditions.items())
+            for waiting_loop, waiting in conditions:
+                if waiting_loop is loop:
+                    await self._notify(waiting)
+                elif not waiting_loop.is_closed():
+                    asyncio.run_coroutine_threadsafe(self._notify(waiting), waiting_loop)
+
+
+_admission: AdmissionController | None = None
+_admission_lock = threading.Lock()
+
+
+def get_admission() -> AdmissionController:
+    """Get the process-wide admission controller, so that every controller shares the in-flight budget."""
+    global _admission
+    with _admission_lock:
+        if _admission is None:
+            _admission = AdmissionController()
+        return _admission
@@ -1,7 +1,9 @@
-from typing import Any, List, Optional, Literal
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
 
 from docx.document import Document
-from llama_index.core.bridge.pydantic import BaseModel, Field
+from llama_index.core.bridge.pydantic import Field
 from llama_index.core.llms import LLM, ChatMessage
 from llama_index.core.memory import ChatMemoryBuffer
 from llama_index.core.prompts import PromptTemplate
@@ -16,17 +18,39 @@ from llama_index.core.workflow import (
     step,
 )
 
+from workflow.schema import (
+    CompactIssueList,
+    ContractAnalysis,
+    ContractParts,
+    Issue,
+    IssueList,
+    Part,
+    ResultIssue,
+    RunStats,
+    SummaryIssues,
+)
+from workflow.checkpoint import CheckpointStore
+from workflow.policy import HIGH_RISK_CATEGORIES, ReviewPolicy
+from workflow.rules import RuleEngine
+from workflow.scoring import RiskScorer
+from workflow.stats import IssueStats
+from workflow.tracing import record_span, span
 from workflow.utils import Content
 from prompts.review import (
+    category_summary_prompt,
     contract_classify_prompt,
     contract_review_map,
-    summary_issues_prompt,
+    reduce_summary_prompt,
+    summary_issues_prompt as default_summary_issues_prompt,
     default_review_prompt,
 )
 
 class InputEvent(StartEvent):
     contents: List[Content] = Field(default_factory=list, description="The contents to fill")
     document: Document | None = Field(default=None, description="The document to fill", exclude=True)
+    checkpoint_key: str | None = Field(
+        default=None, description="The key of the checkpoint to save to and resume from"
+    )
 
     @property
     def all_text(self) -> str:
@@ -36,41 +60,20 @@ class InputEvent(StartEvent):
     def all_id_text(self) -> str:
         return "\n".join([f"Content {content.id}: {content.content}" for content in self.contents])
 
-class Issue(BaseModel):
-    id: int = Field(
-        description="The content id of content, which corresponds to the Content x before each paragraph(e.g., 1, 2, etc.).",
-    )
-    content: str = Field(description="The original contract content corresponding to the issue.")
-    description: str = Field(description="Description of the issue")
-    severity: Literal["low", "medium", "high"] = Field(
-        description="Severity of the issue, which can only be one of low, medium, or high."
-    )
-    recommendation: str = Field(description="Recommendation of the issue")
-
-
-class ResultIssue(Issue):
-    part_start_id: int = Field(description="The start part id of the part.")
-    part_end_id: int = Field(description="The end part id of the part.")
-
-
-class IssueList(BaseModel):
-    issues: List[Issue | ResultIssue] = Field(description="Issues of the contract")
-
-
-class SummaryIssues(BaseModel):
-    summary: str = Field(default="", description="Summary of the issues")
-    riskLevel: str | None = Field(
-        default=None, description="Risk level of the issues. It can only be one of low, medium, or high."
-    )
-    score: int | None = Field(default=None, description="Score of the issues, 0-100")
+class IssueEvent(Event):
+    issue_list: IssueList = Field(description="Issues of the contract")
+    category: str | None = Field(default=None, description="The category of the reviewed part")
 
 
-class ContractAnalysis(SummaryIssues):
-    issues: List[ResultIssue] = Field(description="Issues of the contract")
+class CategoryIssuesEvent(Event):
+    category: str = Field(description="The category of the parts")
+    issue_list: IssueList = Field(description="Issues of all the parts in the category")
 
 
-class IssueEvent(Event):
-    issue_list: IssueList = Field(description="Issues of the contract")
+class CategorySummaryEvent(Event):
+    category: str = Field(description="The category of the parts")
+    issue_list: IssueList = Field(description="Issues of all the parts in the category")
+    summary: str = Field(description="Summary of the issues in the category")
 
 
 class StreamEvent(Event):
@@ -87,24 +90,11 @@ class StreamEvent(Event):
         self.msg = value
 
 
-class Part(BaseModel):
-    title: str = Field(description="The title of the part")
-    start_id: int = Field(
-        description="The start content id of the part, which corresponds to the Content x before each paragraph(e.g., Content 1, Content 2, etc.)."
-    )
-    end_id: int = Field(
-        description="The end content id of the part, which corresponds to the Content x before each paragraph(e.g., Content 1, Content 2, etc.)."
-    )
-    category: str = Field(description="The category of the part")
-
-
-class ContractParts(BaseModel):
-    parts: List[Part] = Field(description="The parts of the contract")
-
-
 class ContractPartEvent(Event):
     part: Part = Field(description="The part of the contract")
     part_text: str = Field(description="The text of the current part")
+    rule_issues: List[ResultIssue] = Field(default_factory=list, description="Issues found by the rule engine")
+    contents: List[Content] = Field(default_factory=list, description="The contents of the part", exclude=True)
 
 
 class ReviewerAgent(Workflow):
@@ -115,7 +105,17 @@ class ReviewerAgent(Workflow):
         chat_history: Optional[List[ChatMessage]] = None,
         tools: List[BaseTool] | None = None,
         summary: bool = False,
-        summary_issues_prompt: PromptTemplate = PromptTemplate(summary_issues_prompt),
+        summary_issues_prompt: PromptTemplate | None = None,
+        hierarchical_summary: bool | None = None,
+        rule_engine: RuleEngine | None = None,
+        policy: ReviewPolicy | str = "full",
+        cheap_llm: LLM | None = None,
+        stats: IssueStats | None = None,
+        local_score: bool = True,
+        scorer: RiskScorer | None = None,
+        checkpoint: CheckpointStore | None = None,
+        compact_output: bool = False,
+        prioritize: bool = True,
         verbose: bool = False,
         timeout: float = 720.0,
         name: str = "Reviewer",
@@ -130,7 +130,26 @@ class ReviewerAgent(Workflow):
             chat_history: The chat history.
             tools: The tools to use.
             summary: Whether to summarize the issues.
-            summary_issues_prompt: The prompt to use for summarizing the issues.
+            summary_issues_prompt: The prompt to use for summarizing all the issues in one call, used when
+                hierarchical_summary is False.
+            hierarchical_summary: Whether to summarize each category as soon as its parts are reviewed
+                (category_summary_prompt) and reduce the category summaries (reduce_summary_prompt), instead
+                of summarizing all the issues in one call with summary_issues_prompt. Defaults to True,
+                or to False when a summary_issues_prompt is given so that the custom prompt is used.
+            rule_engine: The rule engine for deterministic checks before the LLM review, defaults to the
+                default rules. Pass ``RuleEngine(rules=[])`` to disable.
+            policy: The per-category review policy, or the name of a review profile (full, standard, fast).
+            cheap_llm: The LLM for categories with the cheap mode, defaults to llm.
+            stats: Where to record the per-category issue statistics, None to disable.
+            local_score: Whether to fill score and riskLevel with the local scorer instead of the LLM summary.
+                They are available without summary and streamed as a Score event before the summary call.
+            scorer: The local scorer, defaults to the calibrated scorer if one was saved.
+            checkpoint: Where to save the classify result and the issues of each part for the runs started with
+                a checkpoint_key. Finished steps found in the checkpoint are not run again.
+            compact_output: Whether the part reviews answer with the compact schema (content ids, short quotes
+                and issue codes) instead of echoing the contract content; the issues are expanded locally.
+            prioritize: Whether to review the parts in order of category risk and size instead of document order,
+                so that high severity issues show up earlier and the longest reviews do not finish last.
             verbose: Whether to print the verbose output.
             timeout: The timeout for the workflow.
             name: The name of the workflow.
@@ -145,88 +164,240 @@ class ReviewerAgent(Workflow):
 
         self.llm = llm or Settings.llm
         self.summary = summary
-        self.summary_issues_prompt = summary_issues_prompt
+        self.summary_issues_prompt = summary_issues_prompt or PromptTemplate(default_summary_issues_prompt)
+        if hierarchical_summary is None:
+            hierarchical_summary = summary_issues_prompt is None
+        self.hierarchical_summary = hierarchical_summary
+        self.rule_engine = rule_engine if rule_engine is not None else RuleEngine()
+        self.policy = ReviewPolicy.from_profile(policy) if isinstance(policy, str) else policy
+        self.cheap_llm = cheap_llm or self.llm
+        self.stats = stats
+        self.scorer = (scorer or RiskScorer.default()) if local_score else None
+        self.checkpoint = checkpoint
+        self.compact_output = compact_output
+        self.prioritize = prioritize
+
+        self._chat_history = chat_history
+        self._memory: ChatMemoryBuffer | None = None
 
-        self.memory = ChatMemoryBuffer.from_defaults(llm=self.llm, chat_history=chat_history)
+    @property
+    def memory(self) -> ChatMemoryBuffer:
+        # 延迟创建，避免每次构造时都加载 tokenizer
+        if self._memory is None:
+            self._memory = ChatMemoryBuffer.from_defaults(llm=self.llm, chat_history=self._chat_history)
+        return self._memory
 
     @step
     async def split_contract(self, cxt: Context, event: InputEvent) -> ContractPartEvent:  # type: ignore
         """Split the contract and classify the parts"""
+        await cxt.set("run_start", time.perf_counter())
         contract_content = event.all_id_text
         contents = event.contents
 
-        classify_result = await self.llm.apredict(
-            PromptTemplate(contract_classify_prompt),
-            contract_content=contract_content,
-            schema=ContractParts.model_json_schema(),
-        )
-        parts = ContractParts.model_validate_json(classify_result)
+        with span("rules"):
+            rule_issues = self.rule_engine.check(contents) if self.rule_engine else []
+        if rule_issues:
+            cxt.write_event_to_stream(
+                StreamEvent(name=self.name, msg="Rules", data=IssueList(issues=rule_issues).model_dump())  # type: ignore[arg-type]
+            )
+
+        checkpoint_key = event.checkpoint_key if self.checkpoint else None
+        await cxt.set("checkpoint_key", checkpoint_key)
+        parts = self.checkpoint.load_parts(checkpoint_key) if self.checkpoint and checkpoint_key else None
+        if parts is None:
+            with span("llm.classify", contents=len(contents)):
+                classify_result = await self.llm.apredict(
+                    PromptTemplate(contract_classify_prompt),
+                    contract_content=contract_content,
+                    schema=ContractParts.model_json_schema(),
+                )
+            parts = ContractParts.model_validate_json(classify_result)
+            if self.checkpoint and checkpoint_key:
+                self.checkpoint.save_parts(checkpoint_key, parts)
         cxt.write_event_to_stream(StreamEvent(name=self.name, msg="Classify", data=parts.model_dump_json()))
 
         await cxt.set("event_num", len(parts.parts))
+        await cxt.set("parts", parts.parts)
+        category_parts: Dict[str, int] = {}
+        for part in parts.parts:
+            # 未分类的部分归入“其他”，与汇总时的分类一致，否则分类汇总永远等不齐
+            part.category = part.category or "其他"
+            category_parts[part.category] = category_parts.get(part.category, 0) + 1
+        await cxt.set("category_parts", category_parts)
+        part_events = []
         for part in parts.parts:
             part_text = ""
-            for content in contents[part.start_id : part.end_id + 1]:
+            part_contents = contents[part.start_id : part.end_id + 1]
+            for content in part_contents:
                 # Add content id to the header of the content
                 part_text += f"Content {content.id}: {content.content}\n"
-            cxt.send_event(
+                hint = self.rule_engine.content_hint(content) if self.rule_engine else ""
+                if hint:
+                    part_text += f"{hint}\n"
+            part_events.append(
                 ContractPartEvent(
                     part=part,
-                    part_text=part_text
+                    part_text=part_text,
+                    rule_issues=RuleEngine.assign_part(rule_issues, part.start_id, part.end_id, part.category),
+                    contents=part_contents,
                 )
             )
+        if self.prioritize:
+            part_events.sort(key=self._priority, reverse=True)
+        for part_event in part_events:
+            cxt.send_event(part_event)
+
+    def _priority(self, event: ContractPartEvent) -> tuple[int, float]:
+        """
+        The review order of a part. Parts without an LLM call go first, as they finish at once; the others
+        go by category risk times size, so the parts most likely to hold high severity issues start first
+        and, within a risk level, the longest part first (longest-processing-time-first for the makespan).
+        """
+        mode = self.policy.mode(event.part.category)
+        if mode not in ("cheap", "full"):
+            return 1, 0.0
+        if self.scorer is not None:
+            weight = self.scorer.category_weights.get(event.part.category, 1.0)
+        else:
+            weight = 1.5 if event.part.category in HIGH_RISK_CATEGORIES else 1.0
+        return 0, weight * len(event.part_text)
 
     @step(num_workers=6)
     async def review_contract(self, cxt: Context, event: ContractPartEvent) -> IssueEvent:
         """Review the contract and return the issues."""
 
         contract_part = event.part
-        review_prompt = contract_review_map.get(contract_part.category, default_review_prompt)
-        issues = await self.llm.apredict(
-            PromptTemplate(review_prompt),
-            contract_content=event.part_text,
-            schema=IssueList.model_json_schema(mode="serialization"),
-        )
+        mode = self.policy.mode(contract_part.category)
+        checkpoint_key: str | None = await cxt.get("checkpoint_key", default=None)
+        cached: List[ResultIssue] | None = None
+        if self.checkpoint and checkpoint_key:
+            cached = self.checkpoint.load_issues(checkpoint_key, contract_part)
+        result_issues: List[ResultIssue] = [] if mode == "skip" else list(event.rule_issues)
+
+        if cached is not None:
+            # 已完成的部分直接使用检查点中的结果
+            result_issues = cached
+        elif mode in ("cheap", "full"):
+            llm = self.cheap_llm if mode == "cheap" else self.llm
+            review_prompt = contract_review_map.get(contract_part.category, default_review_prompt)
+            schema = CompactIssueList if self.compact_output else IssueList
+            with span(
+                "llm.review",
+                category=contract_part.category,
+                start_id=contract_part.start_id,
+                end_id=contract_part.end_id,
+                mode=mode,
+            ):
+                issues = await llm.apredict(
+                    PromptTemplate(review_prompt),
+                    contract_content=event.part_text,
+                    schema=schema.model_json_schema(mode="serialization"),
+                    extra_requirements=self.rule_engine.prompt_hint if self.rule_engine else "",
+                )
 
-        issues_obj = IssueList.model_validate_json(issues)
-        result_issues: List[ResultIssue] = []
-        for issue in issues_obj.issues:
-            # add startPosition and endPosition to the issue
-            result_issues.append(
-                ResultIssue(
-                    **issue.model_dump(),
-                    part_start_id=event.part.start_id,
-                    part_end_id=event.part.end_id,
+            if self.compact_output:
+                issues_obj = self._expand_issues(CompactIssueList.model_validate_json(issues), event)
+            else:
+                issues_obj = IssueList.model_validate_json(issues)
+            for issue in issues_obj.issues:
+                # add startPosition and endPosition to the issue
+                result_issues.append(
+                    ResultIssue(
+                        **issue.model_dump(include=set(Issue.model_fields)),
+                        part_start_id=event.part.start_id,
+                        part_end_id=event.part.end_id,
+                        category=contract_part.category,
+                    )
                 )
-            )
+        if any(issue.severity == "high" for issue in result_issues):
+            elapsed = time.perf_counter() - await cxt.get("run_start")
+            first_high_issue: float | None = await cxt.get("first_high_issue", default=None)
+            if first_high_issue is None or elapsed < first_high_issue:
+                await cxt.set("first_high_issue", elapsed)
+        if cached is None:
+            if self.checkpoint and checkpoint_key:
+                self.checkpoint.save_issues(checkpoint_key, contract_part, result_issues)
+            if self.stats is not None:
+                self.stats.record(contract_part.category, mode, result_issues)
         issues_list = IssueList(issues=result_issues)  # type: ignore[arg-type]
         data = issues_list.model_dump()
         data["part_text"] = event.part_text
+        data["resumed"] = cached is not None
         cxt.write_event_to_stream(StreamEvent(name=self.name, msg="Reviewing", data=data))
         if self._verbose:
-            print("Reviewing issue: ", issues_obj.model_dump_json())
-        return IssueEvent(issue_list=issues_list)
+            print(f"Reviewing issue ({mode}): ", issues_list.model_dump_json())
+        return IssueEvent(issue_list=issues_list, category=contract_part.category)
+
+    @staticmethod
+    def _expand_issues(compact: CompactIssueList, event: ContractPartEvent) -> IssueList:
+        """Expand the compact issues of a part with the contents of the part."""
+        contents = {content.id: content.content for content in event.contents}
+        issues: List[Issue] = []
+        for issue in compact.issues:
+            if issue.id not in contents:
+                # id 超出当前部分时，按引用在部分内查找
+                quote = issue.quote.strip()
+                issue.id = next(
+                    (i for i, text in contents.items() if quote and quote in text), event.part.start_id
+                )
+            issues.append(issue.to_issue(contents.get(issue.id, "")))
+        return IssueList(issues=issues)  # type: ignore[arg-type]
 
     @step
-    async def summary_issues(self, cxt: Context, event: IssueEvent) -> StopEvent:
+    async def summary_issues(self, cxt: Context, event: IssueEvent) -> CategoryIssuesEvent | StopEvent:
         """Summary the issues."""
 
+        # 从第一个部分完成到所有部分完成的等待时间
+        collect_start: int = await cxt.get("collect_start", default=0)
+        if not collect_start:
+            collect_start = time.time_ns()
+            await cxt.set("collect_start", collect_start)
+
+        if self.summary and self.hierarchical_summary:
+            # 某个分类的所有部分审查完成后立即发送，分类总结与其余部分的审查并行
+            category = event.category or "其他"
+            category_parts: Dict[str, int] = await cxt.get("category_parts")
+            category_issues: Dict[str, List[ResultIssue]] = await cxt.get("category_issues", default={})
+            category_done: Dict[str, int] = await cxt.get("category_done", default={})
+            category_issues.setdefault(category, []).extend(event.issue_list.issues)  # type: ignore[arg-type]
+            category_done[category] = category_done.get(category, 0) + 1
+            await cxt.set("category_issues", category_issues)
+            await cxt.set("category_done", category_done)
+            if sum(category_done.values()) == await cxt.get("event_num"):
+                record_span("collect_events", collect_start, parts=sum(category_done.values()))
+                self._write_score(cxt, [issue for issues in category_issues.values() for issue in issues])
+            if category_done[category] == category_parts.get(category, 1):
+                # 按文档顺序排列，分类总结的提示词与部分完成的先后无关
+                ordered = sorted(category_issues[category], key=lambda x: (x.part_start_id, x.id))
+                return CategoryIssuesEvent(
+                    category=category,
+                    issue_list=IssueList(issues=ordered),  # type: ignore[arg-type]
+                )
+            return None  # type: ignore
+
         event_num = await cxt.get("event_num")
         results: List[IssueEvent] | None = cxt.collect_events(event, [IssueEvent] * event_num) # type: ignore
         # wait for all the contract parts to be reviewed
         if results is None:
             return None  # type: ignore
+        record_span("collect_events", collect_start, parts=event_num)
 
         issues: List[ResultIssue] = []
         for result in results:
             issues.extend(result.issue_list.issues) # type: ignore[arg-type]
+        # 部分按优先级审查，结果按文档顺序输出
+        issues.sort(key=lambda x: (x.part_start_id, x.id))
+        self._write_score(cxt, issues)
         issue_lst = IssueList(issues=issues) # type: ignore[arg-type]
         if self.summary:
-            summary = await self.llm.apredict(
-                self.summary_issues_prompt,
-                issues=issue_lst.model_dump_json(exclude={"issues.startPosition", "issues.endPosition", "issues.id"}),
-                schema=SummaryIssues.model_json_schema(),
-            )
+            with span("llm.summary", issues=len(issues)):
+                summary = await self.llm.apredict(
+                    self.summary_issues_prompt,
+                    issues=issue_lst.model_dump_json(
+                        exclude={"issues.startPosition", "issues.endPosition", "issues.id"}
+                    ),
+                    schema=SummaryIssues.model_json_schema(),
+                )
             summary_issues = SummaryIssues.model_validate_json(summary)
             if self._verbose:
                 print("Summary: ", summary_issues.summary)
@@ -234,9 +405,147 @@ class ReviewerAgent(Workflow):
                 StreamEvent(name=self.name, msg="Summary", data=summary_issues.model_dump_json(indent=4))
             )
             return StopEvent(
-                result=ContractAnalysis(
-                    issues=issues, summary=summary_issues.summary, riskLevel=summary_issues.riskLevel, score=summary_issues.score
-                )
+                result=self._analysis(issues, summary_issues, await cxt.get("parts"), await self._run_stats(cxt))
             )
         else:
-            return StopEvent(result=ContractAnalysis(issues=issues))
+            return StopEvent(
+                result=self._analysis(issues, parts=await cxt.get("parts"), stats=await self._run_stats(cxt))
+            )
+
+    @step(num_workers=4)
+    async def summarize_category(self, cxt: Context, event: CategoryIssuesEvent) -> CategorySummaryEvent:
+        """Summary the issues of one category."""
+
+        summary = await self._summarize_category(event.category, event.issue_list)
+        cxt.write_event_to_stream(
+            StreamEvent(name=self.name, msg="CategorySummary", data={"category": event.category, "summary": summary})
+        )
+        return CategorySummaryEvent(category=event.category, issue_list=event.issue_list, summary=summary)
+
+    @step
+    async def reduce_summary(self, cxt: Context, event: CategorySummaryEvent) -> StopEvent:
+        """Reduce the category summaries into the summary of the contract."""
+
+        category_parts: Dict[str, int] = await cxt.get("category_parts")
+        results: List[CategorySummaryEvent] | None = cxt.collect_events(
+            event, [CategorySummaryEvent] * len(category_parts)
+        )  # type: ignore
+        # wait for all the categories to be summarized
+        if results is None:
+            return None  # type: ignore
+        # 分类按在文档中首次出现的顺序排列，与分类总结完成的先后无关
+        order = {category: index for index, category in enumerate(category_parts)}
+        results = sorted(results, key=lambda result: order.get(result.category, len(order)))
+
+        issues: List[ResultIssue] = []
+        for result in results:
+            issues.extend(result.issue_list.issues)  # type: ignore[arg-type]
+        issues.sort(key=lambda x: (x.part_start_id, x.id))
+
+        summary_issues = await self._reduce_summaries(results)
+        if self._verbose:
+            print("Summary: ", summary_issues.summary)
+        cxt.write_event_to_stream(
+            StreamEvent(name=self.name, msg="Summary", data=summary_issues.model_dump_json(indent=4))
+        )
+        return StopEvent(
+            result=self._analysis(issues, summary_issues, await cxt.get("parts"), await self._run_stats(cxt))
+        )
+
+    async def asummarize(self, issues: List[ResultIssue]) -> SummaryIssues:
+        """
+        Summarize reviewed issues outside of the workflow, e.g. as a follow-up after a review without summary.
+
+        Args:
+            issues: The issues of the contract.
+
+        Returns:
+            SummaryIssues: The summary, with the local score and risk level if a scorer is configured.
+        """
+        categories: Dict[str, List[ResultIssue]] = {}
+        for issue in sorted(issues, key=lambda x: (x.part_start_id, x.id)):
+            categories.setdefault(issue.category or "其他", []).append(issue)
+        summaries = await asyncio.gather(
+            *[
+                self._summarize_category(category, IssueList(issues=category_issues))  # type: ignore[arg-type]
+                for category, category_issues in categories.items()
+            ]
+        )
+        results = [
+            CategorySummaryEvent(
+                category=category,
+                issue_list=IssueList(issues=category_issues),  # type: ignore[arg-type]
+                summary=summary,
+            )
+            for (category, category_issues), summary in zip(categories.items(), summaries)
+        ]
+        summary_issues = await self._reduce_summaries(results)
+        if self.scorer is not None:
+            summary_issues.score, summary_issues.riskLevel = self.scorer.score(issues)
+        return summary_issues
+
+    async def _summarize_category(self, category: str, issue_list: IssueList) -> str:
+        if not issue_list.issues:
+            return "未发现问题"
+        with span("llm.category_summary", category=category, issues=len(issue_list.issues)):
+            return await self.llm.apredict(
+                PromptTemplate(category_summary_prompt),
+                category=category,
+                issues=issue_list.model_dump_json(
+                    include={"issues": {"__all__": {"description", "severity", "recommendation"}}}
+                ),
+            )
+
+    async def _reduce_summaries(self, results: List[CategorySummaryEvent]) -> SummaryIssues:
+        category_summaries = []
+        for result in results:
+            counts = {"high": 0, "medium": 0, "low": 0}
+            for issue in result.issue_list.issues:
+                counts[issue.severity] += 1
+            category_summaries.append(
+                f"### {result.category}（高 {counts['high']}，中 {counts['medium']}，低 {counts['low']}）\n{result.summary}"
+            )
+        with span("llm.reduce_summary", categories=len(results)):
+            summary = await self.llm.apredict(
+                PromptTemplate(reduce_summary_prompt),
+                category_summaries="\n\n".join(category_summaries),
+                schema=SummaryIssues.model_json_schema(),
+            )
+        return SummaryIssues.model_validate_json(summary)
+
+    async def _run_stats(self, cxt: Context) -> RunStats:
+        parts: List[Part] = await cxt.get("parts")
+        first_high_issue: float | None = await cxt.get("first_high_issue", default=None)
+        stats = RunStats(
+            wall_seconds=round(time.perf_counter() - await cxt.get("run_start"), 3),
+            first_high_issue_seconds=round(first_high_issue, 3) if first_high_issue is not None else None,
+            parts=len(parts),
+            llm_parts=sum(self.policy.mode(part.category) in ("cheap", "full") for part in parts),
+        )
+        cxt.write_event_to_stream(StreamEvent(name=self.name, msg="Stats", data=stats.model_dump()))
+        return stats
+
+    def _write_score(self, cxt: Context, issues: List[ResultIssue]) -> None:
+        """Stream the local score as soon as all the parts are reviewed, before the LLM summary."""
+        if self.scorer is None:
+            return
+        score, risk_level = self.scorer.score(issues)
+        cxt.write_event_to_stream(StreamEvent(name=self.name, msg="Score", data={"score": score, "riskLevel": risk_level}))
+
+    def _analysis(
+        self,
+        issues: List[ResultIssue],
+        summary_issues: SummaryIssues | None = None,
+        parts: List[Part] | None = None,
+        stats: RunStats | None = None,
+    ) -> ContractAnalysis:
+        analysis = ContractAnalysis(issues=issues, parts=parts or [], stats=stats)
+        if summary_issues is not None:
+            analysis.summary = summary_issues.summary
+            analysis.riskLevel = summary_issues.riskLevel
+            analysis.score = summary_issues.score
+            analysis.llm_score = summary_issues.score
+        # 本地评分是确定性的，优先于 LLM 给出的评分
+        if self.scorer is not None:
+            analysis.score, analysis.riskLevel = self.scorer.score(issues)
+        return analysis
@@ -0,0 +1,291 @@
+import abc
+import datetime
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Iterable, Iterator, List
+
+from workflow.schema import ResultIssue
+from workflow.utils import Content
+
+# 大写金额数字
+CN_DIGITS = {
+    "零": 0,
+    "壹": 1,
+    "贰": 2,
+    "叁": 3,
+    "肆": 4,
+    "伍": 5,
+    "陆": 6,
+    "柒": 7,
+    "捌": 8,
+    "玖": 9,
+}
+CN_UNITS = {"拾": 10, "佰": 100, "仟": 1000}
+CN_SECTION_UNITS = {"万": 10**4, "亿": 10**8}
+
+UPPER_AMOUNT_PATTERN = re.compile(
+    r"[零壹贰叁肆伍陆柒捌玖拾][零壹贰叁肆伍陆柒捌玖拾佰仟万亿]*[元圆]"
+    r"(?:[零壹贰叁肆伍陆柒捌玖]角)?(?:[零壹贰叁肆伍陆柒捌玖]分)?整?"
+)
+LOWER_AMOUNT_PATTERN = re.compile(
+    r"[¥￥]\s*(?P<yen>\d[\d,，]*(?:\.\d+)?)\s*(?P<yen_wan>万)?"
+    r"|(?P<num>\d[\d,，]*(?:\.\d+)?)\s*(?P<num_wan>万)?元"
+)
+DATE_PATTERN = re.compile(r"(?P<year>\d{4})\s*年\s*(?P<month>\d{1,2})\s*月\s*(?P<day>\d{1,2})\s*日")
+
+# 金额后括号内注明的另一种写法，如 100元（大写：壹佰元整）、人民币壹佰元整（¥100.00）
+AMOUNT_PAIR_OPEN = re.compile(r"\s*元?\s*[（(]\s*(?:大写|小写)?\s*(?:金额)?\s*[:：]?\s*(?:人民币)?\s*[:：]?\s*")
+AMOUNT_PAIR_CLOSE = re.compile(r"\s*元?\s*[）)]")
+
+
+def parse_chinese_amount(text: str) -> Decimal | None:
+    """
+    Parse a Chinese uppercase amount (e.g. 壹拾万零伍佰元整) into a number.
+
+    Args:
+        text (str): The uppercase amount.
+
+    Returns:
+        Decimal | None: The parsed amount, or None if the text is not a valid uppercase amount.
+    """
+    total = Decimal(0)
+    section = Decimal(0)
+    number = Decimal(0)
+    fraction = Decimal(0)
+    integer_done = False
+    for char in text:
+        if char in CN_DIGITS:
+            number = Decimal(CN_DIGITS[char])
+        elif char in CN_UNITS:
+            section += (number or 1) * CN_UNITS[char]
+            number = Decimal(0)
+        elif char == "万":
+            total += (section + number) * CN_SECTION_UNITS[char]
+            section = number = Decimal(0)
+        elif char == "亿":
+            total = (total + section + number) * CN_SECTION_UNITS[char]
+            section = number = Decimal(0)
+        elif char in "元圆":
+            total += section + number
+            section = number = Decimal(0)
+            integer_done = True
+        elif char == "角":
+            fraction += number / 10
+            number = Decimal(0)
+        elif char == "分":
+            fraction += number / 100
+            number = Decimal(0)
+        elif char == "整":
+            continue
+        else:
+            return None
+    if not integer_done:
+        return None
+    return total + fraction
+
+
+def parse_number(text: str, wan: bool = False) -> Decimal | None:
+    """
+    Parse an arabic amount such as 100,000.00 into a number.
+
+    Args:
+        text (str): The amount text.
+        wan (bool): Whether the amount is followed by 万.
+
+    Returns:
+        Decimal | None: The parsed amount, or None if the text is not a number.
+    """
+    try:
+        value = Decimal(text.replace(",", "").replace("，", ""))
+    except InvalidOperation:
+        return None
+    return value * CN_SECTION_UNITS["万"] if wan else value
+
+
+class Rule(abc.ABC):
+    """A deterministic check that is run over the contents before the LLM review."""
+
+    name: str = ""
+    # 写入审查提示词中，告知模型该项已由程序检查
+    checked: str = ""
+
+    @abc.abstractmethod
+    def check(self, content: Content) -> Iterable[ResultIssue]:
+        """The issues found in a content."""
+
+    def content_hint(self, content: Content) -> str:
+        """A note added after the content in the review prompts, e.g. that this content has been checked."""
+        return ""
+
+
+class PlaceholderRule(Rule):
+    """Find unfilled placeholders such as ***, xxx, [公司名称], ____ and <|...|>."""
+
+    name = "placeholder"
+    checked = "未填写的信息或占位符（如***、xxx、[公司名称]、____等）"
+
+    pattern = re.compile(
+        r"(?P<star>[*＊]{2,})"
+        r"|(?P<x>(?<![A-Za-z])[xX×]{2,}(?![A-Za-z]))"
+        r"|(?P<bracket>[\[［][^\[\]［］\n\d]{2,20}[\]］])"
+        r"|(?P<blank>_{3,})"
+        r"|(?P<template><\|[^|<>\n]*\|>)"
+    )
+
+    def check(self, content: Content) -> Iterable[ResultIssue]:
+        matches = [match.group() for match in self.pattern.finditer(content.content)]
+        if not matches:
+            return []
+        placeholders = "、".join(dict.fromkeys(matches))
+        return [
+            ResultIssue(
+                id=content.id,
+                content=content.content,
+                description=f"存在未填写的信息或占位符：{placeholders}",
+                severity="medium",
+                recommendation="请补充完整的具体信息，签署前删除所有占位符。",
+                part_start_id=content.id,
+                part_end_id=content.id,
+            )
+        ]
+
+
+class AmountRule(Rule):
+    """
+    Check that uppercase (大写) and lowercase amounts written as a pair agree.
+
+    Only explicit pairs are compared: a lowercase amount followed by its uppercase amount in brackets
+    (100元（大写：壹佰元整）、¥100（人民币壹佰元整）) or the reverse. Amounts that merely appear
+    close to each other, such as a unit price next to a total, are left alone.
+    """
+
+    name = "amount"
+    checked = "金额后括号内注明的大小写金额是否一致"
+
+    @staticmethod
+    def pairs(text: str) -> Iterator[tuple[re.Match[str], re.Match[str]]]:
+        """The (uppercase, lowercase) amount pairs of a text."""
+        for lower in LOWER_AMOUNT_PATTERN.finditer(text):
+            opening = AMOUNT_PAIR_OPEN.match(text, lower.end())
+            if opening is None:
+                continue
+            upper = UPPER_AMOUNT_PATTERN.match(text, opening.end())
+            if upper is not None and AMOUNT_PAIR_CLOSE.match(text, upper.end()):
+                yield upper, lower
+        for upper in UPPER_AMOUNT_PATTERN.finditer(text):
+            opening = AMOUNT_PAIR_OPEN.match(text, upper.end())
+            if opening is None:
+                continue
+            paired = LOWER_AMOUNT_PATTERN.match(text, opening.end())
+            if paired is not None and AMOUNT_PAIR_CLOSE.match(text, paired.end()):
+                yield upper, paired
+
+    def check(self, content: Content) -> Iterable[ResultIssue]:
+        text = content.content
+        issues: List[ResultIssue] = []
+        for upper, lower in self.pairs(text):
+            upper_value = parse_chinese_amount(upper.group())
+            if lower.group("yen") is not None:
+                lower_value = parse_number(lower.group("yen"), wan=bool(lower.group("yen_wan")))
+            else:
+                lower_value = parse_number(lower.group("num"), wan=bool(lower.group("num_wan")))
+            if upper_value is None or lower_value is None or lower_value == upper_value:
+                continue
+            issues.append(
+                ResultIssue(
+                    id=content.id,
+                    content=text,
+                    description=f"大小写金额不一致：大写“{upper.group()}”为{upper_value}，小写“{lower.group()}”为{lower_value}",
+                    severity="high",
+                    recommendation="请核对金额，确保大写金额与小写金额一致。",
+                    part_start_id=content.id,
+                    part_end_id=content.id,
+                )
+            )
+        return issues
+
+
+class DateRule(Rule):
+    """Find dates that do not exist, e.g. 2024年2月30日."""
+
+    name = "date"
+    checked = "日期是否真实有效"
+
+    def check(self, content: Content) -> Iterable[ResultIssue]:
+        issues: List[ResultIssue] = []
+        for match in DATE_PATTERN.finditer(content.content):
+            try:
+                datetime.date(int(match.group("year")), int(match.group("month")), int(match.group("day")))
+            except ValueError:
+                issues.append(
+                    ResultIssue(
+                        id=content.id,
+                        content=content.content,
+                        description=f"日期“{match.group()}”不是有效日期",
+                        severity="medium",
+                        recommendation="请核对并修改为真实有效的日期。",
+                        part_start_id=content.id,
+                        part_end_id=content.id,
+                    )
+                )
+        return issues
+
+
+class RuleEngine:
+    """
+    Run deterministic rules over all contents in one pass.
+
+    The issues found here are emitted without calling the LLM, and the review prompts are told
+    to skip the corresponding checks via ``prompt_hint``, or via ``content_hint`` for the checks
+    that only apply to some contents.
+    """
+
+    def __init__(self, rules: List[Rule] | None = None) -> None:
+        if rules is None:
+            # table_check 依赖本模块中的 Rule 和金额解析
+            from workflow.table_check import TableRule
+
+            rules = [PlaceholderRule(), AmountRule(), DateRule(), TableRule()]
+        self.rules = rules
+
+    @property
+    def prompt_hint(self) -> str:
+        """The requirement line added to the review prompts."""
+        if not self.rules:
+            return ""
+        checked = "；".join(rule.checked for rule in self.rules if rule.checked)
+        return f"- 以下项目已由程序检查，不要输出此类问题：{checked}"
+
+    def content_hint(self, content: Content) -> str:
+        """The notes of the rules on a content, added after it in the review prompts."""
+        return "".join(rule.content_hint(content) for rule in self.rules)
+
+    def check(self, contents: List[Content]) -> List[ResultIssue]:
+        """
+        Check all contents.
+
+        Args:
+            contents (list[Content]): The contents of the contract.
+
+        Returns:
+            list[ResultIssue]: The issues found, part ids are set to the content id.
+        """
+        issues: List[ResultIssue] = []
+        for content in contents:
+            for rule in self.rules:
+                issues.extend(rule.check(content))
+        return issues
+
+    @staticmethod
+    def assign_part(
+        issues: List[ResultIssue], start_id: int, end_id: int, category: str | None = None
+    ) -> List[ResultIssue]:
+        """
+        Get the issues inside a part and set their part ids and category.
+        """
+        return [
+            issue.model_copy(update={"part_start_id": start_id, "part_end_id": end_id, "category": category})
+            for issue in issues
+            if start_id <= issue.id <= end_id
+        ]
+
@@ -0,0 +1,186 @@
+import html
+import posixpath
+import zipfile
+from typing import IO, Iterator, List
+
+from docx.document import Document as DocxDocument
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+from lxml import etree
+
+from workflow.utils import Content
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+W = f"{{{W_NS}}}"
+REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+OFFICE_DOCUMENT = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+
+W_P = f"{W}p"
+W_TBL = f"{W}tbl"
+W_TR = f"{W}tr"
+W_TC = f"{W}tc"
+W_R = f"{W}r"
+W_T = f"{W}t"
+W_HYPERLINK = f"{W}hyperlink"
+
+# document > body > p/tbl
+BODY_CHILD_DEPTH = 3
+
+
+def main_document_part(package: zipfile.ZipFile) -> str:
+    """
+    Get the zip member name of the main document part, usually word/document.xml.
+    """
+    try:
+        rels = etree.fromstring(package.read("_rels/.rels"))
+    except KeyError:
+        return "word/document.xml"
+    for rel in rels.iter(f"{{{REL_NS}}}Relationship"):
+        if rel.get("Type") == OFFICE_DOCUMENT:
+            return posixpath.normpath(rel.get("Target", "word/document.xml").lstrip("/"))
+    return "word/document.xml"
+
+
+def run_text(r: etree._Element) -> str:
+    text = []
+    for child in r:
+        tag = child.tag
+        if tag == W_T:
+            text.append(child.text or "")
+        elif tag == f"{W}tab":
+            text.append("\t")
+        elif tag in (f"{W}br", f"{W}cr"):
+            text.append("\n")
+    return "".join(text)
+
+
+def paragraph_text(p: etree._Element) -> str:
+    text = []
+    for child in p:
+        if child.tag == W_R:
+            text.append(run_text(child))
+        elif child.tag == W_HYPERLINK:
+            text.extend(run_text(r) for r in child.iterchildren(W_R))
+    return "".join(text)
+
+
+def table_html(tbl: etree._Element) -> str:
+    """
+    Render a w:tbl element as an html table.
+
+    Merged cells are resolved once per table from gridSpan and vMerge, instead of through
+    python-docx ``row.cells`` which re-resolves them for every row.
+    """
+    # 每一行的单元格: [colspan, rowspan, html]
+    rows: List[List[List]] = []
+    # 列索引 -> 纵向合并起始单元格
+    vmerge_origin: dict[int, List] = {}
+    for tr in tbl.iterchildren(W_TR):
+        row: List[List] = []
+        col = 0
+        for tc in tr.iterchildren(W_TC):
+            tc_pr = tc.find(f"{W}tcPr")
+            colspan = 1
+            vmerge = None
+            if tc_pr is not None:
+                grid_span = tc_pr.find(f"{W}gridSpan")
+                if grid_span is not None:
+                    colspan = int(grid_span.get(f"{W}val", 1))
+                v_merge = tc_pr.find(f"{W}vMerge")
+                if v_merge is not None:
+                    vmerge = v_merge.get(f"{W}val", "continue")
+
+            if vmerge == "continue" and col in vmerge_origin:
+                vmerge_origin[col][1] += 1
+            else:
+                cell_html = []
+                for child in tc:
+                    if child.tag == W_P:
+                        cell_html.append(f"<p>{html.escape(paragraph_text(child))}</p>")
+                    elif child.tag == W_TBL:
+                        cell_html.append(table_html(child))
+                cell = [colspan, 1, "".join(cell_html)]
+                row.append(cell)
+                if vmerge == "restart":
+                    vmerge_origin[col] = cell
+                else:
+                    vmerge_origin.pop(col, None)
+            col += colspan
+        rows.append(row)
+
+    lines = ["<table>"]
+    for row in rows:
+        lines.append("<tr>")
+        for colspan, rowspan, cell_html in row:
+            attrs = ""
+            if colspan > 1:
+                attrs += f' colspan="{colspan}"'
+            if rowspan > 1:
+                attrs += f' rowspan="{rowspan}"'
+            lines.append(f"<td{attrs}>{cell_html}</td>")
+        lines.append("</tr>")
+    lines.append("</table>")
+    return "\n".join(lines)
+
+
+def iter_contents(source: str | IO[bytes]) -> Iterator[Content]:
+    """
+    Stream the contents of a docx file with lxml iterparse over the main document part.
+
+    Contents are yielded as soon as their element is parsed and the parsed elements are freed,
+    so huge documents are scanned in bounded memory and consumers can start before parsing finishes.
+    The yielded contents have no python-docx objects attached, use ``bind_contents`` for that.
+
+    Args:
+        source: The path or file object of the docx file.
+
+    Yields:
+        Content: The paragraphs and tables of the body in document order.
+    """
+    with zipfile.ZipFile(source) as package:
+        with package.open(main_document_part(package)) as xml:
+            depth = 0
+            content_id = 0
+            for event, elem in etree.iterparse(xml, events=("start", "end")):
+                if event == "start":
+                    depth += 1
+                    continue
+                depth -= 1
+                if depth != BODY_CHILD_DEPTH - 1:
+                    continue
+                if elem.tag == W_P:
+                    yield Content(id=content_id, content_type="paragraph", content=paragraph_text(elem))
+                    content_id += 1
+                elif elem.tag == W_TBL:
+                    yield Content(id=content_id, content_type="table", content=table_html(elem))
+                    content_id += 1
+                # 释放已经处理过的元素
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+
+
+def bind_contents(contents: List[Content], document: DocxDocument) -> List[Content]:
+    """
+    Attach the python-docx paragraphs and tables of the document to contents from ``iter_contents``.
+
+    Args:
+        contents: The contents to bind, in document order.
+        document: The document the contents were scanned from.
+
+    Returns:
+        list[Content]: The same contents.
+    """
+    body = document.element.body
+    elements = (child for child in body.iterchildren() if child.tag in (W_P, W_TBL))
+    for content, element in zip(contents, elements):
+        if element.tag == W_P:
+            paragraph = Paragraph(element, document._body)
+            content.raw = paragraph
+            content.paragraphs = [paragraph]
+        else:
+            table = Table(element, document._body)
+            content.raw = table
+            # 每个段落只取一次，不经过 row.cells 的合并单元格解析
+            content.paragraphs = [Paragraph(p, table) for p in element.iter(W_P)]
+    return contents
@@ -0,0 +1,147 @@
+from typing import Dict, List, Literal
+
+from llama_index.core.bridge.pydantic import BaseModel, Field
+
+
+class Issue(BaseModel):
+    id: int = Field(
+        description="The content id of content, which corresponds to the Content x before each paragraph(e.g., 1, 2, etc.).",
+    )
+    content: str = Field(description="The original contract content corresponding to the issue.")
+    description: str = Field(description="Description of the issue")
+    severity: Literal["low", "medium", "high"] = Field(
+        description="Severity of the issue, which can only be one of low, medium, or high."
+    )
+    recommendation: str = Field(description="Recommendation of the issue")
+
+
+class ResultIssue(Issue):
+    part_start_id: int = Field(description="The start part id of the part.")
+    part_end_id: int = Field(description="The end part id of the part.")
+    category: str | None = Field(default=None, description="The category of the part.")
+
+
+class IssueList(BaseModel):
+    issues: List[Issue | ResultIssue] = Field(description="Issues of the contract")
+
+
+# 精简输出的问题代码，展开时作为描述的前缀
+ISSUE_CODES = {
+    "placeholder": "存在未填写的信息或占位符",
+    "ambiguous": "表述不明确或存在歧义",
+    "missing": "缺少必要的条款或要素",
+    "unfair": "权利义务失衡，对我方不利",
+    "illegal": "违反法律规定或可能无效",
+    "inconsistent": "前后内容不一致",
+    "other": "其他风险",
+}
+# 根据引用定位问题所在句子时的分句符号
+SENTENCE_STOPS = ("。", "；", ";", "！", "？", "\n")
+
+
+class CompactIssue(BaseModel):
+    id: int = Field(
+        description="The content id of content, which corresponds to the Content x before each paragraph(e.g., 1, 2, etc.).",
+    )
+    quote: str = Field(
+        default="",
+        description="A short quote (at most 15 characters) copied from the content that locates the issue. "
+        "Never copy the whole content.",
+    )
+    code: Literal["placeholder", "ambiguous", "missing", "unfair", "illegal", "inconsistent", "other"] = Field(
+        description="The type of the issue."
+    )
+    description: str = Field(description="One short sentence describing the issue")
+    severity: Literal["low", "medium", "high"] = Field(
+        description="Severity of the issue, which can only be one of low, medium, or high."
+    )
+    recommendation: str = Field(description="One short sentence of recommendation")
+
+    def to_issue(self, content: str) -> Issue:
+        """
+        Expand to an Issue, with the sentence of the content that contains the quote as the issue content.
+        """
+        return Issue(
+            id=self.id,
+            content=quote_sentence(content, self.quote),
+            description=f"{ISSUE_CODES[self.code]}：{self.description}",
+            severity=self.severity,
+            recommendation=self.recommendation,
+        )
+
+
+class CompactIssueList(BaseModel):
+    issues: List[CompactIssue] = Field(description="Issues of the contract")
+
+
+def quote_sentence(content: str, quote: str) -> str:
+    """The sentence of the content that contains the quote, or the whole content if the quote is not found."""
+    start = content.find(quote.strip()) if quote.strip() else -1
+    if start < 0:
+        return content
+    end = start + len(quote.strip())
+    left = max(content.rfind(stop, 0, start) for stop in SENTENCE_STOPS) + 1
+    rights = [i for i in (content.find(stop, end) for stop in SENTENCE_STOPS) if i >= 0]
+    right = min(rights) + 1 if rights else len(content)
+    return content[left:right].strip()
+
+
+class SummaryIssues(BaseModel):
+    summary: str = Field(default="", description="Summary of the issues")
+    riskLevel: str | None = Field(
+        default=None, description="Risk level of the issues. It can only be one of low, medium, or high."
+    )
+    score: int | None = Field(default=None, description="Score of the issues, 0-100")
+
+
+class Part(BaseModel):
+    title: str = Field(description="The title of the part")
+    start_id: int = Field(
+        description="The start content id of the part, which corresponds to the Content x before each paragraph(e.g., Content 1, Content 2, etc.)."
+    )
+    end_id: int = Field(
+        description="The end content id of the part, which corresponds to the Content x before each paragraph(e.g., Content 1, Content 2, etc.)."
+    )
+    category: str = Field(description="The category of the part")
+
+
+class ContractParts(BaseModel):
+    parts: List[Part] = Field(description="The parts of the contract")
+
+
+class RunStats(BaseModel):
+    wall_seconds: float = Field(description="Wall time of the review from the start of the workflow")
+    first_high_issue_seconds: float | None = Field(
+        default=None, description="Time until the first part review with a high severity issue finished"
+    )
+    parts: int = Field(default=0, description="Number of parts")
+    llm_parts: int = Field(default=0, description="Number of parts reviewed by the LLM")
+
+
+class ContractAnalysis(SummaryIssues):
+    issues: List[ResultIssue] = Field(description="Issues of the contract")
+    parts: List[Part] = Field(default_factory=list, description="The classified parts of the contract")
+    stats: RunStats | None = Field(default=None, description="Timings of the review run")
+    llm_score: int | None = Field(
+        default=None, description="The score given by the LLM summary, kept apart from the local score for calibration"
+    )
+
+
+class ConflictIssue(BaseModel):
+    conflict: int = Field(description="The number of the conflict, which corresponds to the 冲突 x before each conflict")
+    description: str = Field(description="Description of the inconsistency")
+    severity: Literal["low", "medium", "high"] = Field(
+        description="Severity of the issue, which can only be one of low, medium, or high."
+    )
+    recommendation: str = Field(description="Recommendation of the issue")
+
+
+class ConflictIssueList(BaseModel):
+    issues: List[ConflictIssue] = Field(description="The conflicts that are real inconsistencies")
+
+
+class BundleAnalysis(BaseModel):
+    documents: Dict[str, ContractAnalysis] = Field(description="The analysis of each document, by name")
+    master: str = Field(description="The name of the master agreement")
+    conflicts: int = Field(default=0, description="Number of conflicting facts found between the documents")
+    cross_issues: int = Field(default=0, description="Number of issues confirmed from the conflicts")
@@ -0,0 +1,109 @@
+import json
+import os
+import sys
+from typing import Dict, Iterable, List, Tuple
+
+from llama_index.core.bridge.pydantic import BaseModel, Field
+
+from config.const import RISK_SCORER_PATH
+from workflow.policy import HIGH_RISK_CATEGORIES
+from workflow.schema import ResultIssue
+
+
+class RiskScorer(BaseModel):
+    """
+    Deterministic risk score from the counts and severities of the issues.
+
+    score = base - scale * sum(severity weight * category weight), clipped to 1-100.
+    """
+
+    severity_weights: Dict[str, float] = Field(
+        default_factory=lambda: {"high": 12.0, "medium": 5.0, "low": 1.5}, description="Penalty of each severity"
+    )
+    category_weights: Dict[str, float] = Field(
+        default_factory=lambda: {category: 1.5 for category in HIGH_RISK_CATEGORIES},
+        description="Multiplier of the penalty of each category, 1.0 for unlisted categories",
+    )
+    base: float = Field(default=100.0, description="The score of a contract without issues")
+    scale: float = Field(default=1.0, description="Scale of the penalty, fitted by calibrate")
+    high_below: float = Field(default=60.0, description="Scores below this are high risk")
+    medium_below: float = Field(default=80.0, description="Scores below this are medium risk")
+
+    def penalty(self, issues: Iterable[ResultIssue]) -> float:
+        return sum(
+            self.severity_weights.get(issue.severity, 0.0) * self.category_weights.get(issue.category or "", 1.0)
+            for issue in issues
+        )
+
+    def score(self, issues: List[ResultIssue]) -> Tuple[int, str]:
+        """
+        Score the issues.
+
+        Args:
+            issues: The issues of the contract.
+
+        Returns:
+            tuple[int, str]: The score (1-100) and the risk level (low, medium or high).
+        """
+        score = round(min(100.0, max(1.0, self.base - self.scale * self.penalty(issues))))
+        if score < self.high_below:
+            risk_level = "high"
+        elif score < self.medium_below:
+            risk_level = "medium"
+        else:
+            risk_level = "low"
+        return score, risk_level
+
+    def calibrate(self, history: Iterable[Tuple[List[ResultIssue], int]]) -> "RiskScorer":
+        """
+        Fit scale against historical LLM scores with least squares.
+
+        Args:
+            history: Pairs of the issues of a contract and the score given by the LLM summary.
+
+        Returns:
+            RiskScorer: A new scorer with the fitted scale.
+        """
+        numerator = denominator = 0.0
+        for issues, llm_score in history:
+            penalty = self.penalty(issues)
+            numerator += penalty * (self.base - llm_score)
+            denominator += penalty * penalty
+        if denominator == 0:
+            return self.model_copy()
+        return self.model_copy(update={"scale": max(numerator / denominator, 0.0)})
+
+    def save(self, path: str = RISK_SCORER_PATH) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.model_dump_json(indent=2))
+
+    @classmethod
+    def load(cls, path: str = RISK_SCORER_PATH) -> "RiskScorer":
+        with open(path, encoding="utf-8") as f:
+            return cls.model_validate_json(f.read())
+
+    @classmethod
+    def default(cls) -> "RiskScorer":
+        """The calibrated scorer if one was saved, otherwise the default weights."""
+        if os.path.exists(RISK_SCORER_PATH):
+            return cls.load(RISK_SCORER_PATH)
+        return cls()
+
+
+if __name__ == "__main__":
+    # python -m workflow.scoring analyses.jsonl
+    # 每行一个包含 issues 和 llm_score 的 ContractAnalysis json，拟合后保存到 RISK_SCORER_PATH
+    # score 可能已被本地评分覆盖，只用 LLM 给出的 llm_score 拟合，没有 llm_score 的记录跳过
+    history = []
+    with open(sys.argv[1], encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            analysis = json.loads(line)
+            if analysis.get("llm_score") is None:
+                continue
+            history.append(([ResultIssue.model_validate(x) for x in analysis["issues"]], analysis["llm_score"]))
+    scorer = RiskScorer.default().calibrate(history)
+    scorer.save()
+    print(f"calibrated on {len(history)} contracts: scale={scorer.scale:.3f}")
@@ -0,0 +1,93 @@
+import datetime
+import json
+import os
+import sys
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from config.const import ISSUE_STATS_PATH
+from workflow.schema import ResultIssue
+
+
+class IssueStats:
+    """
+    Per-category issue statistics of past review runs.
+
+    Every reviewed part is appended as one json line, so that several workers can share the same file,
+    and the report is aggregated from the whole file.
+    """
+
+    def __init__(self, path: str = ISSUE_STATS_PATH) -> None:
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def record(self, category: str, mode: str, issues: List[ResultIssue]) -> None:
+        """
+        Record the issues of a reviewed part.
+
+        Args:
+            category: The category of the part.
+            mode: The review mode of the part.
+            issues: The issues found in the part.
+        """
+        severities = {"low": 0, "medium": 0, "high": 0}
+        for issue in issues:
+            severities[issue.severity] += 1
+        line = json.dumps(
+            {
+                "time": datetime.datetime.now().isoformat(timespec="seconds"),
+                "category": category,
+                "mode": mode,
+                "issues": len(issues),
+                **severities,
+            },
+            ensure_ascii=False,
+        )
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def report(self, since: datetime.datetime | None = None) -> List[Dict[str, Any]]:
+        """
+        Aggregate the statistics per category.
+
+        Args:
+            since: Only count the parts reviewed after this time.
+
+        Returns:
+            list[dict]: One row per category, sorted by the number of high severity issues per part.
+        """
+        rows: Dict[str, Dict[str, Any]] = defaultdict(
+            lambda: {"parts": 0, "issues": 0, "low": 0, "medium": 0, "high": 0, "modes": defaultdict(int)}
+        )
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if since is not None and datetime.datetime.fromisoformat(record["time"]) < since:
+                    continue
+                row = rows[record["category"]]
+                row["parts"] += 1
+                row["modes"][record["mode"]] += 1
+                for key in ("issues", "low", "medium", "high"):
+                    row[key] += record[key]
+
+        result = []
+        for category, row in rows.items():
+            row["modes"] = dict(row["modes"])
+            row["issues_per_part"] = round(row["issues"] / row["parts"], 3)
+            row["high_per_part"] = round(row["high"] / row["parts"], 3)
+            result.append({"category": category, **row})
+        return sorted(result, key=lambda x: (x["high_per_part"], x["issues_per_part"]), reverse=True)
+
+
+if __name__ == "__main__":
+    stats = IssueStats(sys.argv[1] if len(sys.argv) > 1 else ISSUE_STATS_PATH)
+    print(f"{'category':<12}{'parts':>8}{'issues':>8}{'high':>6}{'medium':>8}{'low':>6}{'high/part':>11}  modes")
+    for row in stats.report():
+        print(
+            f"{row['category']:<12}{row['parts']:>8}{row['issues']:>8}{row['high']:>6}{row['medium']:>8}"
+            f"{row['low']:>6}{row['high_per_part']:>11}  {row['modes']}"
+        )
@@ -0,0 +1,281 @@
+import functools
+import itertools
+import re
+from typing import Iterable, List
+
+import numpy as np
+from lxml import html as lxml_html
+
+from workflow.rules import UPPER_AMOUNT_PATTERN, Rule, parse_chinese_amount
+from workflow.schema import ResultIssue
+from workflow.utils import Content
+
+# 表头关键字 -> 列
+QUANTITY_HEADERS = ("数量",)
+PRICE_HEADERS = ("单价",)
+TOTAL_HEADERS = ("金额", "总价", "小计", "总额")
+# 合计行的关键字
+GRAND_TOTAL_WORDS = ("合计", "总计", "总价", "共计")
+# 表头中的数量级单位，如“金额（万元）”，按从大到小匹配
+HEADER_SCALES = (("亿", 10**8), ("万", 10**4), ("千元", 10**3), ("百元", 10**2))
+# 表头中的外币，单价与金额的币种不同时不做核对
+CURRENCIES = ("美元", "欧元", "港元", "日元", "英镑", "USD", "EUR", "HKD", "JPY", "GBP")
+# 在前几行中查找表头
+HEADER_ROWS = 3
+# 金额精确到分，四舍五入后允许的误差
+TOLERANCE = 0.01
+# 每个问题中最多列出的行数
+MAX_LISTED_ROWS = 5
+
+# 紧跟在数字后的万是数字的单位
+NUMBER_PATTERN = re.compile(r"(-?\d[\d,，]*(?:\.\d+)?)\s*(万)?")
+
+
+def table_grid(content: str) -> List[List[str]]:
+    """
+    Parse the html of a table content into a grid of cell texts, with merged cells repeated.
+    """
+    root = lxml_html.fragment_fromstring(content, create_parent="div")
+    table = root.find(".//table")
+    if table is None:
+        return []
+    grid: List[List[str]] = []
+    # 列索引 -> (剩余行数, 文本)
+    spans: dict[int, tuple[int, str]] = {}
+    for tr in table.iter("tr"):
+        # 嵌套表格的行属于外层单元格
+        if next(tr.iterancestors("table")) is not table:
+            continue
+        row: List[str] = []
+        cells = iter(tr.findall("td") + tr.findall("th"))
+        col = 0
+        while True:
+            if col in spans:
+                left, text = spans[col]
+                row.append(text)
+                if left > 1:
+                    spans[col] = (left - 1, text)
+                else:
+                    del spans[col]
+                col += 1
+                continue
+            cell = next(cells, None)
+            if cell is None:
+                break
+            text = " ".join(cell.text_content().split())
+            colspan = int(cell.get("colspan", 1) or 1)
+            rowspan = int(cell.get("rowspan", 1) or 1)
+            for _ in range(colspan):
+                if rowspan > 1:
+                    spans[col] = (rowspan - 1, text)
+                row.append(text)
+                col += 1
+        grid.append(row)
+    return grid
+
+
+def parse_cell(text: str, scale: float = 1) -> float:
+    """
+    The number of a cell such as ¥1,200.00, 10台 or 1.5万元, NaN if there is none or more than one.
+    Numbers not followed by 万 are multiplied by scale, the unit of the column header. Uppercase amounts
+    such as 壹万贰仟元整 next to the number are ignored.
+    """
+    numbers = NUMBER_PATTERN.findall(UPPER_AMOUNT_PATTERN.sub(" ", text))
+    if len(numbers) != 1:
+        return np.nan
+    number, wan = numbers[0]
+    value = float(number.replace(",", "").replace("，", ""))
+    return value * 10**4 if wan else value * scale
+
+
+def header_scale(text: str) -> int:
+    """The magnitude of the unit in a header cell, e.g. 10000 for 金额（万元）."""
+    return next((scale for unit, scale in HEADER_SCALES if unit in text), 1)
+
+
+def header_currency(text: str) -> str | None:
+    return next((currency for currency in CURRENCIES if currency in text), None)
+
+
+def row_text(row: List[str]) -> str:
+    """The text of a row, with the repeated texts of merged cells shown once."""
+    return " | ".join(text for text, _ in itertools.groupby(row))
+
+
+def find_column(header: List[str], keywords: Iterable[str], exclude: int | None = None) -> int | None:
+    for i, text in enumerate(header):
+        if i != exclude and any(keyword in text for keyword in keywords):
+            return i
+    return None
+
+
+class PriceTable:
+    """The line and grand total rows of a price table, with the parsed quantities, prices and amounts."""
+
+    def __init__(
+        self,
+        columns: tuple[int, int, int],
+        line_rows: List[List[str]],
+        grand_rows: List[List[str]],
+        scales: tuple[int, int, int],
+    ) -> None:
+        """
+        Args:
+            columns: The quantity, unit price and amount columns.
+            line_rows: The rows of the items.
+            grand_rows: The grand total rows.
+            scales: The unit magnitudes of the quantity, unit price and amount headers.
+        """
+        quantity_col, price_col, total_col = columns
+        quantity_scale, price_scale, self.total_scale = scales
+        self.columns = columns
+        self.line_rows = line_rows
+        self.grand_rows = grand_rows
+        self.quantities = np.array([parse_cell(row[quantity_col], quantity_scale) for row in line_rows])
+        self.prices = np.array([parse_cell(row[price_col], price_scale) for row in line_rows])
+        self.totals = np.array([parse_cell(row[total_col], self.total_scale) for row in line_rows])
+        self.parsed = ~(np.isnan(self.quantities) | np.isnan(self.prices) | np.isnan(self.totals))
+
+
+@functools.lru_cache(maxsize=256)
+def price_table(content: str) -> PriceTable | None:
+    """
+    Find the quantity, unit price and amount columns of a table content from its header and parse its rows.
+
+    Returns None if the table is ambiguous: no such header, different currencies in the unit price and
+    amount headers, or rows that do not parse. Cached, the rule engine and the review prompts both ask.
+    """
+    grid = table_grid(content)
+    header_index = None
+    columns = None
+    for i, row in enumerate(grid[:HEADER_ROWS]):
+        quantity = find_column(row, QUANTITY_HEADERS)
+        price = find_column(row, PRICE_HEADERS)
+        # “单价”与“金额”可能在同一表头中（如“单价金额”），金额列不能与单价列相同
+        total = find_column(row, TOTAL_HEADERS, exclude=price)
+        if quantity is not None and price is not None and total is not None:
+            header_index, columns = i, (quantity, price, total)
+            break
+    if header_index is None or columns is None:
+        return None
+
+    header = grid[header_index]
+    quantity_col, price_col, total_col = columns
+    if header_currency(header[price_col]) != header_currency(header[total_col]):
+        return None
+    width = max(columns) + 1
+    line_rows: List[List[str]] = []
+    grand_rows: List[List[str]] = []
+    for row in grid[header_index + 1 :]:
+        if len(row) < width or not any(row):
+            continue
+        label = "".join(text for i, text in enumerate(row) if i not in (price_col, total_col))
+        if any(word in label for word in GRAND_TOTAL_WORDS):
+            grand_rows.append(row)
+        else:
+            line_rows.append(row)
+    if not line_rows:
+        return None
+
+    scales = (header_scale(header[quantity_col]), header_scale(header[price_col]), header_scale(header[total_col]))
+    table = PriceTable(columns, line_rows, grand_rows, scales)
+    # 空行以外有无法解析的行时视为不明确的表格
+    filled = np.array([bool(row[quantity_col] or row[price_col] or row[total_col]) for row in line_rows])
+    if not table.parsed.any() or (filled & ~table.parsed).any():
+        return None
+    return table
+
+
+class TableRule(Rule):
+    """
+    Check the arithmetic of price tables: quantity × unit price = amount for every row, the grand total
+    against the sum of the amounts, and uppercase (大写) totals against the grand total.
+
+    The quantity, unit price and amount columns are found from the header, with the 万元 units of the
+    header applied; the rows are parsed into arrays and checked at once with numpy. Tables without such
+    a header, or whose rows do not parse, are ambiguous and left to the LLM review, only the tables
+    actually checked are marked in the review prompts.
+    """
+
+    name = "table"
+    hint = "（程序已核对此表格的数量×单价与金额、合计金额及大写合计，不要输出此类问题）"
+
+    def content_hint(self, content: Content) -> str:
+        return self.hint if self._table(content) is not None else ""
+
+    @staticmethod
+    def _table(content: Content) -> PriceTable | None:
+        if content.content_type != "table" or "<table" not in content.content:
+            return None
+        return price_table(content.content)
+
+    def check(self, content: Content) -> Iterable[ResultIssue]:
+        table = self._table(content)
+        if table is None:
+            return []
+        line_rows, grand_rows = table.line_rows, table.grand_rows
+        quantities, prices, totals, parsed = table.quantities, table.prices, table.totals, table.parsed
+        total_col = table.columns[2]
+
+        issues: List[ResultIssue] = []
+        expected = np.round(quantities * prices, 2)
+        wrong = parsed & (np.abs(expected - totals) > TOLERANCE + 1e-9)
+        if wrong.any():
+            rows = np.flatnonzero(wrong)
+            details = "；".join(
+                f"“{row_text(line_rows[i])}”中 {quantities[i]:g} × {prices[i]:g} = {expected[i]:.2f}，"
+                f"金额为 {totals[i]:.2f}"
+                for i in rows[:MAX_LISTED_ROWS]
+            )
+            more = f"等 {len(rows)} 行" if len(rows) > MAX_LISTED_ROWS else ""
+            issues.append(
+                self._issue(
+                    content,
+                    [line_rows[i] for i in rows],
+                    f"表格中数量×单价与金额不一致{more}：{details}",
+                    "请核对数量、单价和金额，确保每行金额等于数量乘以单价。",
+                )
+            )
+
+        line_sum = round(float(totals[parsed].sum()), 2)
+        # 大写合计与表中写明的合计金额比较，没有写明时与各行金额之和比较
+        stated_total = line_sum
+        for row in grand_rows:
+            grand_total = parse_cell(row[total_col], table.total_scale)
+            if np.isnan(grand_total):
+                continue
+            stated_total = grand_total
+            if abs(grand_total - line_sum) > TOLERANCE + 1e-9:
+                issues.append(
+                    self._issue(
+                        content,
+                        [row],
+                        f"表格合计金额为 {grand_total:.2f}，各行金额之和为 {line_sum:.2f}",
+                        "请核对合计金额，确保合计等于各行金额之和。",
+                    )
+                )
+        for row in grand_rows:
+            for upper in dict.fromkeys(m.group() for m in UPPER_AMOUNT_PATTERN.finditer(row_text(row))):
+                upper_value = parse_chinese_amount(upper)
+                if upper_value is not None and abs(float(upper_value) - stated_total) > TOLERANCE + 1e-9:
+                    issues.append(
+                        self._issue(
+                            content,
+                            [row],
+                            f"表格大写合计“{upper}”为 {upper_value}，合计金额为 {stated_total:.2f}",
+                            "请核对大写金额，确保与合计金额一致。",
+                        )
+                    )
+        return issues
+
+    @staticmethod
+    def _issue(content: Content, rows: List[List[str]], description: str, recommendation: str) -> ResultIssue:
+        return ResultIssue(
+            id=content.id,
+            content="\n".join(row_text(row) for row in rows[:MAX_LISTED_ROWS]),
+            description=description,
+            severity="high",
+            recommendation=recommendation,
+            part_start_id=content.id,
+            part_end_id=content.id,
+        )
@@ -0,0 +1,340 @@
+"""
+Opt-in span tracing and profiling of reviews.
+
+Spans follow the OpenTelemetry data model (trace id, span id, parent, start/end in ns, attributes) and are
+nested through a contextvar, so the spans of workflow steps and parts nest under the review that started them.
+A trace is exported when its root span ends:
+
+- TRACE_EXPORTER=otlp: OTLP/JSON file per trace, importable by OpenTelemetry collectors and Jaeger.
+- TRACE_EXPORTER=chrome: Chrome trace event file per trace, a flame chart in chrome://tracing or Perfetto.
+- TRACE_EXPORTER=console: an indented span tree in the log.
+
+TRACE_PROFILER=cprofile|pyinstrument additionally profiles each review (``profile``), writing a .prof file
+(snakeviz, flameprof) or a pyinstrument html flame graph. Tracing is disabled when TRACE_EXPORTER is unset,
+and ``span`` then costs a single contextvar lookup.
+"""
+import asyncio
+import collections
+import contextlib
+import contextvars
+import functools
+import importlib.util
+import inspect
+import json
+import os
+import secrets
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, TypeVar
+
+from loguru import logger
+
+from config.const import TRACE_DIR
+
+TRACE_EXPORTER = os.environ.get("TRACE_EXPORTER", "")
+TRACE_PROFILER = os.environ.get("TRACE_PROFILER", "")
+SERVICE_NAME = "contractgen"
+# 记住最近导出的 trace，丢弃根 span 结束后才结束的子 span
+MAX_EXPORTED_TRACES = 1024
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error", "track")
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start_ns: int
+    end_ns: int
+    attributes: Dict[str, Any]
+    error: str | None
+    track: int
+
+    def __init__(self, name: str, parent: "Span | None", attributes: Dict[str, Any]) -> None:
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.error = None
+        # 同一个 asyncio task（或线程）中的 span 严格嵌套
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        self.track = id(task) if task is not None else threading.get_ident()
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+
+class Exporter:
+    def export(self, spans: List[Span]) -> None:
+        raise NotImplementedError
+
+
+def _attribute_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPJsonExporter(Exporter):
+    """Write each trace as an OTLP/JSON ExportTraceServiceRequest file."""
+
+    def __init__(self, directory: str = TRACE_DIR) -> None:
+        self.directory = directory
+
+    def export(self, spans: List[Span]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        otlp_spans = []
+        for span in spans:
+            otlp_span = {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": [{"key": k, "value": _attribute_value(v)} for k, v in span.attributes.items()],
+                "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = span.parent_id
+            otlp_spans.append(otlp_span)
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+                    "scopeSpans": [{"scope": {"name": __name__}, "spans": otlp_spans}],
+                }
+            ]
+        }
+        path = os.path.join(self.directory, f"{spans[0].trace_id}.otlp.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(request, f, ensure_ascii=False)
+        logger.info(f"Trace written: {path}")
+
+
+class ChromeTraceExporter(Exporter):
+    """Write each trace as a Chrome trace event file, one track per asyncio task or thread."""
+
+    def __init__(self, directory: str = TRACE_DIR) -> None:
+        self.directory = directory
+
+    def export(self, spans: List[Span]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        start = min(span.start_ns for span in spans)
+        tracks: Dict[int, int] = {}
+        events = []
+        for span in sorted(spans, key=lambda s: s.start_ns):
+            track = tracks.setdefault(span.track, len(tracks))
+            events.append(
+                {
+                    "name": span.name,
+                    "ph": "X",
+                    "ts": (span.start_ns - start) / 1000,
+                    "dur": (span.end_ns - span.start_ns) / 1000,
+                    "pid": 1,
+                    "tid": track,
+                    "args": {**span.attributes, **({"error": span.error} if span.error else {})},
+                }
+            )
+        path = os.path.join(self.directory, f"{spans[0].trace_id}.trace.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+        logger.info(f"Trace written: {path}")
+
+
+class ConsoleExporter(Exporter):
+    """Log the span tree of each trace with durations."""
+
+    def export(self, spans: List[Span]) -> None:
+        children: Dict[str | None, List[Span]] = {}
+        for span in sorted(spans, key=lambda s: s.start_ns):
+            children.setdefault(span.parent_id, []).append(span)
+        lines = []
+
+        def walk(parent_id: str | None, depth: int) -> None:
+            for span in children.get(parent_id, []):
+                ms = (span.end_ns - span.start_ns) / 1e6
+                attrs = " ".join(f"{k}={v}" for k, v in span.attributes.items())
+                lines.append(f"{'  ' * depth}{span.name} {ms:.1f}ms {attrs}{' ERROR' if span.error else ''}")
+                walk(span.span_id, depth + 1)
+
+        walk(None, 0)
+        logger.info("Trace:\n" + "\n".join(lines))
+
+
+EXPORTERS: Dict[str, Callable[[], Exporter]] = {
+    "otlp": OTLPJsonExporter,
+    "chrome": ChromeTraceExporter,
+    "console": ConsoleExporter,
+}
+
+_exporter: Exporter | None = EXPORTERS[TRACE_EXPORTER]() if TRACE_EXPORTER in EXPORTERS else None
+_current: contextvars.ContextVar[Span | None] = contextvars.ContextVar("current_span", default=None)
+_lock = threading.Lock()
+_traces: Dict[str, List[Span]] = {}
+_exported: collections.OrderedDict[str, None] = collections.OrderedDict()
+# 一个进程同时只能有一个 profiler (Python 3.12 起 sys.monitoring 的限制)
+_profile_lock = threading.Lock()
+
+
+def set_exporter(exporter: Exporter | str | None) -> None:
+    """Enable tracing with an exporter (or its name), None to disable."""
+    global _exporter
+    _exporter = EXPORTERS[exporter]() if isinstance(exporter, str) else exporter
+
+
+def enabled() -> bool:
+    return _exporter is not None
+
+
+def current_span() -> Span | None:
+    return _current.get()
+
+
+def _finish(span: Span) -> None:
+    with _lock:
+        if span.trace_id in _exported:
+            # 根 span 已结束并导出（例如未等待的后台任务），不再保留
+            return
+        spans = _traces.setdefault(span.trace_id, [])
+        spans.append(span)
+        if span.parent_id is not None:
+            return
+        del _traces[span.trace_id]
+        _exported[span.trace_id] = None
+        if len(_exported) > MAX_EXPORTED_TRACES:
+            _exported.popitem(last=False)
+    if _exporter is not None:
+        try:
+            _exporter.export(spans)
+        except Exception as e:
+            logger.warning(f"Failed to export trace {span.trace_id}: {e!r}")
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | None]:
+    """
+    Time a block as a span, nested under the current span. Yields None when tracing is disabled.
+    """
+    if _exporter is None:
+        yield None
+        return
+    s = Span(name, _current.get(), attributes)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.error = repr(e)
+        raise
+    finally:
+        _current.reset(token)
+        s.end_ns = time.time_ns()
+        _finish(s)
+
+
+def record_span(name: str, start_ns: int, end_ns: int | None = None, **attributes: Any) -> None:
+    """
+    Record a span whose start was observed earlier, e.g. the time spent waiting for events to be collected.
+    """
+    if _exporter is None:
+        return
+    s = Span(name, _current.get(), attributes)
+    s.start_ns = start_ns
+    s.end_ns = end_ns or time.time_ns()
+    _finish(s)
+
+
+def traced(name: str | None = None) -> Callable[[F], F]:
+    """Decorate a function or coroutine function to run in a span."""
+
+    def decorator(func: F) -> F:
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+@contextlib.contextmanager
+def profile(name: str, profiler: str = TRACE_PROFILER) -> Iterator[None]:
+    """
+    Profile a block with cProfile or pyinstrument and write the result to the trace directory.
+
+    Args:
+        name: The file name of the profile, e.g. the review id.
+        profiler: cprofile, pyinstrument, or empty to disable.
+
+    Only one block is profiled at a time per process; a block started while another is being profiled runs
+    unprofiled.
+    """
+    if not profiler:
+        yield
+        return
+    if not _profile_lock.acquire(blocking=False):
+        logger.warning(f"Another profile is active, not profiling {name}")
+        yield
+        return
+    try:
+        with _profiler(name, profiler):
+            yield
+    finally:
+        _profile_lock.release()
+
+
+@contextlib.contextmanager
+def _profiler(name: str, profiler: str) -> Iterator[None]:
+    os.makedirs(TRACE_DIR, exist_ok=True)
+    if profiler == "pyinstrument" and importlib.util.find_spec("pyinstrument") is not None:
+        from pyinstrument import Profiler
+
+        # async_mode 让 await 的等待时间计入发起等待的协程
+        p = Profiler(async_mode="enabled")
+        p.start()
+        try:
+            yield
+        finally:
+            p.stop()
+            path = os.path.join(TRACE_DIR, f"{name}.html")
+            p.write_html(path)
+            logger.info(f"Profile written: {path}")
+        return
+    import cProfile
+
+    if profiler != "cprofile":
+        logger.warning(f"Profiler {profiler} is not available, using cProfile")
+    p = cProfile.Profile()
+    p.enable()
+    try:
+        yield
+    finally:
+        p.disable()
+        path = os.path.join(TRACE_DIR, f"{name}.prof")
+        p.dump_stats(path)
+        logger.info(f"Profile written: {path}")
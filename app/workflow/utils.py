@@ -1,12 +1,93 @@
-import mammoth
-from bs4 import BeautifulSoup
+import contextlib
+import io
+from typing import IO, Iterator
+
 from docx import Document
 from docx.document import Document as DocxDocument
-from docx.oxml import parse_xml
+from docx.oxml.ns import qn
 from docx.table import Table, _Cell, _Row
 from docx.text.paragraph import Paragraph
 from docx.text.run import Run
 from llama_index.core.bridge.pydantic import BaseModel, ConfigDict, Field
+from lxml import etree
+
+from workflow.tracing import span
+
+W_P = qn("w:p")
+W_R = qn("w:r")
+W_T = qn("w:t")
+W_RPR = qn("w:rPr")
+PROOF_ERR = qn("w:proofErr")
+XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+# 解包后直接放回段落的容器，其中的 run 是字段结果或链接文本
+RUN_CONTAINERS = (qn("w:fldSimple"), qn("w:hyperlink"), qn("w:smartTag"))
+# 容器自身的属性，不能出现在段落中，解包时丢弃
+CONTAINER_PROPERTIES = (qn("w:fldData"), qn("w:smartTagPr"))
+
+# 文档的路径、内容或二进制文件对象
+DocumentSource = str | bytes | bytearray | memoryview | IO[bytes]
+
+
+def _text_run_format(r: etree._Element) -> bytes | None:
+    """
+    The serialized rPr of a run that holds only text, or None if the run holds anything else (tabs, breaks, ...).
+    """
+    rpr = None
+    for child in r:
+        if child.tag == W_RPR:
+            rpr = child
+        elif child.tag != W_T:
+            return None
+    return b"" if rpr is None else etree.tostring(rpr)
+
+
+def normalize_runs(element: etree._Element) -> None:
+    """
+    Normalize the runs of every paragraph under the element in a single pass, in place.
+
+    Field, hyperlink and smart tag containers are unwrapped so that their runs become runs of the paragraph
+    (their w:fldData and w:smartTagPr are dropped), and adjacent runs holding only text with identical
+    formatting are merged into one run with one w:t.
+
+    Args:
+        element: The lxml element, e.g. ``document.element.body`` or a paragraph element.
+    """
+    paragraphs = [element] if element.tag == W_P else element.iter(W_P)
+    for p in paragraphs:
+        containers = [child for child in p if child.tag in RUN_CONTAINERS]
+        while containers:
+            for container in containers:
+                for child in list(container):
+                    if child.tag not in CONTAINER_PROPERTIES:
+                        container.addprevious(child)
+                p.remove(container)
+            # 容器可能嵌套，例如字段中的超链接
+            containers = [child for child in p if child.tag in RUN_CONTAINERS]
+
+        prev_r = None
+        prev_format = None
+        for child in list(p):
+            if child.tag == PROOF_ERR:
+                # 拼写检查标记会把同格式的文本拆成多个 run
+                p.remove(child)
+                continue
+            fmt = _text_run_format(child) if child.tag == W_R else None
+            if fmt is None:
+                prev_r = prev_format = None
+                continue
+            if prev_r is not None and fmt == prev_format:
+                texts = [t.text or "" for t in prev_r.iterchildren(W_T)]
+                texts.extend(t.text or "" for t in child.iterchildren(W_T))
+                for t in list(prev_r.iterchildren(W_T)):
+                    prev_r.remove(t)
+                t = etree.SubElement(prev_r, W_T)
+                t.text = "".join(texts)
+                if t.text != t.text.strip():
+                    t.set(XML_SPACE, "preserve")
+                p.remove(child)
+            else:
+                prev_r, prev_format = child, fmt
 
 
 def runs_merge(paragraph: Paragraph) -> Run | None:
@@ -21,7 +102,9 @@ def runs_merge(paragraph: Paragraph) -> Run | None:
     """
     runs = paragraph.runs
     if len(runs) == 0:
-        runs = list(Run(r, paragraph) for r in parse_xml(paragraph._element.xml.replace("fld", "r")).r_lst)
+        # 文本在字段或链接中，解包后再合并
+        normalize_runs(paragraph._p)
+        runs = paragraph.runs
     if len(runs) == 1:
         return runs[0]
     if len(runs) == 0:
@@ -53,19 +136,42 @@ def count_placeholders(text: str) -> int:
     return count
 
 
-def get_html_tables(word_path: str) -> list[str]:
+@contextlib.contextmanager
+def open_document(source: DocumentSource) -> Iterator[IO[bytes]]:
+    """
+    Open a document source as a binary file object positioned at the start.
+
+    Paths are opened and closed on exit, bytes are wrapped without touching the disk,
+    and file objects are rewound and left open.
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            yield f
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        yield io.BytesIO(source)
+    else:
+        source.seek(0)
+        yield source
+
+
+def get_html_tables(word_path: DocumentSource) -> list[str]:
     """
     Get the html tables from a word file.
 
     Args:
-        word_path (str): The path to the word file.
+        word_path (str | bytes | IO[bytes]): The path, content or file object of the word file.
 
     Returns:
         list[str]: The html tables.
     """
-    assert word_path.endswith(".docx"), "word_path must be a .docx file"
+    # mammoth 和 bs4 只在解析表格时需要
+    import mammoth
+    from bs4 import BeautifulSoup
+
+    if isinstance(word_path, str):
+        assert word_path.endswith(".docx"), "word_path must be a .docx file"
 
-    with open(word_path, "rb") as docx_file:
+    with open_document(word_path) as docx_file, span("mammoth.convert_to_html"):
         result = mammoth.convert_to_html(docx_file)
     html_content = result.value
 
@@ -84,7 +190,7 @@ class Content(BaseModel):
     content_type: str
     content: str
     paragraphs: list[Paragraph] = Field(default_factory=list, exclude=True)
-    raw: Paragraph | Table = Field(exclude=True)
+    raw: Paragraph | Table | None = Field(default=None, exclude=True)
 
 
 # def parse_table(table: Table) -> tuple[str, list[Paragraph]]:
@@ -94,11 +200,42 @@ class Content(BaseModel):
 #     return "", []
 
 
-def get_contents(document_path: str) -> tuple[list[Content], DocxDocument]:
+def get_contents(document_path: DocumentSource, streaming: bool = False) -> tuple[list[Content], DocxDocument]:
     """
     Get the contents of a document.
+
+    Args:
+        document_path (str | bytes | IO[bytes]): The path to the document, or its content or file object
+            for uploads that should not touch the disk.
+        streaming (bool): Scan the body with lxml iterparse instead of python-docx and mammoth,
+            which is much faster for huge documents. Tables are rendered as simple html tables.
+
+    Returns:
+        tuple[list[Content], DocxDocument]: The contents and the document.
     """
-    document = Document(document_path)
+    with span("get_contents", streaming=streaming) as s:
+        contents, document = _get_contents(document_path, streaming)
+        if s is not None:
+            s.set(contents=len(contents))
+    return contents, document
+
+
+def _get_contents(document_path: DocumentSource, streaming: bool) -> tuple[list[Content], DocxDocument]:
+    if not isinstance(document_path, str):
+        # 文件对象需要被读取多次（python-docx、mammoth 或扫描器），读入内存后每次使用新的 BytesIO
+        if not isinstance(document_path, (bytes, bytearray, memoryview)):
+            with open_document(document_path) as f:
+                document_path = f.read()
+        document_path = bytes(document_path)
+
+    with open_document(document_path) as f:
+        document = Document(f)
+    if streaming:
+        from workflow.scanner import bind_contents, iter_contents
+
+        with open_document(document_path) as f:
+            return bind_contents(list(iter_contents(f)), document), document
+
     tables = get_html_tables(document_path)
 
     content_id = 0
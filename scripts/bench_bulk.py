@@ -0,0 +1,80 @@
+"""
+Benchmark bulk contract generation: documents/sec for a synthetic template and records,
+written to a directory and to a ZIP archive with different numbers of workers.
+
+Usage:
+    python scripts/bench_bulk.py --records 2000 --workers 1 4 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from docx import Document  # noqa: E402
+
+from generator.bulk import generate  # noqa: E402
+
+FIELDS = ["deal_id", "party_a", "party_b", "amount", "amount_upper", "sign_date", "address", "contact"]
+
+
+def make_template(path: str, clauses: int) -> None:
+    """A contract with the fields spread over the body, a parties table and a line-item placeholder."""
+    doc = Document()
+    doc.add_heading("销售合同 <|deal_id|>", 0)
+    doc.add_paragraph("甲方：<|party_a|>")
+    doc.add_paragraph("乙方：<|party_b|>")
+    for i in range(clauses):
+        doc.add_paragraph(f"第{i + 1}条 双方约定的条款内容，本条不包含占位符。" * 3)
+        if i % 10 == 0:
+            # 占位符被拆分到多个 run 中，和 Word 编辑过的模板一样
+            paragraph = doc.add_paragraph("合同金额为人民币")
+            paragraph.add_run("<|amo")
+            paragraph.add_run("unt|>元（大写：<|amount_upper|>）")
+    doc.add_paragraph("<|items|>")
+    table = doc.add_table(rows=3, cols=2)
+    table.cell(0, 0).text = "地址"
+    table.cell(0, 1).text = "<|address|>"
+    table.cell(1, 0).text = "联系人"
+    table.cell(1, 1).text = "<|contact|>"
+    table.cell(2, 0).text = "签订日期"
+    table.cell(2, 1).text = "<|sign_date|>"
+    doc.save(path)
+
+
+def make_records(count: int, items: int):
+    rows = "".join(f"<tr><td>{i}</td><td>商品{i}</td><td>{i}</td><td>{i * 10}</td></tr>" for i in range(items))
+    table = f"<table><tr><th>序号</th><th>名称</th><th>数量</th><th>金额</th></tr>{rows}</table>"
+    for i in range(count):
+        record = {field: f"{field}-{i}" for field in FIELDS}
+        record["items"] = table
+        yield record
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=1000)
+    parser.add_argument("--clauses", type=int, default=200)
+    parser.add_argument("--items", type=int, default=20, help="Rows of the line-item table, 0 for none")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.docx")
+        make_template(template, args.clauses)
+        for workers in args.workers:
+            for target in ("dir", "zip"):
+                output = os.path.join(tmp, f"out-{workers}.zip" if target == "zip" else f"out-{workers}")
+                records = make_records(args.records, args.items)
+                if not args.items:
+                    records = ({k: v for k, v in r.items() if k != "items"} for r in records)
+                result = generate(template, records, output, name_field="deal_id", workers=workers)
+                print(
+                    f"workers={workers:<3} {target:<4} {result.count} docs in {result.seconds:6.2f}s "
+                    f"{result.docs_per_second:8.1f} docs/sec"
+                )
+
+
+if __name__ == "__main__":
+    main()
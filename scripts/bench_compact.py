@@ -0,0 +1,98 @@
+"""
+Compare the output tokens and latency of the part reviews with the full and the compact issue schema.
+
+    # record one review per schema against the live model (needs LLM_MODEL / LLM_API_BASE / LLM_API_KEY)
+    python scripts/bench_compact.py contract.docx --cassette cassettes/contract --record
+    # report from the recorded cassettes
+    python scripts/bench_compact.py contract.docx --cassette cassettes/contract
+
+The cassettes are written to <cassette>.full.jsonl and <cassette>.compact.jsonl. Only the part review calls
+(the calls that answer with an issue list) are compared; the classify and summary calls are the same for both.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from controller.review_controller import ReviewController  # noqa: E402
+from workflow.cassette import RecordingLLM  # noqa: E402
+from workflow.preflight import count_tokens  # noqa: E402
+from workflow.schema import CompactIssueList, IssueList  # noqa: E402
+
+MODES = {"full": IssueList, "compact": CompactIssueList}
+
+
+def review_calls(cassette: str) -> list[dict]:
+    calls = []
+    with open(cassette, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            try:
+                output = json.loads(entry["output"])
+            except ValueError:
+                continue
+            if isinstance(output, dict) and "issues" in output and "summary" not in output:
+                calls.append(entry)
+    return calls
+
+
+def report(cassette_prefix: str) -> None:
+    results = {}
+    for mode, schema in MODES.items():
+        calls = review_calls(f"{cassette_prefix}.{mode}.jsonl")
+        if not calls:
+            print(f"{mode}: no review calls in the cassette")
+            return
+        output_tokens = [count_tokens(call["output"]) for call in calls]
+        latencies = [call["latency"] for call in calls]
+        results[mode] = (sum(output_tokens), sum(latencies))
+        print(
+            f"{mode:8s} {len(calls)} calls, schema {count_tokens(str(schema.model_json_schema(mode='serialization')))} "
+            f"tokens, output {sum(output_tokens)} tokens (mean {statistics.mean(output_tokens):.0f}), "
+            f"latency {sum(latencies):.1f}s (p50 {statistics.median(latencies):.2f}s)"
+        )
+    (full_tokens, full_seconds), (compact_tokens, compact_seconds) = results["full"], results["compact"]
+    print(
+        f"compact: output tokens -{(1 - compact_tokens / full_tokens) * 100:.0f}%, "
+        f"review latency -{(1 - compact_seconds / full_seconds) * 100:.0f}%"
+    )
+
+
+async def record(document: str, cassette_prefix: str, summary: bool) -> None:
+    from workflow.clients import get_llm
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in MODES:
+            cassette = f"{cassette_prefix}.{mode}.jsonl"
+            if os.path.exists(cassette):
+                os.remove(cassette)
+            llm = RecordingLLM(llm=get_llm(), cassette=cassette)
+            controller = ReviewController(llm=llm, summary=summary, compact_output=mode == "compact")
+            start = time.perf_counter()
+            analysis = await controller.review(document, os.path.join(tmp, f"reviewed-{mode}.docx"))
+            print(f"recorded {cassette} in {time.perf_counter() - start:.1f}s, {len(analysis.issues)} issues")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("document")
+    parser.add_argument("--cassette", required=True, help="The path prefix of the cassettes")
+    parser.add_argument("--record", action="store_true", help="Record the cassettes with the live model")
+    parser.add_argument("--summary", action="store_true")
+    args = parser.parse_args()
+
+    if args.record:
+        asyncio.run(record(args.document, args.cassette, args.summary))
+    report(args.cassette)
+
+
+if __name__ == "__main__":
+    main()
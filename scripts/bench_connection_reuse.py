@@ -0,0 +1,66 @@
+"""
+Measure the connection setup overhead saved by the pooled LLM http clients.
+
+Sends the same lightweight request (GET {api_base}/models) with a new client per call,
+like a controller built per request, and with the pooled keep-alive client.
+
+Usage:
+    LLM_API_BASE=... LLM_API_KEY=... python scripts/bench_connection_reuse.py --calls 20 --parts 12
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+import httpx  # noqa: E402
+
+from workflow.clients import HTTP2, HTTP_LIMITS, HTTP_TIMEOUT, aclose, get_async_http_client  # noqa: E402
+
+
+async def timed_get(client: httpx.AsyncClient, url: str, headers: dict[str, str]) -> float:
+    start = time.perf_counter()
+    response = await client.get(url, headers=headers)
+    await response.aread()
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--api-base", default=os.environ.get("LLM_API_BASE"))
+    parser.add_argument("--api-key", default=os.environ.get("LLM_API_KEY", ""))
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--parts", type=int, default=12, help="Reviewed parts per document")
+    args = parser.parse_args()
+    if not args.api_base:
+        parser.error("--api-base or LLM_API_BASE is required")
+
+    url = args.api_base.rstrip("/") + "/models"
+    headers = {"Authorization": f"Bearer {args.api_key}"}
+
+    cold = []
+    for _ in range(args.calls):
+        async with httpx.AsyncClient(http2=HTTP2, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT) as client:
+            cold.append(await timed_get(client, url, headers))
+
+    client = get_async_http_client()
+    await timed_get(client, url, headers)  # warm up
+    warm = [await timed_get(client, url, headers) for _ in range(args.calls)]
+    await aclose()
+
+    cold_ms = statistics.median(cold) * 1000
+    warm_ms = statistics.median(warm) * 1000
+    # classify + one call per part + summary
+    calls_per_document = args.parts + 2
+    print(f"http2: {HTTP2}")
+    print(f"new client per call: median {cold_ms:.1f} ms")
+    print(f"pooled client:       median {warm_ms:.1f} ms")
+    print(f"saved per call:      {cold_ms - warm_ms:.1f} ms")
+    print(f"saved per document:  {(cold_ms - warm_ms) * calls_per_document:.1f} ms ({calls_per_document} calls)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,71 @@
+"""
+Benchmark html_table_to_word / html_tables_to_word on large merged schedules.
+
+Usage:
+    python scripts/bench_html2word.py --rows 100 --cols 100 --tables 20
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from docx import Document  # noqa: E402
+
+from prepocess.html2word import html_table_to_word, html_tables_to_word  # noqa: E402
+
+
+def make_table(rows: int, cols: int) -> str:
+    """A rows x cols grid where every 10th row starts with a 3-row label and every 5th row has a 2-column total."""
+    lines = ["<table>"]
+    covered = 0
+    for r in range(rows):
+        cells = []
+        if r % 10 == 0 and r + 3 <= rows:
+            cells.append(f'<td rowspan="3">组 {r // 10}</td>')
+            covered = 2
+        elif covered:
+            covered -= 1
+        else:
+            cells.append(f"<td>{r}</td>")
+        c = 1
+        while c < cols:
+            if r % 5 == 4 and c == cols - 2:
+                cells.append(f'<td colspan="2">小计 {r}</td>')
+                c += 2
+            else:
+                cells.append(f"<td>{r * cols + c}</td>")
+                c += 1
+        lines.append("<tr>" + "".join(cells) + "</tr>")
+    lines.append("</table>")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--cols", type=int, default=100)
+    parser.add_argument("--tables", type=int, default=20)
+    parser.add_argument("--save", default=None, help="Save the generated document")
+    args = parser.parse_args()
+
+    html = make_table(args.rows, args.cols)
+    doc = Document()
+    start = time.perf_counter()
+    html_table_to_word(html, doc)
+    single = time.perf_counter() - start
+    print(f"single {args.rows}x{args.cols} table ({args.rows * args.cols} cells): {single * 1000:.1f} ms")
+
+    small = make_table(20, 10)
+    start = time.perf_counter()
+    html_tables_to_word([small] * args.tables, doc)
+    bulk = time.perf_counter() - start
+    print(f"bulk {args.tables} tables of 20x10: {bulk * 1000:.1f} ms ({bulk / args.tables * 1000:.2f} ms/table)")
+
+    if args.save:
+        doc.save(args.save)
+
+
+if __name__ == "__main__":
+    main()
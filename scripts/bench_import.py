@@ -0,0 +1,103 @@
+"""
+Cold start benchmark: `-X importtime` profile of the controller module and ReviewController construction time.
+
+Every measurement runs in a fresh interpreter. The result is written as json so it can be tracked over time,
+and the script exits with 1 when a budget is exceeded.
+
+Usage:
+    python scripts/bench_import.py --output bench_import.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+
+IMPORT_BUDGET_MS = 300.0
+CONSTRUCT_BUDGET_MS = 3000.0
+
+CONSTRUCT_CODE = """
+import time
+start = time.perf_counter()
+from controller.review_controller import ReviewController
+from llama_index.core.llms import MockLLM
+ReviewController(llm=MockLLM())
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def import_profile(module: str) -> tuple[float, list[tuple[str, float]]]:
+    """
+    Run `python -X importtime -c "import module"` and parse the cumulative time of each top level package.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=APP_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    packages: dict[str, float] = {}
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        total_us += int(self_us)
+        # 只统计顶层包（没有缩进的行）
+        name = name[1:]
+        if not name.startswith(" "):
+            top = name.split(".")[0]
+            packages[top] = packages.get(top, 0) + int(cumulative_us) / 1000
+    return total_us / 1000, sorted(packages.items(), key=lambda x: x[1], reverse=True)
+
+
+def construct_time() -> float:
+    proc = subprocess.run(
+        [sys.executable, "-c", CONSTRUCT_CODE], cwd=APP_DIR, capture_output=True, text=True, check=True
+    )
+    return float(proc.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="controller.review_controller")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--construct-budget-ms", type=float, default=CONSTRUCT_BUDGET_MS)
+    parser.add_argument("--output", default=None, help="Write the result as json")
+    args = parser.parse_args()
+
+    runs = [import_profile(args.module) for _ in range(args.repeat)]
+    import_ms = statistics.median(run[0] for run in runs)
+    packages = runs[-1][1][: args.top]
+    construct_ms = statistics.median(construct_time() for _ in range(args.repeat))
+
+    print(f"import {args.module}: {import_ms:.1f} ms (budget {args.import_budget_ms:.0f} ms)")
+    for name, ms in packages:
+        print(f"    {name:<30}{ms:>10.1f} ms")
+    print(f"ReviewController construction: {construct_ms:.1f} ms (budget {args.construct_budget_ms:.0f} ms)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "module": args.module,
+                    "import_ms": import_ms,
+                    "construct_ms": construct_ms,
+                    "packages": dict(packages),
+                },
+                f,
+                indent=2,
+            )
+
+    if import_ms > args.import_budget_ms or construct_ms > args.construct_budget_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Compare the path-based review flow of an upload (write the upload to a temp file, review it to a temp path,
+read the result back) with the in-memory flow (ReviewController.review_bytes), latency and python memory.
+
+The LLM is replayed from a cassette recorded for the same document with scripts/bench_replay.py --record,
+without delays, so the numbers only contain parsing, annotation and I/O.
+
+Usage:
+    python scripts/bench_inmemory.py contract.docx --cassette cassettes/contract.jsonl --repeat 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from controller.review_controller import ReviewController  # noqa: E402
+from workflow.cassette import ReplayLLM  # noqa: E402
+
+
+async def path_flow(controller: ReviewController, upload: bytes) -> bytes:
+    with tempfile.TemporaryDirectory() as tmp:
+        document_path = os.path.join(tmp, "upload.docx")
+        save_path = os.path.join(tmp, "reviewed.docx")
+        with open(document_path, "wb") as f:
+            f.write(upload)
+        await controller.review(document_path, save_path)
+        with open(save_path, "rb") as f:
+            return f.read()
+
+
+async def memory_flow(controller: ReviewController, upload: bytes) -> bytes:
+    _, reviewed = await controller.review_bytes(upload, name="upload.docx")
+    return reviewed
+
+
+async def measure(flow, controller: ReviewController, upload: bytes, repeat: int) -> tuple[float, float, float]:
+    await flow(controller, upload)  # 预热
+    durations = []
+    tracemalloc.start()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await flow(controller, upload)
+        durations.append(time.perf_counter() - start)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    durations.sort()
+    return statistics.median(durations) * 1000, durations[int(len(durations) * 0.95)] * 1000, peak / 1024 / 1024
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("document")
+    parser.add_argument("--cassette", required=True)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--streaming", action="store_true", help="Parse with the streaming lxml scanner")
+    args = parser.parse_args()
+
+    with open(args.document, "rb") as f:
+        upload = f.read()
+    controller = ReviewController(
+        llm=ReplayLLM(cassette=args.cassette, latency_scale=0), streaming=args.streaming
+    )
+    print(f"{os.path.basename(args.document)}: {len(upload) / 1024:.0f} KB, {args.repeat} reviews per flow")
+    print(f"{'flow':<10}{'p50 ms':>10}{'p95 ms':>10}{'peak MB':>10}")
+    for name, flow in (("path", path_flow), ("memory", memory_flow)):
+        p50, p95, peak = await measure(flow, controller, upload, args.repeat)
+        print(f"{name:<10}{p50:>10.1f}{p95:>10.1f}{peak:>10.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,61 @@
+"""
+Measure the logging overhead per review with the queued sinks, with and without sampling.
+
+The records are emitted from the calling thread like httpx / llama-index do during a review,
+and the time spent in the caller is reported (the sinks write in a background thread).
+
+Usage:
+    python scripts/bench_logging.py --records 2000 --per-review 400
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from loguru import logger  # noqa: E402
+
+import config.log as log  # noqa: E402
+
+
+def emit(records: int) -> float:
+    chatter = logging.getLogger("httpx")
+    workflow = logging.getLogger("llama_index.core.workflow")
+    start = time.perf_counter()
+    with logger.contextualize(review_id="bench"):
+        for i in range(records):
+            chatter.info("HTTP Request: POST https://llm.example.com/v1/chat/completions %d", i)
+            workflow.debug("step review_contract produced event IssueEvent %d", i)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=2000, help="Records per logger")
+    parser.add_argument("--per-review", type=int, default=400, help="Stdlib records emitted by one review")
+    args = parser.parse_args()
+
+    log.LOG_DIR = tempfile.mkdtemp()
+    log.LOG_LEVEL = logging.DEBUG
+    log.setup()
+
+    total = args.records * 2
+    for name, sampler in (
+        ("no sampling", log.Sampler({}, {})),
+        ("sampling", log.Sampler(log.LOG_SAMPLING, log.LOG_RATE_LIMIT)),
+    ):
+        log.intercept_handler.filters = [sampler]
+        elapsed = emit(args.records)
+        per_record_us = elapsed / total * 1e6
+        print(
+            f"{name:<12} {per_record_us:8.2f} us/record, "
+            f"{per_record_us * args.per_review / 1000:8.2f} ms/review ({args.per_review} records)"
+        )
+    logger.complete()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Record a review against a live model once, then replay it offline for regression and throughput tests.
+
+    # record (needs LLM_MODEL / LLM_API_BASE / LLM_API_KEY)
+    python scripts/bench_replay.py contract.docx --cassette cassettes/contract.jsonl --record
+    # replay with the recorded latencies, 8 concurrent reviews, 3 rounds
+    python scripts/bench_replay.py contract.docx --cassette cassettes/contract.jsonl --concurrency 8 --rounds 3
+
+Replay prints the throughput and the per-review latency, and a digest of the issues, which is the same
+for every round as long as the prompts and the workflow still produce the recorded calls.
+The script exits with 1 when a prompt is not in the cassette or the issues differ between reviews.
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from controller.review_controller import ReviewController  # noqa: E402
+from workflow.cassette import CassetteMiss, RecordingLLM, ReplayLLM  # noqa: E402
+
+
+def digest(analysis) -> str:
+    issues = sorted((issue.id, issue.severity, issue.description) for issue in analysis.issues)
+    return hashlib.sha256(repr(issues).encode("utf-8")).hexdigest()[:16]
+
+
+async def review_once(controller: ReviewController, document: str, tmp: str, index: int) -> tuple[float, str]:
+    start = time.perf_counter()
+    analysis = await controller.review(document, os.path.join(tmp, f"reviewed-{index}.docx"))
+    return time.perf_counter() - start, digest(analysis)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("document")
+    parser.add_argument("--cassette", required=True)
+    parser.add_argument("--record", action="store_true", help="Record the cassette with the live model")
+    parser.add_argument("--summary", action="store_true")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="0 to replay without delays")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.record:
+            from workflow.clients import get_llm
+
+            if os.path.exists(args.cassette):
+                os.remove(args.cassette)
+            llm = RecordingLLM(llm=get_llm(), cassette=args.cassette)
+            controller = ReviewController(llm=llm, summary=args.summary)
+            seconds, issues = await review_once(controller, args.document, tmp, 0)
+            print(f"recorded {args.cassette} in {seconds:.1f}s, issues {issues}")
+            return
+
+        llm = ReplayLLM(cassette=args.cassette, latency_scale=args.latency_scale)
+        latencies = llm.latencies
+        print(
+            f"cassette: {len(latencies)} calls, recorded latency p50 {statistics.median(latencies):.2f}s "
+            f"max {max(latencies):.2f}s, scale {args.latency_scale}"
+        )
+        controller = ReviewController(llm=llm, summary=args.summary)
+        durations: list[float] = []
+        digests: set[str] = set()
+        start = time.perf_counter()
+        try:
+            for round_index in range(args.rounds):
+                results = await asyncio.gather(
+                    *(
+                        review_once(controller, args.document, tmp, round_index * args.concurrency + i)
+                        for i in range(args.concurrency)
+                    )
+                )
+                durations.extend(seconds for seconds, _ in results)
+                digests.update(d for _, d in results)
+        except CassetteMiss as e:
+            print(f"cassette miss, re-record after changing prompts or the workflow: {e}")
+            sys.exit(1)
+        wall = time.perf_counter() - start
+
+        durations.sort()
+        print(
+            f"{len(durations)} reviews in {wall:.2f}s, {len(durations) / wall * 60:.1f} reviews/min, "
+            f"latency p50 {durations[len(durations) // 2]:.2f}s p95 {durations[int(len(durations) * 0.95)]:.2f}s"
+        )
+        print(f"issues digest: {', '.join(sorted(digests))}")
+        if len(digests) != 1:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
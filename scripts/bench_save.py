@@ -0,0 +1,42 @@
+"""
+Compare Document.save with save_document, which copies the unchanged zip entries raw.
+
+    python scripts/bench_save.py contract.docx --comments 20
+
+Comments are added to the first paragraphs as the review would, then the document is saved both ways.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from workflow.package_writer import save_document  # noqa: E402
+from workflow.utils import get_contents  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("document")
+    parser.add_argument("--comments", type=int, default=20)
+    args = parser.parse_args()
+
+    contents, document = get_contents(args.document)
+    paragraphs = [content.paragraphs[0] for content in contents if content.paragraphs][: args.comments]
+    for paragraph in paragraphs:
+        paragraph.add_comment("benchmark", author="bench", initials="B")
+    print(f"{os.path.getsize(args.document) / 2**20:.1f} MB, {len(paragraphs)} comments")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        document.save(os.path.join(tmp, "save.docx"))
+        print(f"Document.save  {time.perf_counter() - start:.3f}s")
+        start = time.perf_counter()
+        save_document(document, args.document, os.path.join(tmp, "raw.docx"))
+        print(f"save_document  {time.perf_counter() - start:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Compare document-order and risk-prioritized part scheduling by replaying a recorded review.
+
+    # record the cassette first, see scripts/bench_replay.py
+    python scripts/bench_replay.py contract.docx --cassette cassettes/contract.jsonl --record
+    python scripts/bench_schedule.py contract.docx --cassette cassettes/contract.jsonl --rounds 3
+
+The replay keeps the recorded latency of every call, so the difference in wall time and in the time
+until the first high severity issue comes from the order in which the parts are reviewed.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from controller.review_controller import ReviewController  # noqa: E402
+from workflow.cassette import ReplayLLM  # noqa: E402
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("document")
+    parser.add_argument("--cassette", required=True)
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for prioritize in (False, True):
+            llm = ReplayLLM(cassette=args.cassette, latency_scale=args.latency_scale)
+            controller = ReviewController(llm=llm, prioritize=prioritize)
+            walls: list[float] = []
+            firsts: list[float] = []
+            for index in range(args.rounds):
+                analysis = await controller.review(args.document, os.path.join(tmp, f"reviewed-{index}.docx"))
+                assert analysis.stats is not None
+                walls.append(analysis.stats.wall_seconds)
+                if analysis.stats.first_high_issue_seconds is not None:
+                    firsts.append(analysis.stats.first_high_issue_seconds)
+            first = f"{statistics.median(firsts):.2f}s" if firsts else "-"
+            print(
+                f"{'prioritized' if prioritize else 'document order':15s} wall {statistics.median(walls):.2f}s, "
+                f"first high issue {first}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,103 @@
+from decimal import Decimal
+
+import pytest
+from workflow.rules import AmountRule, DateRule, PlaceholderRule, Rule, RuleEngine, parse_chinese_amount, parse_number
+from workflow.utils import Content
+
+
+def paragraph(text: str, id: int = 0) -> Content:
+    return Content(id=id, content_type="paragraph", content=text)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("壹佰元整", Decimal(100)),
+        ("壹拾万零伍佰元整", Decimal(100500)),
+        ("拾元", Decimal(10)),
+        ("壹仟贰佰叁拾肆元伍角陆分", Decimal("1234.56")),
+        ("壹亿贰仟万元整", Decimal(120000000)),
+        ("叁万元整", Decimal(30000)),
+        ("壹佰圆", Decimal(100)),
+    ],
+)
+def test_parse_chinese_amount(text: str, expected: Decimal) -> None:
+    assert parse_chinese_amount(text) == expected
+
+
+@pytest.mark.parametrize("text", ["壹佰", "壹佰美元", ""])
+def test_parse_chinese_amount_invalid(text: str) -> None:
+    assert parse_chinese_amount(text) is None
+
+
+def test_parse_number() -> None:
+    assert parse_number("100,000.00") == Decimal(100000)
+    assert parse_number("1.5", wan=True) == Decimal(15000)
+    assert parse_number("abc") is None
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "合同总价为100元（大写：壹佰元整）。",
+        "合同总价为人民币壹拾万元整（¥100,000.00）。",
+        "合同总价为¥100,000.00元（人民币壹拾万元整）。",
+        "合同总价为10万元（大写人民币：壹拾万元整）。",
+        "合同总价为壹佰元整（小写：100元）。",
+    ],
+)
+def test_amount_rule_matching_pair(text: str) -> None:
+    assert list(AmountRule().check(paragraph(text))) == []
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "合同总价为100元（大写：壹仟元整）。",
+        "合同总价为人民币壹拾万元整（¥10,000.00）。",
+        "合同总价为壹佰元整（小写：1000元）。",
+    ],
+)
+def test_amount_rule_mismatched_pair(text: str) -> None:
+    issues = list(AmountRule().check(paragraph(text)))
+    assert len(issues) == 1
+    assert issues[0].severity == "high"
+
+
+def test_amount_rule_ignores_unpaired_amounts() -> None:
+    assert list(AmountRule().check(paragraph("单价100元，总价壹仟元整。"))) == []
+    assert list(AmountRule().check(paragraph("预付款100元，余款（壹仟元整）另行支付。"))) == []
+
+
+def test_placeholder_rule() -> None:
+    issues = list(PlaceholderRule().check(paragraph("甲方：[公司名称]，联系人：____，电话：***")))
+    assert len(issues) == 1
+    assert "[公司名称]" in issues[0].description
+    assert list(PlaceholderRule().check(paragraph("甲方：北京某某有限公司"))) == []
+
+
+def test_date_rule() -> None:
+    assert len(list(DateRule().check(paragraph("本合同于2024年2月30日生效。")))) == 1
+    assert list(DateRule().check(paragraph("本合同于2024年2月29日生效。"))) == []
+
+
+def test_rule_engine_assign_part() -> None:
+    engine = RuleEngine()
+    issues = engine.check([paragraph("甲方：xxx", 0), paragraph("本合同于2023年2月29日生效。", 3)])
+    assert [issue.id for issue in issues] == [0, 3]
+    assigned = RuleEngine.assign_part(issues, 2, 5, "生效")
+    assert [(issue.id, issue.part_start_id, issue.part_end_id, issue.category) for issue in assigned] == [
+        (3, 2, 5, "生效")
+    ]
+    assert engine.prompt_hint.startswith("- 以下项目已由程序检查")
+
+
+def test_rule_is_abstract() -> None:
+    with pytest.raises(TypeError):
+        Rule()  # type: ignore[abstract]
+
+
+def test_empty_rule_engine() -> None:
+    engine = RuleEngine(rules=[])
+    assert engine.check([paragraph("甲方：xxx")]) == []
+    assert engine.prompt_hint == ""
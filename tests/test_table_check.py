@@ -0,0 +1,99 @@
+import math
+
+from workflow.table_check import TableRule, header_scale, parse_cell, table_grid
+from workflow.utils import Content
+
+
+def table(*rows: list[str], id: int = 0) -> Content:
+    html = "".join("<tr>" + "".join(f"<td>{cell}</td>" for cell in row) + "</tr>" for row in rows)
+    return Content(id=id, content_type="table", content=f"<table>{html}</table>")
+
+
+HEADER = ["名称", "数量", "单价", "金额"]
+
+
+def test_table_grid_merged_cells() -> None:
+    content = '<table><tr><td rowspan="2">a</td><td colspan="2">b</td></tr><tr><td>c</td><td>d</td></tr></table>'
+    assert table_grid(content) == [["a", "b", "b"], ["a", "c", "d"]]
+
+
+def test_parse_cell() -> None:
+    assert parse_cell("¥1,200.00") == 1200
+    assert parse_cell("10台") == 10
+    assert parse_cell("1.5万元") == 15000
+    assert math.isnan(parse_cell("见附件"))
+    assert math.isnan(parse_cell("1-2"))
+    assert parse_cell("1.5", scale=10**4) == 15000
+    assert parse_cell("1.5万元", scale=10**4) == 15000
+    assert parse_cell("人民币壹万贰仟元整（¥12,000.00）") == 12000
+    assert parse_cell("1.5 万元") == 15000
+
+
+def test_header_scale() -> None:
+    assert header_scale("金额（万元）") == 10**4
+    assert header_scale("单价（元）") == 1
+    assert header_scale("单价（元/千克）") == 1
+
+
+def test_consistent_table() -> None:
+    content = table(HEADER, ["服务器", "2", "100", "200"], ["交换机", "3", "50", "150"], ["合计", "", "", "350"])
+    assert list(TableRule().check(content)) == []
+
+
+def test_wrong_row() -> None:
+    content = table(HEADER, ["服务器", "2", "100", "210"], ["交换机", "3", "50", "150"])
+    issues = list(TableRule().check(content))
+    assert len(issues) == 1
+    assert "服务器" in issues[0].content
+    assert "200.00" in issues[0].description
+
+
+def test_wrong_grand_total() -> None:
+    content = table(HEADER, ["服务器", "2", "100", "200"], ["合计", "", "", "300"])
+    issues = list(TableRule().check(content))
+    assert len(issues) == 1
+    assert "300.00" in issues[0].description
+
+
+def test_wrong_uppercase_total() -> None:
+    content = table(HEADER, ["服务器", "2", "100", "200"], ["合计：贰佰伍拾元整", "", "", "200"])
+    issues = list(TableRule().check(content))
+    assert len(issues) == 1
+    assert "贰佰伍拾元整" in issues[0].description
+
+
+def test_uppercase_and_lowercase_total() -> None:
+    content = table(HEADER, ["服务器", "2", "6000", "12000"], ["合计", "", "", "人民币壹万贰仟元整（¥12,000.00）"])
+    assert list(TableRule().check(content)) == []
+    assert TableRule().content_hint(content) == TableRule.hint
+
+
+def test_ambiguous_tables_are_skipped() -> None:
+    # 没有数量、单价、金额表头
+    assert list(TableRule().check(table(["名称", "金额"], ["服务器", "210"]))) == []
+    # 有无法解析的行
+    content = table(HEADER, ["服务器", "2", "100", "210"], ["安装", "1", "按实结算", "见附件"])
+    assert list(TableRule().check(content)) == []
+    # 不是表格
+    assert list(TableRule().check(Content(id=0, content_type="paragraph", content="数量 单价 金额"))) == []
+
+
+def test_header_units() -> None:
+    header = ["名称", "数量", "单价（元）", "金额（万元）"]
+    content = table(header, ["服务器", "2", "50000", "10"], ["合计", "", "", "10"])
+    assert list(TableRule().check(content)) == []
+    content = table(header, ["服务器", "2", "50000", "1"])
+    assert len(list(TableRule().check(content))) == 1
+
+
+def test_different_currencies_are_skipped() -> None:
+    content = table(["名称", "数量", "单价（美元）", "金额（元）"], ["服务器", "2", "100", "1400"])
+    assert list(TableRule().check(content)) == []
+    assert TableRule().content_hint(content) == ""
+
+
+def test_content_hint_only_for_checked_tables() -> None:
+    checked = table(HEADER, ["服务器", "2", "100", "200"])
+    ambiguous = table(HEADER, ["服务器", "2", "100", "200"], ["安装", "1", "按实结算", "见附件"])
+    assert TableRule().content_hint(checked) == TableRule.hint
+    assert TableRule().content_hint(ambiguous) == ""
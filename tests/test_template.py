@@ -0,0 +1,52 @@
+import io
+
+from docx import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+from generator.template import CompiledTemplate
+from workflow.utils import normalize_runs
+
+
+def paragraph_xml(inner: str) -> str:
+    return f"<w:p {nsdecls('w', 'r')}>{inner}</w:p>"
+
+
+def test_normalize_runs_drops_container_properties() -> None:
+    p = parse_xml(
+        paragraph_xml(
+            '<w:smartTag w:uri="urn:x" w:element="place"><w:smartTagPr><w:attr w:name="a" w:val="b"/></w:smartTagPr>'
+            "<w:r><w:t>北京</w:t></w:r></w:smartTag>"
+            '<w:fldSimple w:instr="PAGE"><w:fldData>AAAA</w:fldData><w:r><w:t>市</w:t></w:r></w:fldSimple>'
+        )
+    )
+    normalize_runs(p)
+    assert [child.tag for child in p] == [qn("w:r")]
+    assert [t.text for t in p.iter(qn("w:t"))] == ["北京市"]
+
+
+def test_normalize_runs_merges_same_format_runs() -> None:
+    p = parse_xml(
+        paragraph_xml(
+            '<w:r><w:t xml:space="preserve">甲方 </w:t></w:r><w:proofErr w:type="spellStart"/>'
+            "<w:r><w:t>&lt;|party|&gt;</w:t></w:r>"
+            "<w:r><w:rPr><w:b/></w:rPr><w:t>!</w:t></w:r>"
+        )
+    )
+    normalize_runs(p)
+    assert [t.text for t in p.iter(qn("w:t"))] == ["甲方 <|party|>", "!"]
+
+
+def test_compile_keeps_hyperlinks_outside_placeholder_paragraphs() -> None:
+    document = Document()
+    document.add_paragraph("甲方：<|party|>")
+    document.add_paragraph("")._p.append(
+        parse_xml(f'<w:hyperlink {nsdecls("w", "r")} w:anchor="top"><w:r><w:t>返回顶部</w:t></w:r></w:hyperlink>')
+    )
+    buffer = io.BytesIO()
+    document.save(buffer)
+    buffer.seek(0)
+
+    template = CompiledTemplate.compile(buffer)
+    assert template.placeholders == ["party"]
+    body = Document(io.BytesIO(template.data)).element.body
+    assert len(list(body.iter(qn("w:hyperlink")))) == 1